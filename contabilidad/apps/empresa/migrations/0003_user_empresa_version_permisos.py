@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 20:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresa', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userempresa',
+            name='version_permisos',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
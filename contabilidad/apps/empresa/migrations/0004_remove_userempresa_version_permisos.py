@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-17 20:42
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresa', '0003_user_empresa_version_permisos'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='userempresa',
+            name='version_permisos',
+        ),
+    ]
@@ -0,0 +1,183 @@
+"""
+Permisos de un usuario en una empresa como máscara de bits.
+
+Cada permiso del catálogo (plantilla/seeds/seed_permiso.py) ocupa el bit de
+su posición; la máscara viaja en el token junto a `empresa` (en hexadecimal)
+con la versión del catálogo y la de los permisos del UserEmpresa.
+
+La versión de los permisos de cada UserEmpresa vive en la caché compartida
+entre procesos (CACHES['compartida']) y se reemplaza por una nueva al
+confirmar la transacción que cambia los roles del usuario o los permisos de
+sus roles (ver empresa/signals.py). TienePermiso solo lee esa versión de la
+caché, sin consultar la base: si coincide con la del token usa la máscara
+del token; si no, la resuelve de nuevo. Las versiones son uuid4, así una
+versión desalojada o perdida (caché vaciada, base recreada) no se repite y
+una entrada de la caché local de un proceso nunca reemplaza a una más nueva.
+"""
+import uuid
+import zlib
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.utils.connection import ConnectionProxy
+from rest_framework.permissions import BasePermission
+from ..models import RolEmpresa
+from ...plantilla.seeds.seed_permiso import PERMISOS
+
+CATALOGO = tuple(permiso["nombre"] for permiso in PERMISOS)
+BITS = {nombre: indice for indice, nombre in enumerate(CATALOGO)}
+# Cambia si se agrega, quita o reordena un permiso del catálogo
+VERSION_CATALOGO = format(zlib.crc32("\n".join(CATALOGO).encode()), "08x")
+
+compartida = ConnectionProxy(caches, "compartida")
+
+
+def clave_version(user_empresa_id):
+    return f"permisos:user_empresa:{user_empresa_id}:version"
+
+
+def clave_permisos(user_empresa_id, version):
+    return f"permisos:user_empresa:{user_empresa_id}:{VERSION_CATALOGO}:v{version}"
+
+
+def mascara_de(nombres):
+    """Máscara de los permisos del catálogo (los demás se ignoran)."""
+    mascara = 0
+    for nombre in nombres:
+        if nombre in BITS:
+            mascara |= 1 << BITS[nombre]
+    return mascara
+
+
+def codificar(mascara):
+    return format(mascara, "x")
+
+
+def decodificar(valor):
+    try:
+        return int(valor, 16)
+    except (TypeError, ValueError):
+        return None
+
+
+def version_permisos(user_empresa_id):
+    """
+    Versión vigente de los permisos del UserEmpresa según la caché compartida.
+    Si la entrada no está (desalojada o vaciada) se asigna una nueva: los
+    tokens anteriores dejan de coincidir y se resuelven otra vez.
+    """
+    clave = clave_version(user_empresa_id)
+    version = compartida.get(clave)
+    if version is None:
+        compartida.add(clave, uuid.uuid4().hex, timeout=None)
+        version = compartida.get(clave)
+    return version
+
+
+def invalidar_permisos(user_empresa_ids):
+    """
+    Da una versión nueva a los permisos de los usuarios cuando se confirma la
+    transacción en curso (antes, otro proceso calcularía la máscara vieja
+    con la versión nueva).
+    """
+    user_empresa_ids = set(user_empresa_ids)
+    if user_empresa_ids:
+        transaction.on_commit(lambda: compartida.set_many(
+            {clave_version(user_empresa_id): uuid.uuid4().hex for user_empresa_id in user_empresa_ids},
+            timeout=None,
+        ))
+
+
+def calcular_permisos(user_empresa_id):
+    """{"mascara", "nombres"} del UserEmpresa con una consulta sobre sus roles."""
+    nombres = set(
+        RolEmpresa.usuarios.through.objects
+        .filter(userempresa_id=user_empresa_id, rolempresa__permisos__isnull=False)
+        .values_list('rolempresa__permisos__nombre', flat=True)
+    )
+    return {
+        "mascara": mascara_de(nombres),
+        "nombres": sorted(nombres, key=lambda n: (BITS.get(n, len(BITS)), n)),
+    }
+
+
+def resolver_permisos(user_empresa_id, version=None):
+    """
+    Permisos del UserEmpresa en su versión vigente (o en `version` si ya se
+    leyó), desde la caché o calculados. Incluye la versión en "version".
+    """
+    if version is None:
+        version = version_permisos(user_empresa_id)
+    clave = clave_permisos(user_empresa_id, version)
+    permisos = cache.get(clave)
+    if permisos is None:
+        permisos = dict(calcular_permisos(user_empresa_id), version=version)
+        # Las claves de versiones anteriores dejan de usarse y la caché las desaloja
+        cache.set(clave, permisos, timeout=None)
+    return permisos
+
+
+def claims_permisos(user_empresa_id, permisos=None):
+    """Claims del token con la máscara del UserEmpresa y sus versiones."""
+    if permisos is None:
+        permisos = resolver_permisos(user_empresa_id)
+    return {
+        "user_empresa": user_empresa_id,
+        "permisos": codificar(permisos["mascara"]),
+        "permisos_v": VERSION_CATALOGO,
+        "permisos_n": permisos["version"],
+    }
+
+
+def mascara_de_request(request):
+    """
+    Máscara vigente del usuario de la request. Lee la versión de la caché
+    compartida una vez por request: si coincide con la del token usa la
+    máscara del token; si el token es anterior, la de la versión vigente.
+    """
+    if hasattr(request, '_mascara_permisos'):
+        return request._mascara_permisos
+
+    mascara = 0
+    token = request.auth
+    user_empresa_id = token.get("user_empresa") if token is not None else None
+    if user_empresa_id is not None:
+        version = version_permisos(user_empresa_id)
+        mascara = None
+        if token.get("permisos_v") == VERSION_CATALOGO and token.get("permisos_n") == version:
+            mascara = decodificar(token.get("permisos"))
+        if mascara is None:
+            mascara = resolver_permisos(user_empresa_id, version)["mascara"]
+
+    request._mascara_permisos = mascara
+    return mascara
+
+
+def tiene_permiso(request, *nombres):
+    """True si el usuario de la request tiene todos los permisos `nombres`."""
+    requerida = 0
+    for nombre in nombres:
+        if nombre not in BITS:
+            return False  # un permiso fuera del catálogo no se puede conceder
+        requerida |= 1 << BITS[nombre]
+    return mascara_de_request(request) & requerida == requerida
+
+
+class TienePermiso(BasePermission):
+    """
+    Exige los permisos que la vista declara por acción:
+
+        permission_classes = [IsAuthenticated, TienePermiso]
+        permisos_requeridos = {
+            'list': ['ver_cuenta'], 'retrieve': ['ver_cuenta'],
+            'create': ['crear_cuenta'], 'destroy': ['eliminar_cuenta'],
+        }
+
+    La clave '*' aplica a las acciones no listadas; sin entrada no se exige nada.
+    """
+    message = "No tiene permiso para realizar esta acción."
+
+    def has_permission(self, request, view):
+        requeridos = getattr(view, 'permisos_requeridos', {})
+        accion = getattr(view, 'action', None) or request.method.lower()
+        nombres = requeridos.get(accion, requeridos.get('*', []))
+        return not nombres or tiene_permiso(request, *nombres)
@@ -1,9 +1,9 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from ..plantilla.models import PlantillaClase,PlantillaRol, PlantillaCuenta
-from ..gestion_cuenta.models import ClaseCuenta, Cuenta
-from .models import Empresa,RolEmpresa,Permiso
-from django.db.models.signals import post_delete
+from ..plantilla.services.clonado import clonar_plantillas
+from .models import Empresa, Permiso, RolEmpresa, UserEmpresa
+from .services.permisos import invalidar_permisos
+from django.db.models.signals import post_delete, pre_delete, m2m_changed
 import traceback
 import os
 
@@ -22,99 +22,71 @@ def log_empresa_delete(sender, instance, using, **kwargs):
         pass
 
 @receiver(post_save, sender=Empresa)
-def crear_clases_por_defecto(sender, instance, created, **kwargs):
-    print("Clase cuentas signal triggered")
-    if created:
-        # Primero, crear un diccionario temporal para mapear plantillas a clases
-        plantilla_a_cuenta = {}
-
-        # Obtenemos todas las plantillas ordenadas por código
-        for plantilla in PlantillaClase.objects.all().order_by('codigo'):
-            # Obtenemos el padre si existe
-            padre = None
-            if plantilla.padre:
-                padre = plantilla_a_cuenta.get(plantilla.padre.id)
-
-            # Creamos la clase en la empresa
-            cuenta = ClaseCuenta.objects.create(
-                empresa=instance,
-                nombre=plantilla.nombre,
-                codigo=plantilla.codigo,
-                padre=padre
-            )
-
-            # Guardamos la relación temporal
-            plantilla_a_cuenta[plantilla.id] = cuenta
-
-@receiver(post_save, sender=Empresa)
-def crear_cuentas_por_defecto(sender, instance, created, **kwargs):
+def crear_plantillas_por_defecto(sender, instance, created, **kwargs):
     """
-    Cuando se crea una Empresa, clonar las PlantillaCuenta dentro de Cuentas de esa empresa.
+    Cuando se crea una Empresa, clonar las plantillas de clases, cuentas y
+    roles (con sus permisos) en unas pocas inserciones masivas.
     """
     if created:
-        print(f"Creando cuentas para la empresa {instance.nombre}")
-
-        for plantilla in PlantillaCuenta.objects.all().order_by("codigo"):
-            Cuenta.objects.get_or_create(
-                empresa=instance,
-                codigo=plantilla.codigo,
-                defaults={
-                    "nombre": plantilla.nombre,
-                    "estado": plantilla.estado,
-                }
-            )
+        clonar_plantillas(instance)
 
-@receiver(post_save, sender=Empresa)
-def crear_rol_por_defecto(sender, instance, created, **kwargs):
+
+# --- Versión de los permisos por UserEmpresa (services/permisos.py) ---
+
+def usuarios_de_roles(rol_ids):
+    return list(
+        RolEmpresa.usuarios.through.objects
+        .filter(rolempresa_id__in=rol_ids)
+        .values_list('userempresa_id', flat=True)
+    )
+
+
+@receiver(m2m_changed, sender=RolEmpresa.usuarios.through)
+def permisos_por_usuarios_de_rol(sender, instance, action, reverse, pk_set, **kwargs):
+    """rol.usuarios / user_empresa.roles cambian: sube la versión de esos usuarios."""
+    if action == 'pre_clear':
+        # Después del clear ya no se sabe quiénes estaban
+        instance._usuarios_previos = [instance.pk] if reverse else usuarios_de_roles([instance.pk])
+    elif action == 'post_clear':
+        invalidar_permisos(getattr(instance, '_usuarios_previos', []))
+    elif action in ('post_add', 'post_remove'):
+        invalidar_permisos([instance.pk] if reverse else pk_set)
+
+
+@receiver(m2m_changed, sender=Permiso.roles.through)
+def permisos_por_permisos_de_rol(sender, instance, action, reverse, pk_set, **kwargs):
+    """rol.permisos / permiso.roles cambian: sube la versión de los usuarios de esos roles."""
+    if action == 'pre_clear':
+        roles = [instance.pk] if reverse else list(instance.roles.values_list('id', flat=True))
+        instance._usuarios_previos = usuarios_de_roles(roles)
+    elif action == 'post_clear':
+        invalidar_permisos(getattr(instance, '_usuarios_previos', []))
+    elif action in ('post_add', 'post_remove'):
+        invalidar_permisos(usuarios_de_roles([instance.pk] if reverse else pk_set))
+
+
+@receiver(pre_delete, sender=RolEmpresa)
+@receiver(pre_delete, sender=Permiso)
+def usuarios_antes_de_borrar(sender, instance, **kwargs):
+    # El borrado elimina las filas intermedias sin disparar m2m_changed
+    roles = [instance.pk] if sender is RolEmpresa else list(instance.roles.values_list('id', flat=True))
+    instance._usuarios_previos = usuarios_de_roles(roles)
+
+
+@receiver(post_delete, sender=RolEmpresa)
+@receiver(post_delete, sender=Permiso)
+def permisos_despues_de_borrar(sender, instance, **kwargs):
+    invalidar_permisos(getattr(instance, '_usuarios_previos', []))
+
+
+@receiver(post_save, sender=UserEmpresa)
+def permisos_de_user_empresa_nuevo(sender, instance, created, **kwargs):
+    # Un id reutilizado (base recreada) no hereda la versión del anterior
     if created:
-        plantilla_rol = {}
-
-        # Definición de permisos por tipo de rol
-        permisos_contador = [
-            "ver_cuenta", "crear_cuenta", "editar_cuenta", "eliminar_cuenta",
-            "ver_asiento", "crear_asiento", "editar_asiento", "eliminar_asiento",
-            "ver_movimiento","ver_libro_diario", "ver_libro_mayor",
-            "ver_balancel_general","ver_estado_resultado","ver_clase_cuenta"
-        ]
-
-        permisos_auxiliar = [
-            "ver_cuenta", "crear_cuenta",
-            "ver_clase_cuenta", 
-            "ver_asiento", "crear_asiento",
-            "ver_movimiento",
-            "ver_libro_diario", "ver_libro_mayor",
-            "ver_balancel_general","ver_estado_resultado",
-        ]
-
-        permisos_auditor = [
-            "ver_cuenta", "ver_clase_cuenta", "ver_asiento",
-            "ver_movimiento", "ver_libro_diario", "ver_libro_mayor",
-            "ver_balancel_general","ver_estado_resultado",
-        ]
-
-        for plantilla in PlantillaRol.objects.all():
-            rol = RolEmpresa.objects.create(
-                empresa=instance,
-                nombre=plantilla.nombre,
-            )
-
-            nombre_rol = plantilla.nombre.lower()
-
-            # 🔹 Administrador → todos los permisos
-            if nombre_rol == "admin":
-                rol.permisos.set(Permiso.objects.all())
-
-            # 🔹 Contador
-            elif nombre_rol == "contador":
-                rol.permisos.set(Permiso.objects.filter(nombre__in=permisos_contador))
-
-            # 🔹 Auxiliar contable
-            elif nombre_rol in ["auxiliar contable", "auxiliar_contable"]:
-                rol.permisos.set(Permiso.objects.filter(nombre__in=permisos_auxiliar))
-
-            # 🔹 Auditor
-            elif nombre_rol == "auditor":
-                rol.permisos.set(Permiso.objects.filter(nombre__in=permisos_auditor))
-
-            plantilla_rol[plantilla.id] = rol
+        invalidar_permisos([instance.pk])
+
 
+@receiver(post_delete, sender=UserEmpresa)
+def permisos_de_user_empresa_borrado(sender, instance, **kwargs):
+    # Los tokens del UserEmpresa borrado dejan de coincidir y quedan sin permisos
+    invalidar_permisos([instance.pk])
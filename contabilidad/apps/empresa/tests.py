@@ -1,3 +1,222 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from .models import Empresa, Permiso, RolEmpresa, UserEmpresa
+from ..plantilla.models import VersionPlantilla
+from ..plantilla.seeds import seed_permiso
+from ..plantilla.services.clonado import cargar_plantillas
+from ..usuario.models import Persona, User
+from .services.permisos import (
+    BITS, TienePermiso, calcular_permisos, claims_permisos, codificar, compartida,
+    decodificar, mascara_de, version_permisos,
+)
+
+
+class ClonadoPlantillasTests(TestCase):
+    """El conjunto cacheado de plantillas no sobrevive a una base vaciada y resembrada."""
+
+    def test_empresa_creada_despues_de_recrear_los_permisos(self):
+        cargar_plantillas()  # deja el conjunto en la caché con los ids actuales
+        ids_anteriores = set(Permiso.objects.values_list('id', flat=True))
+
+        # Como un flush: se borran los permisos y la fila de versión y se vuelve a sembrar
+        Permiso.objects.all().delete()
+        VersionPlantilla.objects.all().delete()
+        seed_permiso.run()
+        self.assertTrue(ids_anteriores.isdisjoint(Permiso.objects.values_list('id', flat=True)))
+
+        empresa = Empresa.objects.create(nombre="Empresa Resembrada", nit=10)
+        permisos_roles = Permiso.roles.through.objects.filter(rolempresa__empresa=empresa)
+        self.assertTrue(permisos_roles.exists())
+        self.assertFalse(permisos_roles.exclude(permiso_id__in=Permiso.objects.values('id')).exists())
+
+    def test_cada_cambio_genera_una_marca_nueva(self):
+        VersionPlantilla.incrementar()
+        marca = VersionPlantilla.actual()
+        VersionPlantilla.objects.all().delete()
+        VersionPlantilla.incrementar()
+        self.assertNotEqual(VersionPlantilla.actual(), marca)
+
+
+class PermisosMixin:
+    """Empresa con un rol propio de permisos conocidos y dos usuarios."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.empresa = Empresa.objects.create(nombre="Empresa Permisos", nit=20)
+        cls.ue, cls.otro = [
+            UserEmpresa.objects.create(
+                usuario=User.objects.create_user(
+                    nombre, "clave", persona=Persona.objects.create(nombre=nombre, apellido="Prueba"),
+                ),
+                empresa=cls.empresa,
+            )
+            for nombre in ("permisos_ana", "permisos_luis")
+        ]
+        cls.ver = Permiso.objects.get(nombre="ver_cuenta")
+        cls.crear = Permiso.objects.get(nombre="crear_cuenta")
+        cls.rol = RolEmpresa.objects.create(nombre="Pruebas", empresa=cls.empresa)
+        cls.rol.permisos.add(cls.ver, cls.crear)
+        cls.rol.usuarios.add(cls.ue)
+        cls.vacio = RolEmpresa.objects.create(nombre="Vacío", empresa=cls.empresa)
+        cls.suelto = Permiso.objects.create(nombre="permiso_de_prueba")
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        compartida.clear()
+
+
+class MascaraPermisosTests(PermisosMixin, TestCase):
+
+    def test_mascara_de_los_nombres(self):
+        mascara = mascara_de(["ver_cuenta", "crear_cuenta", "fuera_del_catalogo"])
+        self.assertEqual(mascara, (1 << BITS["ver_cuenta"]) | (1 << BITS["crear_cuenta"]))
+        self.assertEqual(decodificar(codificar(mascara)), mascara)
+        self.assertIsNone(decodificar("no es hexadecimal"))
+        self.assertIsNone(decodificar(None))
+
+    def test_calcular_permisos_une_los_roles(self):
+        otro_rol = RolEmpresa.objects.create(nombre="Otro", empresa=self.empresa)
+        otro_rol.permisos.add(self.ver, Permiso.objects.get(nombre="eliminar_cuenta"), self.suelto)
+        otro_rol.usuarios.add(self.ue)
+
+        permisos = calcular_permisos(self.ue.pk)
+        self.assertEqual(permisos["mascara"], mascara_de(["ver_cuenta", "crear_cuenta", "eliminar_cuenta"]))
+        # En el orden del catálogo; los que no están en él van al final
+        self.assertEqual(
+            permisos["nombres"], ["ver_cuenta", "crear_cuenta", "eliminar_cuenta", "permiso_de_prueba"]
+        )
+        self.assertEqual(calcular_permisos(self.otro.pk), {"mascara": 0, "nombres": []})
+
+
+class VersionPermisosTests(PermisosMixin, TestCase):
+    """Cada cambio de roles o permisos da una versión nueva solo a los usuarios afectados."""
+
+    @contextmanager
+    def assertVersionNueva(self, cambian, siguen=()):
+        antes = {ue.pk: version_permisos(ue.pk) for ue in (*cambian, *siguen)}
+        with self.captureOnCommitCallbacks(execute=True):
+            yield
+        for ue in cambian:
+            self.assertNotEqual(version_permisos(ue.pk), antes[ue.pk])
+        for ue in siguen:
+            self.assertEqual(version_permisos(ue.pk), antes[ue.pk])
+
+    def test_la_version_se_lee_de_la_cache_sin_consultas(self):
+        version = version_permisos(self.ue.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(version_permisos(self.ue.pk), version)
+
+    def test_la_version_cambia_al_confirmar(self):
+        antes = version_permisos(self.ue.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.vacio.usuarios.add(self.ue)
+            self.assertEqual(version_permisos(self.ue.pk), antes)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(version_permisos(self.ue.pk), antes)
+
+    def test_usuarios_de_un_rol(self):
+        with self.assertVersionNueva([self.otro], siguen=[self.ue]):
+            self.vacio.usuarios.add(self.otro)
+        with self.assertVersionNueva([self.otro], siguen=[self.ue]):
+            self.vacio.usuarios.remove(self.otro)
+        with self.assertVersionNueva([self.ue], siguen=[self.otro]):
+            self.rol.usuarios.clear()
+
+    def test_roles_de_un_usuario(self):
+        with self.assertVersionNueva([self.otro], siguen=[self.ue]):
+            self.otro.roles.add(self.rol)
+        with self.assertVersionNueva([self.otro], siguen=[self.ue]):
+            self.otro.roles.remove(self.rol)
+        with self.assertVersionNueva([self.ue], siguen=[self.otro]):
+            self.ue.roles.clear()
+
+    def test_permisos_de_un_rol(self):
+        with self.assertVersionNueva([self.ue], siguen=[self.otro]):
+            self.rol.permisos.add(self.suelto)
+        with self.assertVersionNueva([self.ue], siguen=[self.otro]):
+            self.rol.permisos.remove(self.suelto)
+        with self.assertVersionNueva([self.ue], siguen=[self.otro]):
+            self.rol.permisos.clear()
+
+    def test_roles_de_un_permiso(self):
+        with self.assertVersionNueva([self.ue], siguen=[self.otro]):
+            self.suelto.roles.add(self.rol)
+        with self.assertVersionNueva([self.ue], siguen=[self.otro]):
+            self.suelto.roles.remove(self.rol)
+        self.suelto.roles.add(self.rol)
+        with self.assertVersionNueva([self.ue], siguen=[self.otro]):
+            self.suelto.roles.clear()
+
+    def test_borrar_un_rol_o_un_permiso(self):
+        self.vacio.usuarios.add(self.otro)
+        with self.assertVersionNueva([self.ue], siguen=[self.otro]):
+            self.suelto.roles.add(self.rol)
+        with self.assertVersionNueva([self.ue], siguen=[self.otro]):
+            self.suelto.delete()
+        with self.assertVersionNueva([self.otro], siguen=[self.ue]):
+            self.vacio.delete()
+        with self.assertVersionNueva([self.ue], siguen=[self.otro]):
+            self.rol.delete()
+
+    def test_borrar_el_user_empresa(self):
+        with self.assertVersionNueva([self.ue], siguen=[self.otro]):
+            UserEmpresa.objects.filter(pk=self.ue.pk).delete()
+
+
+class TienePermisoTests(PermisosMixin, TestCase):
+    """TienePermiso usa la máscara del token mientras su versión sea la vigente."""
+
+    permisos_requeridos = {
+        'list': ['ver_cuenta'],
+        'create': ['ver_cuenta', 'crear_cuenta'],
+        'destroy': ['eliminar_cuenta'],
+        'metadata': [],
+        '*': ['fuera_del_catalogo'],
+    }
+
+    def permite(self, token, accion):
+        request = SimpleNamespace(auth=token, method="GET")
+        vista = SimpleNamespace(action=accion, permisos_requeridos=self.permisos_requeridos)
+        return TienePermiso().has_permission(request, vista)
+
+    def test_token_vigente_sin_consultas(self):
+        token = claims_permisos(self.ue.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(self.permite(token, 'list'))
+            self.assertTrue(self.permite(token, 'create'))
+            self.assertFalse(self.permite(token, 'destroy'))
+            self.assertTrue(self.permite(token, 'metadata'))
+            self.assertFalse(self.permite(token, 'retrieve'))
+
+    def test_token_anterior_al_cambio_de_permisos(self):
+        token = claims_permisos(self.ue.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rol.permisos.remove(self.crear)
+
+        self.assertTrue(self.permite(token, 'list'))
+        self.assertFalse(self.permite(token, 'create'))
+        # La máscara de la versión nueva queda en la caché para los demás procesos
+        with self.assertNumQueries(0):
+            self.assertFalse(self.permite(token, 'create'))
+
+    def test_token_de_otro_catalogo(self):
+        token = dict(claims_permisos(self.ue.pk), permisos_v="otro", permisos=codificar((1 << len(BITS)) - 1))
+        self.assertTrue(self.permite(token, 'create'))
+        self.assertFalse(self.permite(token, 'destroy'))
+
+    def test_user_empresa_borrado(self):
+        token = claims_permisos(self.ue.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            UserEmpresa.objects.filter(pk=self.ue.pk).delete()
+        self.assertFalse(self.permite(token, 'list'))
+
+    def test_token_sin_user_empresa(self):
+        self.assertFalse(self.permite({"empresa": str(self.empresa.pk)}, 'list'))
+        self.assertFalse(self.permite(None, 'list'))
+        self.assertTrue(self.permite(None, 'metadata'))
@@ -7,7 +7,7 @@ from ..serializers import LoginEmpresaSerializer
 from ...empresa.serializers import CustomDetailSerializer
 from ...usuario.serializers import UsuarioDetailSerializer
 from ..serializers import   UserEmpresaDetailSerializer
-from ...empresa.models import Permiso
+from ..services.permisos import claims_permisos, resolver_permisos
 from ...utils.log import registrar_evento
 
 class AuthViewSet(viewsets.ViewSet):
@@ -27,13 +27,14 @@ class AuthViewSet(viewsets.ViewSet):
         custom = CustomDetailSerializer(user_empresa.custom).data
         user = UsuarioDetailSerializer(user_obj).data
         roles = user_empresa.roles.values_list('nombre', flat=True)
-        permisos_list = list(
-            Permiso.objects.filter(roles__in=user_empresa.roles.all())
-            .values_list('nombre', flat=True)
-            .distinct()
-)
+        # Permisos de la versión vigente del UserEmpresa (caché por versión)
+        permisos = resolver_permisos(user_empresa.id)
+        permisos_list = permisos["nombres"]
         refresh = RefreshToken.for_user(user_obj)   
         refresh['empresa'] = str(empresa.id)  # ✅ Guardamos la empresa en el token
+        # Máscara y versión de los permisos para TienePermiso
+        for claim, valor in claims_permisos(user_empresa.id, permisos).items():
+            refresh[claim] = valor
         access_token = str(refresh.access_token)
         refresh_token = str(refresh)
         datos_usuario = {
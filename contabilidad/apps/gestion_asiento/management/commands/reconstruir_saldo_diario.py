@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from contabilidad.apps.empresa.models import Empresa
+from contabilidad.apps.gestion_asiento.models import SaldoDiario
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye la tabla SaldoDiario a partir de los movimientos existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--empresa',
+            type=str,
+            help='ID de la empresa a reconstruir (por defecto todas)',
+        )
+
+    def handle(self, *args, **options):
+        empresas = Empresa.objects.all()
+        if options['empresa']:
+            empresas = empresas.filter(id=options['empresa'])
+
+        for empresa in empresas:
+            filas = SaldoDiario.reconstruir(empresa.id)
+            self.stdout.write(f"{empresa.nombre}: {filas} saldos diarios")
+
+        self.stdout.write(self.style.SUCCESS("✅ Saldos diarios reconstruidos"))
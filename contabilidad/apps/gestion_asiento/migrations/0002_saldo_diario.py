@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresa', '0002_initial'),
+        ('gestion_asiento', '0001_initial'),
+        ('gestion_cuenta', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('debe', models.DecimalField(decimal_places=3, default=0, max_digits=20)),
+                ('haber', models.DecimalField(decimal_places=3, default=0, max_digits=20)),
+                ('cuenta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_diarios', to='gestion_cuenta.cuenta')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_diarios', to='empresa.empresa')),
+            ],
+            options={
+                'db_table': 'saldo_diario',
+                'indexes': [models.Index(fields=['empresa', 'fecha'], name='saldo_diario_empresa_fecha')],
+                'unique_together': {('empresa', 'cuenta', 'fecha')},
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresa', '0002_initial'),
+        ('gestion_asiento', '0002_saldo_diario'),
+        ('gestion_cuenta', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CierrePeriodo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio', models.PositiveIntegerField()),
+                ('mes', models.PositiveSmallIntegerField()),
+                ('fecha_fin', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cierres', to='empresa.empresa')),
+            ],
+            options={
+                'db_table': 'cierre_periodo',
+            },
+        ),
+        migrations.CreateModel(
+            name='SaldoCierre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('debe', models.DecimalField(decimal_places=3, default=0, max_digits=20)),
+                ('haber', models.DecimalField(decimal_places=3, default=0, max_digits=20)),
+                ('cierre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos', to='gestion_asiento.cierreperiodo')),
+                ('cuenta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_cierre', to='gestion_cuenta.cuenta')),
+            ],
+            options={
+                'db_table': 'saldo_cierre',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='cierreperiodo',
+            index=models.Index(fields=['empresa', 'fecha_fin'], name='cierre_empresa_fecha_fin'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='cierreperiodo',
+            unique_together={('empresa', 'anio', 'mes')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='saldocierre',
+            unique_together={('cierre', 'cuenta')},
+        ),
+    ]
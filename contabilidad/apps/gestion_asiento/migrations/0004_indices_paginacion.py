@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresa', '0002_initial'),
+        ('gestion_asiento', '0003_cierre_periodo'),
+        ('gestion_cuenta', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asientocontable',
+            index=models.Index(fields=['empresa', 'numero', 'id'], name='asiento_empresa_numero_id'),
+        ),
+        migrations.AddIndex(
+            model_name='movimiento',
+            index=models.Index(fields=['asiento_contable', 'id'], name='movimiento_asiento_id'),
+        ),
+    ]
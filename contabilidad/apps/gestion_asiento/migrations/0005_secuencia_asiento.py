@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def iniciar_secuencias(apps, schema_editor):
+    """Cada empresa con asientos continúa su numeración desde el mayor número usado."""
+    AsientoContable = apps.get_model('gestion_asiento', 'AsientoContable')
+    SecuenciaAsiento = apps.get_model('gestion_asiento', 'SecuenciaAsiento')
+
+    ultimos = (
+        AsientoContable.objects.values('empresa_id')
+        .annotate(ultimo=Max('numero'))
+        .order_by()
+    )
+    SecuenciaAsiento.objects.bulk_create([
+        SecuenciaAsiento(empresa_id=fila['empresa_id'], gestion=0, ultimo=fila['ultimo'] or 0)
+        for fila in ultimos
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresa', '0002_initial'),
+        ('gestion_asiento', '0004_indices_paginacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SecuenciaAsiento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gestion', models.PositiveSmallIntegerField(default=0)),
+                ('ultimo', models.PositiveIntegerField(default=0)),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='secuencias_asiento', to='empresa.empresa')),
+            ],
+            options={
+                'db_table': 'secuencia_asiento',
+                'unique_together': {('empresa', 'gestion')},
+            },
+        ),
+        migrations.RunPython(iniciar_secuencias, migrations.RunPython.noop),
+    ]
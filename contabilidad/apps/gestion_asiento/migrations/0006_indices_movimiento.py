@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresa', '0002_initial'),
+        ('gestion_asiento', '0005_secuencia_asiento'),
+        ('gestion_cuenta', '0003_cuenta_primer_digito'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asientocontable',
+            index=models.Index(fields=['empresa', 'created_at'], name='asiento_empresa_creado'),
+        ),
+        migrations.AddIndex(
+            model_name='asientocontable',
+            index=models.Index(fields=['empresa', 'estado', 'numero'], name='asiento_empresa_estado_num'),
+        ),
+        migrations.AddIndex(
+            model_name='movimiento',
+            index=models.Index(fields=['cuenta', 'asiento_contable'], name='movimiento_cuenta_asiento'),
+        ),
+        migrations.AddIndex(
+            model_name='movimiento',
+            index=models.Index(fields=['debe', 'asiento_contable'], name='movimiento_debe_asiento'),
+        ),
+        migrations.AddIndex(
+            model_name='movimiento',
+            index=models.Index(fields=['haber', 'asiento_contable'], name='movimiento_haber_asiento'),
+        ),
+    ]
@@ -1,2 +1,5 @@
 from .asiento_contable import AsientoContable
-from .movimiento import Movimiento
\ No newline at end of file
+from .movimiento import Movimiento
+from .saldo_diario import SaldoDiario
+from .cierre_periodo import CierrePeriodo, SaldoCierre
+from .secuencia_asiento import SecuenciaAsiento
@@ -1,7 +1,5 @@
-from django.db import models
+from django.db import models, transaction
 from ...empresa.models import Empresa
-from django.db.models import Max
-from django.db import transaction
 import uuid
 
 class AsientoContable(models.Model):
@@ -13,6 +11,13 @@ class AsientoContable(models.Model):
     class Meta:
         db_table = "asiento_contable"
         unique_together = ('numero','empresa')
+        indexes = [
+            # Paginación keyset por (numero, id) dentro de la empresa
+            models.Index(fields=['empresa', 'numero', 'id'], name='asiento_empresa_numero_id'),
+            # Filtros del listado de movimientos: rango de fechas y estado
+            models.Index(fields=['empresa', 'created_at'], name='asiento_empresa_creado'),
+            models.Index(fields=['empresa', 'estado', 'numero'], name='asiento_empresa_estado_num'),
+        ]
         
     id = models.UUIDField(primary_key=True,editable=False,default=uuid.uuid4)
     numero = models.PositiveIntegerField(blank=True,null=True)
@@ -23,18 +28,29 @@ class AsientoContable(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def reservar_numeros(cls, empresa_id, cantidad=1):
+        """
+        Reserva `cantidad` números consecutivos para la empresa y devuelve el
+        primero. Debe llamarse dentro de la transacción que guarda los asientos.
+        """
+        from .secuencia_asiento import SecuenciaAsiento
+
+        return SecuenciaAsiento.reservar(empresa_id, cantidad)
+
     def save(self, *args, **kwargs):
-        # Solo asignar numero si es un registro nuevo
+        # Solo asignar numero si es un registro nuevo; la reserva y el INSERT van
+        # en la misma transacción para no dejar huecos si el guardado falla
         if not self.numero:
-            with transaction.atomic():
-                # Bloquear los registros de la empresa para evitar duplicados
-                ultimo_numero = (
-                    AsientoContable.objects
-                    .select_for_update()
-                    .filter(empresa=self.empresa)
-                    .aggregate(Max('numero'))['numero__max'] or 0
-                )
-                self.numero = ultimo_numero + 1
+            try:
+                with transaction.atomic():
+                    self.numero = AsientoContable.reservar_numeros(self.empresa_id)
+                    super().save(*args, **kwargs)
+            except Exception:
+                # El número reservado se revirtió con la transacción
+                self.numero = None
+                raise
+            return
 
         super().save(*args, **kwargs)
     
@@ -0,0 +1,92 @@
+import calendar
+from datetime import date
+from django.db import models, transaction
+from django.db.models import Sum
+from django.utils import timezone
+from ...empresa.models import Empresa
+from ...gestion_cuenta.models.cuenta import Cuenta
+from .saldo_diario import SaldoDiario
+
+
+class CierrePeriodo(models.Model):
+    """
+    Cierre mensual de una empresa. Guarda en SaldoCierre el acumulado de
+    debe/haber de cada cuenta hasta el último día del mes (inclusive).
+    Todo asiento con fecha de creación hasta `fecha_fin` queda bloqueado.
+    """
+    class Meta:
+        db_table = "cierre_periodo"
+        unique_together = ('empresa', 'anio', 'mes')
+        indexes = [
+            models.Index(fields=['empresa', 'fecha_fin'], name='cierre_empresa_fecha_fin'),
+        ]
+
+    empresa = models.ForeignKey(Empresa, on_delete=models.CASCADE, related_name='cierres')
+    anio = models.PositiveIntegerField()
+    mes = models.PositiveSmallIntegerField()
+    fecha_fin = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def ultimo(cls, empresa_id, antes_de=None):
+        """Último cierre de la empresa, opcionalmente con fecha_fin < antes_de."""
+        qs = cls.objects.filter(empresa_id=empresa_id)
+        if antes_de is not None:
+            qs = qs.filter(fecha_fin__lt=antes_de)
+        return qs.order_by('-fecha_fin').first()
+
+    @classmethod
+    def periodo_cerrado(cls, empresa_id, fecha):
+        """True si `fecha` cae dentro de un periodo ya cerrado de la empresa."""
+        return cls.objects.filter(empresa_id=empresa_id, fecha_fin__gte=fecha).exists()
+
+    @classmethod
+    def asiento_cerrado(cls, asiento):
+        """True si el asiento pertenece a un periodo cerrado (según su created_at)."""
+        return cls.periodo_cerrado(asiento.empresa_id, timezone.localtime(asiento.created_at).date())
+
+    @classmethod
+    def cerrar(cls, empresa_id, anio, mes):
+        """
+        Cierra el mes indicado: último cierre + saldos diarios posteriores
+        hasta fin de mes. Se asume que el mes es posterior al último cierre.
+        """
+        fecha_fin = date(anio, mes, calendar.monthrange(anio, mes)[1])
+        anterior = cls.ultimo(empresa_id)
+
+        acumulado = {}
+        delta = SaldoDiario.objects.filter(empresa_id=empresa_id, fecha__lte=fecha_fin)
+        if anterior:
+            for saldo in anterior.saldos.all():
+                acumulado[saldo.cuenta_id] = [saldo.debe, saldo.haber]
+            delta = delta.filter(fecha__gt=anterior.fecha_fin)
+
+        filas = delta.values('cuenta_id').annotate(total_debe=Sum('debe'), total_haber=Sum('haber')).order_by()
+        for fila in filas:
+            debe, haber = acumulado.get(fila['cuenta_id'], [0, 0])
+            acumulado[fila['cuenta_id']] = [debe + (fila['total_debe'] or 0), haber + (fila['total_haber'] or 0)]
+
+        with transaction.atomic():
+            cierre = cls.objects.create(empresa_id=empresa_id, anio=anio, mes=mes, fecha_fin=fecha_fin)
+            SaldoCierre.objects.bulk_create([
+                SaldoCierre(cierre=cierre, cuenta_id=cuenta_id, debe=debe, haber=haber)
+                for cuenta_id, (debe, haber) in acumulado.items()
+            ], batch_size=1000)
+        return cierre
+
+    def __str__(self):
+        return f"Cierre {self.mes:02d}/{self.anio} - {self.empresa_id}"
+
+
+class SaldoCierre(models.Model):
+    class Meta:
+        db_table = "saldo_cierre"
+        unique_together = ('cierre', 'cuenta')
+
+    cierre = models.ForeignKey(CierrePeriodo, on_delete=models.CASCADE, related_name='saldos')
+    cuenta = models.ForeignKey(Cuenta, on_delete=models.CASCADE, related_name='saldos_cierre')
+    debe = models.DecimalField(max_digits=20, decimal_places=3, default=0)
+    haber = models.DecimalField(max_digits=20, decimal_places=3, default=0)
+
+    def __str__(self):
+        return f"{self.cierre} - {self.cuenta_id}: {self.debe} / {self.haber}"
@@ -6,6 +6,14 @@ import uuid
 class Movimiento(models.Model):
     class Meta:
         db_table = "movimiento"
+        indexes = [
+            # Recorrido de los movimientos de cada asiento en orden (asiento.numero, id)
+            models.Index(fields=['asiento_contable', 'id'], name='movimiento_asiento_id'),
+            # Filtros del listado: por cuenta y por monto (debe o haber)
+            models.Index(fields=['cuenta', 'asiento_contable'], name='movimiento_cuenta_asiento'),
+            models.Index(fields=['debe', 'asiento_contable'], name='movimiento_debe_asiento'),
+            models.Index(fields=['haber', 'asiento_contable'], name='movimiento_haber_asiento'),
+        ]
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     referencia = models.CharField(max_length=100,null=True,blank=True)
     debe = models.DecimalField(max_digits=10,decimal_places=3)
@@ -0,0 +1,135 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from ...empresa.models import Empresa
+from ...gestion_cuenta.models.cuenta import Cuenta
+from .movimiento import Movimiento
+
+
+class SaldoDiario(models.Model):
+    """
+    Totales de debe/haber por (empresa, cuenta, día) para que los reportes
+    no tengan que recorrer todos los movimientos del historial.
+    El día es la fecha de `created_at` del asiento, igual que en los reportes.
+    """
+    class Meta:
+        db_table = "saldo_diario"
+        unique_together = ('empresa', 'cuenta', 'fecha')
+        indexes = [
+            models.Index(fields=['empresa', 'fecha'], name='saldo_diario_empresa_fecha'),
+        ]
+
+    empresa = models.ForeignKey(Empresa, on_delete=models.CASCADE, related_name='saldos_diarios')
+    cuenta = models.ForeignKey(Cuenta, on_delete=models.CASCADE, related_name='saldos_diarios')
+    fecha = models.DateField()
+    debe = models.DecimalField(max_digits=20, decimal_places=3, default=0)
+    haber = models.DecimalField(max_digits=20, decimal_places=3, default=0)
+
+    @classmethod
+    def registrar(cls, asiento, movimientos, signo=1):
+        """
+        Suma (signo=1) o resta (signo=-1) los movimientos de un asiento
+        en los saldos del día del asiento. Solo toca una fila por cuenta.
+        """
+        fecha = timezone.localtime(asiento.created_at).date()
+        cls.aplicar(asiento.empresa_id, fecha, movimientos, signo)
+
+    @classmethod
+    def aplicar(cls, empresa_id, fecha, movimientos, signo=1):
+        """
+        Suma (o resta) movimientos de cualquier cantidad de asientos del mismo
+        día con un número fijo de consultas: lee las filas del día de una vez
+        y escribe con bulk_update/bulk_create.
+        `movimientos` puede mezclar montos negativos para aplicar un neto.
+        """
+        deltas = defaultdict(lambda: [Decimal("0"), Decimal("0")])
+        for mov in movimientos:
+            deltas[mov.cuenta_id][0] += Decimal(mov.debe) * signo
+            deltas[mov.cuenta_id][1] += Decimal(mov.haber) * signo
+        # Las cuentas cuyo neto es cero (p. ej. una línea editada sin cambiar montos) no se tocan
+        deltas = {cuenta_id: delta for cuenta_id, delta in deltas.items() if delta[0] or delta[1]}
+
+        if not deltas:
+            return
+
+        with transaction.atomic():
+            # Filas del día ya existentes, bloqueadas hasta el fin de la transacción
+            filas = {
+                saldo.cuenta_id: saldo
+                for saldo in cls.objects.select_for_update().filter(
+                    empresa_id=empresa_id, fecha=fecha, cuenta_id__in=list(deltas)
+                )
+            }
+            modificadas, nuevas = [], []
+            for cuenta_id, (debe, haber) in deltas.items():
+                saldo = filas.get(cuenta_id)
+                if saldo is None:
+                    nuevas.append(cls(empresa_id=empresa_id, cuenta_id=cuenta_id, fecha=fecha, debe=debe, haber=haber))
+                else:
+                    saldo.debe += debe
+                    saldo.haber += haber
+                    modificadas.append(saldo)
+
+            cls.objects.bulk_update(modificadas, ['debe', 'haber'], batch_size=500)
+            try:
+                with transaction.atomic():
+                    cls.objects.bulk_create(nuevas, batch_size=500)
+            except IntegrityError:
+                # Otra transacción creó alguna de las filas del día: sumar fila por fila
+                for saldo in nuevas:
+                    cls.sumar(empresa_id, saldo.cuenta_id, fecha, saldo.debe, saldo.haber)
+
+            # Un día que queda sin movimientos no debe aparecer en los reportes
+            vacias = [saldo.pk for saldo in modificadas if not saldo.debe and not saldo.haber]
+            if vacias:
+                cls.objects.filter(pk__in=vacias).delete()
+
+    @classmethod
+    def sumar(cls, empresa_id, cuenta_id, fecha, debe, haber):
+        """Suma un delta a una sola fila con UPDATE atómico (la crea si no existe)."""
+        filtro = cls.objects.filter(empresa_id=empresa_id, cuenta_id=cuenta_id, fecha=fecha)
+        if filtro.update(debe=F('debe') + debe, haber=F('haber') + haber):
+            return
+        _, creado = cls.objects.get_or_create(
+            empresa_id=empresa_id,
+            cuenta_id=cuenta_id,
+            fecha=fecha,
+            defaults={"debe": debe, "haber": haber},
+        )
+        if not creado:
+            filtro.update(debe=F('debe') + debe, haber=F('haber') + haber)
+
+    @classmethod
+    def reconstruir(cls, empresa_id):
+        """
+        Recalcula desde cero los saldos diarios de la empresa a partir de Movimiento.
+        Devuelve la cantidad de filas generadas.
+        """
+        filas = (
+            Movimiento.objects.filter(asiento_contable__empresa_id=empresa_id)
+            .annotate(dia=TruncDate('asiento_contable__created_at'))
+            .values('cuenta_id', 'dia')
+            .annotate(total_debe=Sum('debe'), total_haber=Sum('haber'))
+            .order_by()
+        )
+        saldos = [
+            cls(
+                empresa_id=empresa_id,
+                cuenta_id=fila['cuenta_id'],
+                fecha=fila['dia'],
+                debe=fila['total_debe'] or 0,
+                haber=fila['total_haber'] or 0,
+            )
+            for fila in filas
+        ]
+
+        with transaction.atomic():
+            cls.objects.filter(empresa_id=empresa_id).delete()
+            cls.objects.bulk_create(saldos, batch_size=1000)
+        return len(saldos)
+
+    def __str__(self):
+        return f"{self.fecha} - {self.cuenta_id}: {self.debe} / {self.haber}"
@@ -0,0 +1,62 @@
+from django.db import models, transaction
+from django.db.models import F, Max
+from ...empresa.models import Empresa
+
+
+class SecuenciaAsiento(models.Model):
+    """
+    Contador de números de asiento por empresa (y opcionalmente por gestión).
+
+    Reservar números es un UPDATE atómico sobre esta única fila: el costo no
+    depende de cuántos asientos tenga la empresa y los escritores concurrentes
+    solo se serializan en esta fila. `gestion` = 0 es la secuencia general,
+    que es la que usa AsientoContable (el número es único por empresa).
+    """
+    SIN_GESTION = 0
+
+    class Meta:
+        db_table = "secuencia_asiento"
+        unique_together = ('empresa', 'gestion')
+
+    empresa = models.ForeignKey(Empresa, on_delete=models.CASCADE, related_name='secuencias_asiento')
+    gestion = models.PositiveSmallIntegerField(default=SIN_GESTION)
+    ultimo = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def reservar(cls, empresa_id, cantidad=1, gestion=SIN_GESTION):
+        """
+        Reserva `cantidad` números consecutivos y devuelve el primero.
+
+        El UPDATE va primero para tomar el bloqueo de la fila (o de escritura
+        en SQLite) antes de leer el valor; si la transacción se revierte los
+        números vuelven a quedar libres.
+        """
+        if cantidad < 1:
+            raise ValueError("La cantidad a reservar debe ser al menos 1")
+
+        with transaction.atomic():
+            filtro = cls.objects.filter(empresa_id=empresa_id, gestion=gestion)
+            if not filtro.update(ultimo=F('ultimo') + cantidad):
+                # Primera reserva de la empresa: continuar desde el último número existente
+                _, creada = cls.objects.get_or_create(
+                    empresa_id=empresa_id,
+                    gestion=gestion,
+                    defaults={"ultimo": cls.ultimo_existente(empresa_id, gestion) + cantidad},
+                )
+                if not creada:
+                    filtro.update(ultimo=F('ultimo') + cantidad)
+            ultimo = filtro.values_list('ultimo', flat=True).get()
+        return ultimo - cantidad + 1
+
+    @staticmethod
+    def ultimo_existente(empresa_id, gestion=SIN_GESTION):
+        """Mayor número de asiento ya usado (para iniciar la secuencia)."""
+        from .asiento_contable import AsientoContable
+
+        asientos = AsientoContable.objects.filter(empresa_id=empresa_id)
+        if gestion != SecuenciaAsiento.SIN_GESTION:
+            asientos = asientos.filter(created_at__year=gestion)
+        return asientos.aggregate(Max('numero'))['numero__max'] or 0
+
+    def __str__(self):
+        return f"{self.empresa_id} ({self.gestion}): {self.ultimo}"
@@ -2,5 +2,8 @@ from .asiento_contable import (AsientoContableCreateSerializer,
                                AsientoContableDetailSerializer,
                                AsientoContableListSerializer)
 from .movimiento import (MovimientoCreateSerializer,
+                         MovimientoAsientoSerializer,
                          MovimientoDetailSerializer,
-                         MovimientoListSerializer)
\ No newline at end of file
+                         MovimientoListSerializer)
+from .cierre_periodo import (CierrePeriodoCreateSerializer,
+                             CierrePeriodoListSerializer)
\ No newline at end of file
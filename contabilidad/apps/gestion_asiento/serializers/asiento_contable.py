@@ -1,11 +1,11 @@
 from rest_framework import serializers
 
-from ..models import AsientoContable,Movimiento
-from ...empresa.models import Empresa
-from .movimiento import MovimientoCreateSerializer,MovimientoDetailSerializer
+from django.db import transaction
+from ..models import AsientoContable,Movimiento,SaldoDiario,CierrePeriodo
+from .movimiento import MovimientoAsientoSerializer,MovimientoDetailSerializer
 
 class AsientoContableCreateSerializer(serializers.ModelSerializer):
-    movimientos = MovimientoCreateSerializer(many=True)
+    movimientos = MovimientoAsientoSerializer(many=True)
     fecha = serializers.DateField(required=False)
 
     class Meta:
@@ -13,38 +13,94 @@ class AsientoContableCreateSerializer(serializers.ModelSerializer):
         fields = ["numero", "descripcion", "estado", "movimientos","fecha"]
         read_only_fields = ["numero"]  # numero generado automáticamente en el modelo
 
+    @transaction.atomic
     def create(self, validated_data):
-        print("llego aqui" , validated_data)
         movimientos_data = validated_data.pop('movimientos', [])
         
         # Obtener la empresa desde el request
         request = self.context.get("request")
-        empresa_id = request.auth['empresa']  # asumiendo que el token trae id de empresa
-        empresa = Empresa.objects.get(id=empresa_id)
-        validated_data["empresa"] = empresa
+        validated_data["empresa_id"] = request.auth['empresa']  # asumiendo que el token trae id de empresa
 
         # Crear el asiento; el número se generará automáticamente en el modelo
         asiento = AsientoContable.objects.create(**validated_data)
 
-        # Crear los movimientos relacionados
-        for mov_data in movimientos_data:
-            Movimiento.objects.create(asiento_contable=asiento, **mov_data)
+        # Crear los movimientos relacionados (cuentas ya resueltas al validar)
+        movimientos = self.fields['movimientos'].guardar(asiento, movimientos_data)
+        SaldoDiario.registrar(asiento, movimientos)
 
         return asiento
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        movimientos_data = validated_data.pop('movimientos', [])
+        # Los asientos de un periodo cerrado no se pueden editar (los cierres quedarían inválidos)
+        if CierrePeriodo.asiento_cerrado(instance):
+            raise serializers.ValidationError("El asiento pertenece a un periodo cerrado y no puede modificarse.")
+
+        movimientos_data = validated_data.pop('movimientos', None)
         instance.descripcion = validated_data.get('descripcion', instance.descripcion)
         instance.estado = validated_data.get('estado', instance.estado)
         instance.save()
 
-        # Reemplazar movimientos antiguos con los nuevos
-        instance.movimientos.all().delete()
-        for mov_data in movimientos_data:
-            Movimiento.objects.create(asiento_contable=instance, **mov_data)
+        # Sin "movimientos" (p. ej. un PATCH de la descripción) las líneas no cambian
+        if movimientos_data is not None:
+            self.actualizar_movimientos(instance, movimientos_data)
 
         return instance
 
+    def actualizar_movimientos(self, asiento, movimientos_data):
+        """
+        Aplica las líneas recibidas como diferencia contra las existentes: las
+        que traen `id` se actualizan (solo si cambiaron), las nuevas se crean y
+        las que no vienen se borran. Los ids de las líneas sin cambios se
+        conservan y SaldoDiario recibe solo el neto de los cambios reales.
+        """
+        existentes = {mov.id: mov for mov in asiento.movimientos.all()}
+
+        nuevos, modificados, anteriores, recibidos = [], [], [], set()
+        errores = {}
+        for indice, mov_data in enumerate(movimientos_data):
+            mov_id = mov_data.get('id')
+            valores = {
+                "cuenta_id": mov_data['cuenta'].id,
+                "debe": mov_data['debe'],
+                "haber": mov_data['haber'],
+                "referencia": mov_data.get('referencia'),
+            }
+            if mov_id is None:
+                nuevos.append(Movimiento(asiento_contable=asiento, **valores))
+                continue
+            if mov_id not in existentes or mov_id in recibidos:
+                errores[indice] = {"id": ["El movimiento no pertenece al asiento o está repetido."]}
+                continue
+            recibidos.add(mov_id)
+
+            mov = existentes[mov_id]
+            if any(getattr(mov, campo) != valor for campo, valor in valores.items()):
+                # Copia con los valores anteriores para descontarlos de los saldos
+                anteriores.append(Movimiento(cuenta_id=mov.cuenta_id, debe=mov.debe, haber=mov.haber))
+                for campo, valor in valores.items():
+                    setattr(mov, campo, valor)
+                modificados.append(mov)
+
+        if errores:
+            raise serializers.ValidationError({"movimientos": errores})
+
+        borrados = [mov for mov_id, mov in existentes.items() if mov_id not in recibidos]
+
+        if nuevos:
+            Movimiento.objects.bulk_create(nuevos)
+        if modificados:
+            Movimiento.objects.bulk_update(modificados, ["cuenta", "debe", "haber", "referencia"])
+        if borrados:
+            Movimiento.objects.filter(id__in=[mov.id for mov in borrados]).delete()
+
+        # Un solo ajuste neto de los saldos del día del asiento
+        negativos = [
+            Movimiento(cuenta_id=mov.cuenta_id, debe=-mov.debe, haber=-mov.haber)
+            for mov in anteriores + borrados
+        ]
+        SaldoDiario.registrar(asiento, negativos + modificados + nuevos)
+
 
 class AsientoContableDetailSerializer(serializers.ModelSerializer):
     movimientos = MovimientoDetailSerializer(many=True, read_only=True)
@@ -0,0 +1,37 @@
+import calendar
+from datetime import date
+from django.utils import timezone
+from rest_framework import serializers
+from ..models import CierrePeriodo
+
+
+class CierrePeriodoCreateSerializer(serializers.Serializer):
+    anio = serializers.IntegerField(min_value=2000)
+    mes = serializers.IntegerField(min_value=1, max_value=12)
+
+    def validate(self, data):
+        empresa_id = self.context["request"].auth["empresa"]
+        fecha_fin = date(data["anio"], data["mes"], calendar.monthrange(data["anio"], data["mes"])[1])
+
+        # Solo se pueden cerrar meses terminados y posteriores al último cierre
+        if fecha_fin >= timezone.localdate():
+            raise serializers.ValidationError("Solo se pueden cerrar meses que ya terminaron.")
+        ultimo = CierrePeriodo.ultimo(empresa_id)
+        if ultimo and fecha_fin <= ultimo.fecha_fin:
+            raise serializers.ValidationError(
+                f"El periodo ya está cerrado (último cierre: {ultimo.mes:02d}/{ultimo.anio})."
+            )
+        return data
+
+    def create(self, validated_data):
+        empresa_id = self.context["request"].auth["empresa"]
+        return CierrePeriodo.cerrar(empresa_id, validated_data["anio"], validated_data["mes"])
+
+    def to_representation(self, instance):
+        return CierrePeriodoListSerializer(instance).data
+
+
+class CierrePeriodoListSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CierrePeriodo
+        fields = ["id", "anio", "mes", "fecha_fin", "created_at"]
@@ -4,15 +4,112 @@ from ...gestion_cuenta.serializers import CuentaListSerializer
 from ...gestion_cuenta.models.cuenta import Cuenta
 from ...gestion_asiento.models.asiento_contable import AsientoContable
 
+# Mismo formato que los DecimalField de debe/haber del modelo
+MONTO = serializers.DecimalField(max_digits=10, decimal_places=3)
+
+class DeEmpresaRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField limitado a las filas de la empresa del token."""
+
+    def get_queryset(self):
+        request = self.context.get("request")
+        empresa_id = request.auth.get('empresa') if request is not None and request.auth else None
+        return super().get_queryset().filter(empresa_id=empresa_id)
+
+
 class MovimientoCreateSerializer(serializers.ModelSerializer):
-    cuenta = serializers.PrimaryKeyRelatedField(queryset=Cuenta.objects.all(), write_only=True)
-    asiento_contable = serializers.PrimaryKeyRelatedField(queryset=AsientoContable.objects.all(), write_only=True ,required=False)  
+    cuenta = DeEmpresaRelatedField(
+        queryset=Cuenta.objects.all(), write_only=True,
+        error_messages={'does_not_exist': "La cuenta no existe en la empresa."},
+    )
+    asiento_contable = DeEmpresaRelatedField(
+        queryset=AsientoContable.objects.all(), write_only=True, required=False,
+        error_messages={'does_not_exist': "El asiento no existe en la empresa."},
+    )
     class Meta:
         model = Movimiento
         fields = ["referencia", "cuenta", "debe","haber", "asiento_contable"]
-        
-    
-        
+
+    def validate_cuenta(self, cuenta):
+        # Igual que en las líneas de un asiento: al editar se puede conservar una cuenta ya desactivada
+        if cuenta.estado != 'ACTIVO' and getattr(self.instance, 'cuenta_id', None) != cuenta.id:
+            raise serializers.ValidationError(f"La cuenta {cuenta.codigo} no está activa.")
+        return cuenta
+
+
+
+class MovimientoAsientoListSerializer(serializers.ListSerializer):
+    """
+    Líneas de un asiento validadas en conjunto: todas las cuentas se
+    resuelven con una sola consulta (id__in) limitada a la empresa del
+    usuario, se rechazan las cuentas ajenas o no activas y se exige que el
+    asiento cuadre (total debe = total haber).
+    """
+
+    def validate(self, lineas):
+        request = self.context.get("request")
+        empresa_id = request.auth['empresa']
+
+        ids = {linea['cuenta'] for linea in lineas}
+        cuentas = {
+            cuenta.id: cuenta
+            for cuenta in Cuenta.objects.filter(empresa_id=empresa_id, id__in=ids)
+        }
+
+        # Al editar, una línea puede seguir en una cuenta que luego se desactivó
+        asiento = getattr(self.parent, 'instance', None)
+        usadas = set()
+        if asiento is not None and any(c.estado != 'ACTIVO' for c in cuentas.values()):
+            usadas = set(asiento.movimientos.values_list('cuenta_id', flat=True))
+
+        errores = {}
+        total_debe = total_haber = 0
+        for indice, linea in enumerate(lineas):
+            cuenta = cuentas.get(linea['cuenta'])
+            if cuenta is None:
+                errores[indice] = {"cuenta": ["La cuenta no existe en la empresa."]}
+                continue
+            if cuenta.estado != 'ACTIVO' and cuenta.id not in usadas:
+                errores[indice] = {"cuenta": [f"La cuenta {cuenta.codigo} no está activa."]}
+                continue
+            linea['cuenta'] = cuenta
+            total_debe += linea['debe']
+            total_haber += linea['haber']
+
+        if errores:
+            raise serializers.ValidationError(errores)
+        if total_debe != total_haber:
+            raise serializers.ValidationError(
+                f"El asiento no cuadra: debe {total_debe} y haber {total_haber}."
+            )
+        return lineas
+
+    def guardar(self, asiento, lineas):
+        """Inserta las líneas de un asiento nuevo con un solo bulk_create."""
+        movimientos = [
+            Movimiento(
+                asiento_contable=asiento,
+                cuenta=linea['cuenta'],
+                debe=linea['debe'],
+                haber=linea['haber'],
+                referencia=linea.get('referencia'),
+            )
+            for linea in lineas
+        ]
+        return Movimiento.objects.bulk_create(movimientos)
+
+
+class MovimientoAsientoSerializer(serializers.ModelSerializer):
+    """Línea de un asiento: `id` identifica una línea existente al editar el asiento."""
+    id = serializers.UUIDField(required=False)
+    # La cuenta se resuelve para todas las líneas juntas en MovimientoAsientoListSerializer
+    cuenta = serializers.UUIDField(write_only=True)
+
+    class Meta:
+        model = Movimiento
+        fields = ["id", "referencia", "cuenta", "debe", "haber"]
+        list_serializer_class = MovimientoAsientoListSerializer
+
+
 class MovimientoDetailSerializer(serializers.ModelSerializer):
     cuenta = CuentaListSerializer()
     class Meta:
@@ -25,6 +122,36 @@ class MovimientoListSerializer(serializers.ModelSerializer):
     cuenta = CuentaListSerializer()
     asiento = serializers.SerializerMethodField()  # <-- solo para lista
 
+    # Columnas de .values() con las que el listado arma la misma salida sin instancias
+    CAMPOS_FILA = (
+        "id", "referencia", "debe", "haber",
+        "cuenta_id", "cuenta__codigo", "cuenta__nombre", "cuenta__estado",
+        "asiento_contable_id", "asiento_contable__numero",
+        "asiento_contable__created_at", "asiento_contable__estado",
+    )
+
+    @classmethod
+    def desde_fila(cls, fila):
+        """Representación de una fila de .values(CAMPOS_FILA), igual a la del serializer."""
+        return {
+            "id": str(fila["id"]),
+            "referencia": fila["referencia"],
+            "cuenta": {
+                "id": str(fila["cuenta_id"]),
+                "codigo": fila["cuenta__codigo"],
+                "nombre": fila["cuenta__nombre"],
+                "estado": fila["cuenta__estado"],
+            },
+            "debe": MONTO.to_representation(fila["debe"]),
+            "haber": MONTO.to_representation(fila["haber"]),
+            "asiento": {
+                "id": fila["asiento_contable_id"],
+                "numero": fila["asiento_contable__numero"],
+                "fecha": fila["asiento_contable__created_at"].isoformat(),
+                "estado": fila["asiento_contable__estado"],
+            },
+        }
+
     class Meta:
         model = Movimiento
         fields = ["id", "referencia", "cuenta", "debe", "haber", "asiento"]
@@ -0,0 +1,204 @@
+"""
+Alta de asientos en lote (migración de historial, planillas mensuales).
+
+Todo el lote se valida en una pasada (las cuentas de la empresa se leen con
+una sola consulta) y, si no hay errores, se guarda en una transacción: un
+bloque contiguo de números, bulk_create de asientos y movimientos y una
+actualización de SaldoDiario por cuenta y día.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.utils import timezone
+from ..models import AsientoContable, CierrePeriodo, Movimiento, SaldoDiario
+from ...gestion_cuenta.models import Cuenta
+
+MAX_ASIENTOS = 20_000
+ESTADOS = {estado for estado, _ in AsientoContable.ESTADO_CHOICES}
+MAX_DESCRIPCION = 100
+MAX_REFERENCIA = 100
+# Movimiento.debe/haber: DecimalField(max_digits=10, decimal_places=3)
+MAX_MONTO = Decimal("10") ** 7
+MILESIMAS = Decimal("0.001")
+
+
+class LoteInvalido(Exception):
+    """El lote no tiene la forma esperada (no es un error de una fila)."""
+
+
+def leer_monto(valor):
+    """Decimal >= 0 con hasta 3 decimales, o None si no es válido."""
+    try:
+        monto = Decimal(str(valor if valor not in (None, "") else 0))
+    except (InvalidOperation, ValueError):
+        return None
+    if not monto.is_finite() or monto < 0 or monto >= MAX_MONTO or monto != monto.quantize(MILESIMAS):
+        return None
+    return monto
+
+
+def validar_lote(empresa_id, asientos):
+    """
+    Valida los asientos y sus movimientos. Devuelve (pendientes, errores):
+    pendientes es una lista de (AsientoContable, [Movimiento]) sin guardar y
+    errores una entrada {"asiento", "errores"} por asiento inválido.
+    """
+    if not isinstance(asientos, list):
+        raise LoteInvalido('Se espera una lista de asientos o un objeto con "asientos"')
+    if len(asientos) > MAX_ASIENTOS:
+        raise LoteInvalido(f"El lote supera el máximo de {MAX_ASIENTOS} asientos")
+
+    # Cuentas de la empresa por id y por código (una consulta)
+    por_id = {}
+    por_codigo = {}
+    for cuenta_id, codigo in Cuenta.objects.filter(empresa_id=empresa_id).values_list("id", "codigo"):
+        por_id[str(cuenta_id)] = cuenta_id
+        por_codigo[str(codigo)] = cuenta_id
+
+    pendientes, errores = [], []
+    for numero, datos in enumerate(asientos, start=1):
+        if not isinstance(datos, dict):
+            errores.append({"asiento": numero, "errores": {"asiento": ["Se espera un objeto."]}})
+            continue
+
+        problemas = {}
+        descripcion = str(datos.get("descripcion") or "").strip()
+        estado = str(datos.get("estado") or "BORRADOR").strip().upper()
+
+        if not descripcion:
+            problemas["descripcion"] = ["Este campo es requerido."]
+        elif len(descripcion) > MAX_DESCRIPCION:
+            problemas["descripcion"] = [f"No puede tener más de {MAX_DESCRIPCION} caracteres."]
+        if estado not in ESTADOS:
+            problemas["estado"] = [f"Debe ser uno de: {', '.join(sorted(ESTADOS))}."]
+
+        fecha = datos.get("fecha")
+        if fecha:
+            try:
+                fecha = date.fromisoformat(str(fecha))
+            except ValueError:
+                problemas["fecha"] = ["Formato de fecha inválido, use AAAA-MM-DD."]
+
+        movimientos_datos = datos.get("movimientos")
+        if not isinstance(movimientos_datos, list) or not movimientos_datos:
+            problemas["movimientos"] = ["Debe tener al menos un movimiento."]
+            movimientos_datos = []
+
+        movimientos = []
+        errores_mov = []
+        total_debe = total_haber = Decimal("0")
+        for fila, mov in enumerate(movimientos_datos, start=1):
+            if not isinstance(mov, dict):
+                errores_mov.append({"movimiento": fila, "errores": {"movimiento": ["Se espera un objeto."]}})
+                continue
+            problemas_mov = {}
+
+            cuenta_id = None
+            if mov.get("cuenta"):
+                cuenta_id = por_id.get(str(mov["cuenta"]))
+            elif mov.get("cuenta_codigo") is not None:
+                cuenta_id = por_codigo.get(str(mov["cuenta_codigo"]).strip())
+            if cuenta_id is None:
+                problemas_mov["cuenta"] = ["La cuenta no existe en la empresa."]
+
+            debe = leer_monto(mov.get("debe"))
+            haber = leer_monto(mov.get("haber"))
+            if debe is None:
+                problemas_mov["debe"] = ["Monto inválido (>= 0, hasta 3 decimales)."]
+            if haber is None:
+                problemas_mov["haber"] = ["Monto inválido (>= 0, hasta 3 decimales)."]
+
+            referencia = mov.get("referencia")
+            if referencia is not None and len(str(referencia)) > MAX_REFERENCIA:
+                problemas_mov["referencia"] = [f"No puede tener más de {MAX_REFERENCIA} caracteres."]
+
+            if problemas_mov:
+                errores_mov.append({"movimiento": fila, "errores": problemas_mov})
+                continue
+            total_debe += debe
+            total_haber += haber
+            movimientos.append(Movimiento(
+                cuenta_id=cuenta_id,
+                debe=debe,
+                haber=haber,
+                referencia=str(referencia) if referencia is not None else None,
+            ))
+
+        if errores_mov:
+            problemas["movimientos"] = errores_mov
+        elif movimientos and total_debe != total_haber:
+            problemas["movimientos"] = [f"El asiento no cuadra: debe {total_debe} y haber {total_haber}."]
+
+        if problemas:
+            errores.append({"asiento": numero, "errores": problemas})
+            continue
+
+        asiento = AsientoContable(
+            empresa_id=empresa_id,
+            descripcion=descripcion,
+            estado=estado,
+            fecha=fecha or None,
+        )
+        pendientes.append((asiento, movimientos))
+
+    return pendientes, errores
+
+
+@transaction.atomic
+def guardar_lote(empresa_id, pendientes, batch_size=1000):
+    """Guarda asientos ya validados; devuelve el rango de números asignado."""
+    from ...reporte.models import VersionLibro
+
+    if not pendientes:
+        return None, None
+
+    # Un solo paso para reservar el bloque de números
+    primero = AsientoContable.reservar_numeros(empresa_id, len(pendientes))
+
+    asientos, movimientos = [], []
+    for desplazamiento, (asiento, movs) in enumerate(pendientes):
+        asiento.numero = primero + desplazamiento
+        asientos.append(asiento)
+        for mov in movs:
+            mov.asiento_contable = asiento
+            movimientos.append(mov)
+
+    # bulk_create asigna created_at (auto_now_add) a cada asiento
+    AsientoContable.objects.bulk_create(asientos, batch_size=batch_size)
+    Movimiento.objects.bulk_create(movimientos, batch_size=batch_size)
+
+    por_dia = defaultdict(list)
+    for mov in movimientos:
+        por_dia[timezone.localtime(mov.asiento_contable.created_at).date()].append(mov)
+    for fecha, movs in por_dia.items():
+        SaldoDiario.aplicar(empresa_id, fecha, movs)
+
+    # bulk_create no dispara las señales que invalidan los reportes cacheados
+    VersionLibro.incrementar(empresa_id)
+    return primero, primero + len(asientos) - 1
+
+
+def importar_lote(empresa_id, datos):
+    """
+    Valida y guarda un lote completo. Si algún asiento tiene errores no se
+    guarda ninguno. Devuelve el resumen (con los errores si los hay).
+    """
+    asientos = datos.get("asientos") if isinstance(datos, dict) else datos
+    pendientes, errores = validar_lote(empresa_id, asientos)
+
+    if not errores and pendientes and CierrePeriodo.periodo_cerrado(empresa_id, timezone.localdate()):
+        raise LoteInvalido("El periodo actual está cerrado: no se pueden registrar asientos.")
+
+    desde = hasta = None
+    if not errores:
+        desde, hasta = guardar_lote(empresa_id, pendientes)
+
+    return {
+        "importado": not errores,
+        "asientos": len(pendientes) if not errores else 0,
+        "movimientos": sum(len(movs) for _, movs in pendientes) if not errores else 0,
+        "numero_desde": desde,
+        "numero_hasta": hasta,
+        "errores": errores,
+    }
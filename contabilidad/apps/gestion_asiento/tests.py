@@ -1,3 +1,257 @@
-from django.test import TestCase
+import threading
+import time
+from decimal import Decimal
 
-# Create your tests here.
+from django.db import OperationalError, close_old_connections, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from ..empresa.models import Empresa
+from ..gestion_cuenta.models import ClaseCuenta, Cuenta
+from ..usuario.models import Persona, User
+from .models import AsientoContable, Movimiento, SaldoDiario, SecuenciaAsiento
+
+
+class SecuenciaAsientoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.empresa = Empresa.objects.create(nombre="Empresa Secuencia", nit=1)
+
+    def test_reservas_consecutivas(self):
+        primero = SecuenciaAsiento.reservar(self.empresa.id, 5)
+        self.assertEqual(SecuenciaAsiento.reservar(self.empresa.id), primero + 5)
+        self.assertEqual(SecuenciaAsiento.reservar(self.empresa.id, 3), primero + 6)
+
+    def test_continua_desde_el_ultimo_numero_existente(self):
+        AsientoContable.objects.create(empresa=self.empresa, descripcion="Manual", numero=41)
+        SecuenciaAsiento.objects.filter(empresa=self.empresa).delete()
+
+        asiento = AsientoContable.objects.create(empresa=self.empresa, descripcion="Siguiente")
+        self.assertEqual(asiento.numero, 42)
+
+    def test_reserva_revertida_libera_los_numeros(self):
+        primero = SecuenciaAsiento.reservar(self.empresa.id)
+        try:
+            with transaction.atomic():
+                SecuenciaAsiento.reservar(self.empresa.id, 10)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(SecuenciaAsiento.reservar(self.empresa.id), primero + 1)
+
+    def test_cantidad_invalida(self):
+        with self.assertRaises(ValueError):
+            SecuenciaAsiento.reservar(self.empresa.id, 0)
+
+
+class SecuenciaAsientoConcurrenciaTests(TransactionTestCase):
+    """Varios hilos (cada uno con su conexión) reservan números a la vez."""
+
+    HILOS = 8
+    RESERVAS_POR_HILO = 25
+
+    def reservar_con_reintento(self, empresa_id, cantidad):
+        # SQLite no espera el bloqueo de escritura de otra conexión: se reintenta
+        for _ in range(200):
+            try:
+                with transaction.atomic():
+                    return SecuenciaAsiento.reservar(empresa_id, cantidad)
+            except OperationalError:
+                time.sleep(0.005)
+        raise AssertionError("No se pudo reservar después de varios intentos")
+
+    def test_hilos_concurrentes_no_repiten_numeros(self):
+        empresa = Empresa.objects.create(nombre="Empresa Concurrente", nit=2)
+        inicial = SecuenciaAsiento.reservar(empresa.id)
+        rangos = []
+        errores = []
+        barrera = threading.Barrier(self.HILOS)
+
+        def trabajar(indice):
+            try:
+                barrera.wait()
+                for vuelta in range(self.RESERVAS_POR_HILO):
+                    cantidad = 1 + (indice + vuelta) % 3
+                    primero = self.reservar_con_reintento(empresa.id, cantidad)
+                    rangos.append(range(primero, primero + cantidad))
+            except Exception as e:  # pragma: no cover - se reporta en el assert
+                errores.append(e)
+            finally:
+                close_old_connections()
+                connection.close()
+
+        hilos = [threading.Thread(target=trabajar, args=(i,)) for i in range(self.HILOS)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(errores, [])
+        numeros = [numero for rango in rangos for numero in rango]
+        self.assertEqual(len(numeros), len(set(numeros)))
+        # Sin huecos: los bloques cubren exactamente los números siguientes al inicial
+        self.assertEqual(sorted(numeros), list(range(inicial + 1, inicial + 1 + len(numeros))))
+        self.assertEqual(
+            SecuenciaAsiento.objects.get(empresa=empresa, gestion=SecuenciaAsiento.SIN_GESTION).ultimo,
+            inicial + len(numeros),
+        )
+
+
+class EmpresaApiMixin:
+    """Empresa con cuentas propias, otra empresa ajena y un cliente con su token."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.empresa = Empresa.objects.create(nombre="Empresa Api", nit=11)
+        cls.otra = Empresa.objects.create(nombre="Empresa Ajena", nit=12)
+        persona = Persona.objects.create(nombre="Ana", apellido="Prueba")
+        cls.usuario = User.objects.create_user("api_asientos", "clave", persona=persona)
+
+        clase = ClaseCuenta.objects.create(empresa=cls.empresa, codigo=9, nombre="PRUEBAS")
+        cls.caja = Cuenta.objects.create(empresa=cls.empresa, codigo=9101, nombre="Caja", clase_cuenta=clase)
+        cls.banco = Cuenta.objects.create(empresa=cls.empresa, codigo=9102, nombre="Banco", clase_cuenta=clase)
+        cls.ventas = Cuenta.objects.create(empresa=cls.empresa, codigo=9103, nombre="Ventas", clase_cuenta=clase)
+        cls.inactiva = Cuenta.objects.create(
+            empresa=cls.empresa, codigo=9104, nombre="Vieja", clase_cuenta=clase, estado='INACTIVO',
+        )
+        clase_ajena = ClaseCuenta.objects.create(empresa=cls.otra, codigo=9, nombre="AJENAS")
+        cls.ajena = Cuenta.objects.create(empresa=cls.otra, codigo=9101, nombre="Ajena", clase_cuenta=clase_ajena)
+        cls.asiento_ajeno = AsientoContable.objects.create(empresa=cls.otra, descripcion="Ajeno")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario, token={'empresa': str(self.empresa.id)})
+
+    def crear_asiento(self, lineas):
+        """Asiento con [(cuenta, debe, haber)] y sus saldos, sin pasar por la API."""
+        asiento = AsientoContable.objects.create(empresa=self.empresa, descripcion="Prueba")
+        movimientos = Movimiento.objects.bulk_create([
+            Movimiento(asiento_contable=asiento, cuenta=cuenta, debe=Decimal(debe), haber=Decimal(haber))
+            for cuenta, debe, haber in lineas
+        ])
+        SaldoDiario.registrar(asiento, movimientos)
+        return asiento
+
+
+class MovimientoEmpresaTests(EmpresaApiMixin, TestCase):
+    """/movimiento/ solo acepta cuentas y asientos de la empresa del token."""
+
+    def setUp(self):
+        super().setUp()
+        self.asiento = self.crear_asiento([(self.caja, "10", "0"), (self.ventas, "0", "10")])
+
+    def crear(self, **cambios):
+        datos = {"cuenta": str(self.caja.id), "debe": "5", "haber": "0", "asiento_contable": str(self.asiento.id)}
+        datos.update(cambios)
+        return self.client.post('/movimiento/', datos, format='json')
+
+    def test_cuenta_de_otra_empresa(self):
+        respuesta = self.crear(cuenta=str(self.ajena.id))
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn("cuenta", respuesta.data)
+        self.assertFalse(SaldoDiario.objects.filter(cuenta=self.ajena).exists())
+
+    def test_asiento_de_otra_empresa(self):
+        respuesta = self.crear(asiento_contable=str(self.asiento_ajeno.id))
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn("asiento_contable", respuesta.data)
+        self.assertFalse(SaldoDiario.objects.filter(empresa=self.otra).exists())
+
+    def test_cuenta_inactiva(self):
+        respuesta = self.crear(cuenta=str(self.inactiva.id))
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn("cuenta", respuesta.data)
+
+    def test_cuenta_inactiva_ya_usada_se_conserva_al_editar(self):
+        movimiento = Movimiento.objects.create(
+            asiento_contable=self.asiento, cuenta=self.inactiva, debe=Decimal("1"), haber=Decimal("0"),
+        )
+        respuesta = self.client.patch(
+            f'/movimiento/{movimiento.id}/', {"cuenta": str(self.inactiva.id), "debe": "2"}, format='json',
+        )
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_movimiento_de_la_empresa(self):
+        respuesta = self.crear()
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(self.asiento.movimientos.count(), 3)
+
+
+class AsientoActualizacionTests(EmpresaApiMixin, TestCase):
+    """Editar un asiento aplica las líneas como diferencia y ajusta SaldoDiario por el neto."""
+
+    def setUp(self):
+        super().setUp()
+        self.asiento = self.crear_asiento([
+            (self.caja, "10", "0"), (self.banco, "5", "0"), (self.ventas, "0", "15"),
+        ])
+        self.lineas = {mov.cuenta_id: mov for mov in self.asiento.movimientos.all()}
+
+    def linea(self, cuenta, debe, haber, con_id=True):
+        datos = {"cuenta": str(cuenta.id), "debe": debe, "haber": haber}
+        if con_id:
+            datos["id"] = str(self.lineas[cuenta.id].id)
+        return datos
+
+    def editar(self, datos):
+        return self.client.patch(f'/asiento_contable/{self.asiento.id}/', datos, format='json')
+
+    def saldos(self):
+        return set(
+            SaldoDiario.objects.filter(empresa=self.empresa)
+            .values_list('cuenta_id', 'fecha', 'debe', 'haber')
+        )
+
+    def test_lineas_sin_cambios_conservan_su_id(self):
+        respuesta = self.editar({"movimientos": [
+            self.linea(self.caja, "10", "0"),
+            self.linea(self.banco, "7", "0"),
+            self.linea(self.ventas, "0", "17"),
+        ]})
+        self.assertEqual(respuesta.status_code, 200)
+        actuales = {mov.cuenta_id: mov for mov in self.asiento.movimientos.all()}
+        self.assertEqual({c: m.id for c, m in actuales.items()}, {c: m.id for c, m in self.lineas.items()})
+        self.assertEqual(actuales[self.banco.id].debe, Decimal("7"))
+
+    def test_saldos_iguales_a_reconstruir(self):
+        # Una línea sin cambios, una modificada, una borrada (banco) y una nueva
+        respuesta = self.editar({"movimientos": [
+            self.linea(self.caja, "10", "0"),
+            self.linea(self.ventas, "0", "12"),
+            self.linea(self.banco, "2", "0", con_id=False),
+        ]})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self.asiento.movimientos.count(), 3)
+        self.assertNotIn(self.lineas[self.banco.id].id, self.asiento.movimientos.values_list('id', flat=True))
+
+        incremental = self.saldos()
+        SaldoDiario.reconstruir(self.empresa.id)
+        self.assertEqual(incremental, self.saldos())
+
+    def test_id_ajeno_o_repetido(self):
+        otro = self.crear_asiento([(self.caja, "1", "0"), (self.ventas, "0", "1")])
+        ajeno = {"id": str(otro.movimientos.first().id), "cuenta": str(self.banco.id), "debe": "5", "haber": "0"}
+        repetida = self.linea(self.caja, "10", "0")
+        antes = set(self.asiento.movimientos.values_list('id', 'cuenta_id', 'debe', 'haber'))
+        saldos = self.saldos()
+
+        for lineas in (
+            [repetida, ajeno, self.linea(self.ventas, "0", "15")],
+            [repetida, repetida, self.linea(self.banco, "5", "0"), self.linea(self.ventas, "0", "25")],
+        ):
+            respuesta = self.editar({"movimientos": lineas})
+            self.assertEqual(respuesta.status_code, 400)
+            self.assertIn("movimientos", respuesta.data)
+        self.assertEqual(set(self.asiento.movimientos.values_list('id', 'cuenta_id', 'debe', 'haber')), antes)
+        self.assertEqual(self.saldos(), saldos)
+
+    def test_patch_sin_movimientos_no_toca_las_lineas(self):
+        antes = set(self.asiento.movimientos.values_list('id', 'cuenta_id', 'debe', 'haber'))
+        saldos = self.saldos()
+        respuesta = self.editar({"descripcion": "Solo la descripción"})
+        self.assertEqual(respuesta.status_code, 200)
+        self.asiento.refresh_from_db()
+        self.assertEqual(self.asiento.descripcion, "Solo la descripción")
+        self.assertEqual(set(self.asiento.movimientos.values_list('id', 'cuenta_id', 'debe', 'haber')), antes)
+        self.assertEqual(self.saldos(), saldos)
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AsientoContableViewSet,MovimientoViewSet
+from .views import AsientoContableViewSet,MovimientoViewSet,CierrePeriodoViewSet
 
 router = DefaultRouter()
 router.register(r'asiento_contable', AsientoContableViewSet, basename='asiento_contable')
 router.register(r'movimiento',MovimientoViewSet, basename='movimiento')
+router.register(r'cierre_periodo',CierrePeriodoViewSet, basename='cierre_periodo')
 
 urlpatterns = [
     path('', include(router.urls)),   # incluye todas las rutas del ViewSet
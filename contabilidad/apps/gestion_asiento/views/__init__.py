@@ -1,3 +1,3 @@
 from .asiento_contable import AsientoContableViewSet
 from .movimiento import MovimientoViewSet
-
+from .cierre_periodo import CierrePeriodoViewSet
@@ -1,10 +1,18 @@
-from rest_framework import viewsets
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from django.db import transaction
 from ..models.asiento_contable import AsientoContable
+from ..models.saldo_diario import SaldoDiario
+from ...utils.paginacion import KeysetPagination
+from ..models.cierre_periodo import CierrePeriodo
 from ...empresa.models import UserEmpresa
 from ..serializers import (AsientoContableCreateSerializer,
                            AsientoContableListSerializer,
                            AsientoContableDetailSerializer)
+from ..services.lote import LoteInvalido, importar_lote
 from ...utils.log import registrar_evento
 
 
@@ -12,6 +20,9 @@ class AsientoContableViewSet(viewsets.ModelViewSet):
     queryset = AsientoContable.objects.all()
     serializer_class = AsientoContableListSerializer
     permission_classes = [IsAuthenticated]
+    # ?cursor= activa la paginación keyset sobre (numero, id)
+    pagination_class = KeysetPagination
+    cursor_field = 'numero'
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -68,9 +79,52 @@ class AsientoContableViewSet(viewsets.ModelViewSet):
         )
 
         return response
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        if CierrePeriodo.asiento_cerrado(instance):
+            raise ValidationError({"detail": "El asiento pertenece a un periodo cerrado y no puede eliminarse."})
+        # Descontar los movimientos del asiento de los saldos diarios antes del borrado en cascada
+        SaldoDiario.registrar(instance, instance.movimientos.all(), signo=-1)
+        instance.delete()
     
     def get_queryset(self):
         request = self.request
         empresa = request.auth.get('empresa')  # o request.user.empresa.id según tu login
         return AsientoContable.objects.filter(empresa_id=empresa)
 
+    @action(detail=False, methods=['post'], url_path='lote')
+    def lote(self, request):
+        """
+        POST /asiento_contable/lote/
+        Registra varios asientos con sus movimientos en una sola operación:
+        {"asientos": [{"descripcion", "estado", "fecha", "movimientos": [...]}]}.
+        Cada movimiento indica `cuenta` (id) o `cuenta_codigo`. Si algún asiento
+        tiene errores (p. ej. debe != haber) no se guarda ninguno.
+        """
+        empresa_id = request.auth['empresa']
+        try:
+            resumen = importar_lote(empresa_id, request.data)
+        except LoteInvalido as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not resumen["importado"]:
+            return Response(resumen, status=status.HTTP_400_BAD_REQUEST)
+
+        session_token = request.COOKIES.get("sessionToken") or request.headers.get('Authorization', '').split(' ')[-1]
+        usuario_id = request.user.id
+        # Un solo evento para todo el lote
+        registrar_evento(
+            id_sesion=session_token,
+            empresa_id=empresa_id,
+            usuario_id=usuario_id,
+            datos_usuario=None,
+            nivel="INFO",
+            accion="Creación de asientos contables en lote",
+            detalle=(
+                f"El usuario {usuario_id} creó {resumen['asientos']} asientos contables "
+                f"(números {resumen['numero_desde']} a {resumen['numero_hasta']})."
+            )
+        )
+
+        return Response(resumen, status=status.HTTP_201_CREATED)
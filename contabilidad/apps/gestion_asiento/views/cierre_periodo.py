@@ -0,0 +1,33 @@
+from rest_framework import viewsets, mixins
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from ..models import CierrePeriodo
+from ..serializers import CierrePeriodoCreateSerializer, CierrePeriodoListSerializer
+
+
+class CierrePeriodoViewSet(mixins.CreateModelMixin,
+                           mixins.ListModelMixin,
+                           mixins.RetrieveModelMixin,
+                           mixins.DestroyModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    Cierres mensuales de la empresa.
+    POST cierra un mes; DELETE reabre el último cierre (solo el último).
+    """
+    serializer_class = CierrePeriodoListSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_serializer_class(self):
+        if self.action == 'create':
+            return CierrePeriodoCreateSerializer
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        empresa = self.request.auth.get('empresa')
+        return CierrePeriodo.objects.filter(empresa_id=empresa).order_by('-fecha_fin')
+
+    def perform_destroy(self, instance):
+        ultimo = CierrePeriodo.ultimo(instance.empresa_id)
+        if ultimo and ultimo.pk != instance.pk:
+            raise ValidationError({"detail": "Solo se puede reabrir el último periodo cerrado."})
+        instance.delete()
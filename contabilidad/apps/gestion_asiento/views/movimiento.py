@@ -1,8 +1,20 @@
+import uuid
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from ..models.asiento_contable import AsientoContable
 from ..models.movimiento import Movimiento
+from ..models.saldo_diario import SaldoDiario
+from ...utils.paginacion import KeysetPagination
+from ..models.cierre_periodo import CierrePeriodo
 from rest_framework import filters
-from ...gestion_cuenta.models.cuenta import Cuenta
 from ..serializers import (MovimientoCreateSerializer,
                            MovimientoDetailSerializer,
                            MovimientoListSerializer)
@@ -12,6 +24,9 @@ class MovimientoViewSet(viewsets.ModelViewSet):
     queryset = Movimiento.objects.all()
     serializer_class = MovimientoListSerializer
     permission_classes = [IsAuthenticated]
+    # ?cursor= activa la paginación keyset sobre (asiento_contable.numero, id)
+    pagination_class = KeysetPagination
+    cursor_field = 'asiento_contable__numero'
     
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['asiento_contable__numero', 'asiento_contable__created_at']
@@ -28,8 +43,108 @@ class MovimientoViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         empresa = self.request.auth.get('empresa')  # o request.user.empresa.id según tu login
-        if empresa:
-            empresa_cuentas = Cuenta.objects.filter(empresa=empresa)
-                # Filtra los movimientos cuya cuenta pertenece a la empresa
-            return Movimiento.objects.filter(cuenta__in=empresa_cuentas)
-        return Movimiento.objects.none()
+        if not empresa:
+            return Movimiento.objects.none()
+        # Filtra por la empresa del asiento con un JOIN (sin subconsulta de cuentas)
+        qs = Movimiento.objects.filter(asiento_contable__empresa_id=empresa)
+        qs = qs.select_related('cuenta', 'asiento_contable')
+        if self.action == 'list':
+            qs = self.filtrar(qs)
+        return qs
+
+    def filtrar(self, qs):
+        """
+        Filtros del listado (query params), todos opcionales:
+        ?cuenta=<id>&fecha_inicio=AAAA-MM-DD&fecha_fin=AAAA-MM-DD&estado=APROBADO
+        &monto_min=100&monto_max=500 (el monto es el debe o el haber de la línea).
+        """
+        params = self.request.query_params
+        errores = {}
+
+        cuenta = params.get('cuenta')
+        if cuenta:
+            try:
+                qs = qs.filter(cuenta_id=uuid.UUID(cuenta))
+            except ValueError:
+                errores['cuenta'] = ["Id de cuenta inválido."]
+
+        # Rango sobre created_at (no created_at__date) para que use el índice
+        for nombre, lookup, desplazamiento in (('fecha_inicio', 'gte', 0), ('fecha_fin', 'lt', 1)):
+            valor = params.get(nombre)
+            if not valor:
+                continue
+            try:
+                fecha = parse_date(valor)
+            except ValueError:
+                fecha = None
+            if fecha is None:
+                errores[nombre] = ["Formato de fecha inválido, use AAAA-MM-DD."]
+                continue
+            limite = timezone.make_aware(datetime.combine(fecha + timedelta(days=desplazamiento), time.min))
+            qs = qs.filter(**{f'asiento_contable__created_at__{lookup}': limite})
+
+        estado = params.get('estado')
+        if estado:
+            estados = {valor for valor, _ in AsientoContable.ESTADO_CHOICES}
+            if estado.upper() not in estados:
+                errores['estado'] = [f"Debe ser uno de: {', '.join(sorted(estados))}."]
+            else:
+                qs = qs.filter(asiento_contable__estado=estado.upper())
+
+        montos = {}
+        for nombre, lookup in (('monto_min', 'gte'), ('monto_max', 'lte')):
+            valor = params.get(nombre)
+            if not valor:
+                continue
+            try:
+                monto = Decimal(valor)
+                if not monto.is_finite():
+                    raise InvalidOperation
+                montos[lookup] = monto
+            except InvalidOperation:
+                errores[nombre] = ["Monto inválido."]
+        if montos:
+            qs = qs.filter(
+                Q(**{f'debe__{lookup}': monto for lookup, monto in montos.items()}) |
+                Q(**{f'haber__{lookup}': monto for lookup, monto in montos.items()})
+            )
+
+        if errores:
+            raise ValidationError(errores)
+        return qs
+
+    def list(self, request, *args, **kwargs):
+        # Filas de .values() en lugar de instancias: una consulta por página
+        # (más el COUNT), sin importar cuántos movimientos traiga
+        filas = self.filter_queryset(self.get_queryset()).values(*MovimientoListSerializer.CAMPOS_FILA)
+        pagina = self.paginate_queryset(filas)
+        datos = [MovimientoListSerializer.desde_fila(fila) for fila in (filas if pagina is None else pagina)]
+        if pagina is not None:
+            return self.get_paginated_response(datos)
+        return Response(datos)
+
+    def validar_periodo_abierto(self, asiento):
+        if asiento and CierrePeriodo.asiento_cerrado(asiento):
+            raise ValidationError({"detail": "El asiento pertenece a un periodo cerrado y no puede modificarse."})
+
+    # Mantener SaldoDiario al día con cada alta, edición o baja
+    @transaction.atomic
+    def perform_create(self, serializer):
+        self.validar_periodo_abierto(serializer.validated_data.get('asiento_contable'))
+        movimiento = serializer.save()
+        SaldoDiario.registrar(movimiento.asiento_contable, [movimiento])
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        anterior = serializer.instance
+        self.validar_periodo_abierto(anterior.asiento_contable)
+        self.validar_periodo_abierto(serializer.validated_data.get('asiento_contable'))
+        SaldoDiario.registrar(anterior.asiento_contable, [anterior], signo=-1)
+        movimiento = serializer.save()
+        SaldoDiario.registrar(movimiento.asiento_contable, [movimiento])
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        self.validar_periodo_abierto(instance.asiento_contable)
+        SaldoDiario.registrar(instance.asiento_contable, [instance], signo=-1)
+        instance.delete()
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from contabilidad.apps.empresa.models import Empresa
+from contabilidad.apps.gestion_cuenta.models import ClaseCuentaClosure
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye la tabla de clausura de ClaseCuenta a partir de ClaseCuenta.padre'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--empresa',
+            type=str,
+            help='ID de la empresa a reconstruir (por defecto todas)',
+        )
+
+    def handle(self, *args, **options):
+        empresas = Empresa.objects.all()
+        if options['empresa']:
+            empresas = empresas.filter(id=options['empresa'])
+
+        for empresa in empresas:
+            with transaction.atomic():
+                filas = ClaseCuentaClosure.reconstruir(empresa.id)
+            self.stdout.write(f"{empresa.nombre}: {filas} filas de clausura")
+
+        self.stdout.write(self.style.SUCCESS("✅ Clausura de clases reconstruida"))
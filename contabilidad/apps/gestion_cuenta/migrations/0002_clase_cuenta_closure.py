@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def poblar_closure(apps, schema_editor):
+    """Carga la clausura de las clases existentes (igual que ClaseCuentaClosure.reconstruir)."""
+    ClaseCuenta = apps.get_model('gestion_cuenta', 'ClaseCuenta')
+    ClaseCuentaClosure = apps.get_model('gestion_cuenta', 'ClaseCuentaClosure')
+
+    padres = dict(ClaseCuenta.objects.values_list('id', 'padre_id'))
+    filas = []
+    for clase_id in padres:
+        actual, profundidad, vistos = clase_id, 0, set()
+        while actual is not None and actual in padres and actual not in vistos:
+            vistos.add(actual)
+            filas.append(ClaseCuentaClosure(ancestro_id=actual, descendiente_id=clase_id, profundidad=profundidad))
+            actual = padres[actual]
+            profundidad += 1
+    ClaseCuentaClosure.objects.bulk_create(filas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_cuenta', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClaseCuentaClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('profundidad', models.PositiveIntegerField()),
+                ('ancestro', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendientes_closure', to='gestion_cuenta.clasecuenta')),
+                ('descendiente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestros_closure', to='gestion_cuenta.clasecuenta')),
+            ],
+            options={
+                'db_table': 'clase_cuenta_closure',
+                'indexes': [models.Index(fields=['descendiente', 'profundidad'], name='closure_descendiente')],
+                'unique_together': {('ancestro', 'descendiente')},
+            },
+        ),
+        migrations.RunPython(poblar_closure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:37
+
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresa', '0002_initial'),
+        ('gestion_cuenta', '0002_clase_cuenta_closure'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cuenta',
+            name='primer_digito',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Cast(django.db.models.functions.text.Substr(django.db.models.functions.comparison.Cast('codigo', models.CharField()), 1, 1), models.PositiveSmallIntegerField()), output_field=models.PositiveSmallIntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='cuenta',
+            index=models.Index(fields=['empresa', 'primer_digito', 'codigo'], name='cuenta_empresa_orden'),
+        ),
+    ]
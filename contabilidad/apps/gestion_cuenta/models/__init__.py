@@ -1,2 +1,3 @@
 from .clase_cuenta import ClaseCuenta
-from .cuenta import Cuenta
\ No newline at end of file
+from .cuenta import Cuenta
+from .clase_cuenta_closure import ClaseCuentaClosure
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from ...empresa.models.empresa import Empresa
 import uuid
 
@@ -26,33 +26,45 @@ class ClaseCuenta(models.Model):
     update_at = models.DateTimeField(auto_now=True)
     
     def save(self, *args, **kwargs):
-        codigo_str = str(self.codigo)
-        clase_seleccionada = None   
+        from .clase_cuenta_closure import ClaseCuentaClosure
+        from ..services.jerarquia import prefijos, resolver_padre
 
-        # Buscamos la clase más específica por prefijo, filtrando por empresa
-        for i in range(len(codigo_str), 0, -1):
-            prefijo = int(codigo_str[:i])
-            try:
-                candidata = ClaseCuenta.objects.get(codigo=prefijo, empresa=self.empresa)
-                # Evitar asignarse a sí misma
-                if candidata != self:
-                    clase_seleccionada = candidata
-                    break
-            except ClaseCuenta.DoesNotExist:
-                continue
+        creada = self._state.adding
+        padre_anterior = self.padre_id
 
-        self.padre = clase_seleccionada
+        # La clase más específica por prefijo, filtrando por empresa (una sola consulta)
+        candidatas = ClaseCuenta.objects.filter(
+            empresa_id=self.empresa_id,
+            codigo__in=prefijos(self.codigo),
+        )
+        self.padre = resolver_padre(self.codigo, {clase.codigo: clase for clase in candidatas})
 
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Mantener la tabla de clausura si la clase es nueva o cambió de padre
+            if creada or self.padre_id != padre_anterior:
+                ClaseCuentaClosure.mover(self, creada=creada)
 
+    def delete(self, *args, **kwargs):
+        from .clase_cuenta_closure import ClaseCuentaClosure
+
+        with transaction.atomic():
+            ClaseCuentaClosure.desprender(self)
+            return super().delete(*args, **kwargs)
 
     def get_descendientes_ids(self):
         """
-        Devuelve una lista con los IDs de esta clase y todas sus subclases recursivamente
+        Devuelve una lista con los IDs de esta clase y todas sus subclases (una consulta a la clausura)
+        """
+        return list(self.descendientes_closure.values_list('descendiente_id', flat=True))
+
+    def get_ancestros_ids(self):
         """
-        ids = [self.id]
-        for hijo in self.hijos.all():
-            ids.extend(hijo.get_descendientes_ids())
-        return ids
+        Devuelve los IDs del camino desde la raíz hasta esta clase (inclusive), en una consulta
+        """
+        return list(
+            self.ancestros_closure.order_by('-profundidad').values_list('ancestro_id', flat=True)
+        )
+
     def __str__(self):
         return str(self.codigo) + " - " + self.nombre
\ No newline at end of file
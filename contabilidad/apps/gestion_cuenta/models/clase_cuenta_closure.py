@@ -0,0 +1,87 @@
+from django.db import models
+from django.db.models import F
+from .clase_cuenta import ClaseCuenta
+
+
+class ClaseCuentaClosure(models.Model):
+    """
+    Tabla de clausura de la jerarquía de ClaseCuenta: una fila por cada par
+    (ancestro, descendiente) con la distancia entre ambos, incluida la fila
+    de cada clase consigo misma (profundidad 0).
+
+    Un subárbol es un solo JOIN (ancestro = X) y el camino de una clase
+    hasta la raíz una sola consulta (descendiente = X).
+    """
+    class Meta:
+        db_table = "clase_cuenta_closure"
+        unique_together = ('ancestro', 'descendiente')
+        indexes = [
+            models.Index(fields=['descendiente', 'profundidad'], name='closure_descendiente'),
+        ]
+
+    ancestro = models.ForeignKey(ClaseCuenta, on_delete=models.CASCADE, related_name='descendientes_closure')
+    descendiente = models.ForeignKey(ClaseCuenta, on_delete=models.CASCADE, related_name='ancestros_closure')
+    profundidad = models.PositiveIntegerField()
+
+    @classmethod
+    def mover(cls, clase, creada=False):
+        """
+        Ubica a `clase` (y todo su subárbol) bajo su `padre` actual.
+        Se llama después de guardar la clase, al crearla o si cambió su padre.
+        """
+        if creada:
+            cls.objects.create(ancestro=clase, descendiente=clase, profundidad=0)
+            subarbol = [(clase.id, 0)]
+        else:
+            subarbol = list(
+                cls.objects.filter(ancestro=clase).values_list('descendiente_id', 'profundidad')
+            )
+            ids_subarbol = [descendiente_id for descendiente_id, _ in subarbol]
+            # Cortar el subárbol de sus ancestros anteriores
+            cls.objects.filter(descendiente_id__in=ids_subarbol).exclude(ancestro_id__in=ids_subarbol).delete()
+
+        if clase.padre_id is None:
+            return
+
+        ancestros = cls.objects.filter(descendiente_id=clase.padre_id).values_list('ancestro_id', 'profundidad')
+        cls.objects.bulk_create([
+            cls(ancestro_id=ancestro_id, descendiente_id=descendiente_id, profundidad=p_ancestro + p_descendiente + 1)
+            for ancestro_id, p_ancestro in ancestros
+            for descendiente_id, p_descendiente in subarbol
+        ], batch_size=1000)
+
+    @classmethod
+    def desprender(cls, clase):
+        """
+        Antes de borrar `clase`: sus hijos quedan como raíces (padre SET_NULL),
+        así que su subárbol deja de colgar de la clase y de sus ancestros.
+        """
+        ids_subarbol = cls.objects.filter(ancestro=clase, profundidad__gt=0).values('descendiente_id')
+        ids_ancestros = cls.objects.filter(descendiente=clase).values('ancestro_id')
+        cls.objects.filter(descendiente_id__in=ids_subarbol, ancestro_id__in=ids_ancestros).delete()
+
+    @classmethod
+    def reconstruir(cls, empresa_id):
+        """
+        Recalcula la clausura de la empresa a partir de ClaseCuenta.padre
+        (una consulta para leer y bulk_create para escribir).
+        Devuelve la cantidad de filas generadas.
+        """
+        padres = dict(ClaseCuenta.objects.filter(empresa_id=empresa_id).values_list('id', 'padre_id'))
+
+        filas = []
+        for clase_id in padres:
+            actual, profundidad, vistos = clase_id, 0, set()
+            # `vistos` corta ciclos si los datos estuvieran corruptos
+            while actual is not None and actual in padres and actual not in vistos:
+                vistos.add(actual)
+                filas.append(cls(ancestro_id=actual, descendiente_id=clase_id, profundidad=profundidad))
+                actual = padres[actual]
+                profundidad += 1
+
+        cls.objects.filter(descendiente__empresa_id=empresa_id).delete()
+        cls.objects.bulk_create(filas, batch_size=1000)
+        return len(filas)
+
+    def __str__(self):
+        return f"{self.ancestro_id} -> {self.descendiente_id} ({self.profundidad})"
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Cast, Substr
 from django.forms import ValidationError
 from .clase_cuenta import ClaseCuenta
 from ...empresa.models.empresa import Empresa
@@ -13,6 +14,10 @@ class Cuenta(models.Model):
     class Meta:
         db_table = "cuenta"
         unique_together = ('codigo','empresa')
+        indexes = [
+            # Orden del listado de cuentas: primer dígito y luego código completo
+            models.Index(fields=['empresa', 'primer_digito', 'codigo'], name='cuenta_empresa_orden'),
+        ]
         
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     codigo = models.PositiveBigIntegerField()
@@ -29,31 +34,36 @@ class Cuenta(models.Model):
         on_delete=models.CASCADE,
         related_name="cuentas"
     )
+    # Primer dígito del código (grupo: 1 activo, 2 pasivo...), calculado por la base de datos
+    primer_digito = models.GeneratedField(
+        expression=Cast(Substr(Cast('codigo', models.CharField()), 1, 1), models.PositiveSmallIntegerField()),
+        output_field=models.PositiveSmallIntegerField(),
+        db_persist=True,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     update_at = models.DateTimeField(auto_now=True)
     
     def save(self, *args, **kwargs):
-        # 1️⃣ Validar unicidad por código y empresa
-        print("si entro al modelo")
-        if Cuenta.objects.filter(codigo=self.codigo, empresa=self.empresa).exclude(pk=self.pk).exists():
-            raise ValidationError({
-                "codigo": "Ya existe una cuenta con este código en la empresa."
-            })
-
-        # 2️⃣ Asignar clase_cuenta automáticamente según prefijo (usar strings para no perder ceros)
-        codigo_str = str(self.codigo)
-        posibles_codigos = [codigo_str[:i+1] for i in range(len(codigo_str))]
+        from ..services.jerarquia import prefijos, resolver_padre
 
-        clase = ClaseCuenta.objects.filter(
-            codigo__in=posibles_codigos,
-            empresa=self.empresa
-        ).order_by('-codigo').first()
+        # 1️⃣ Asignar clase_cuenta automáticamente según prefijo (una sola consulta)
+        candidatas = ClaseCuenta.objects.filter(
+            codigo__in=prefijos(self.codigo, incluir_propio=True),
+            empresa_id=self.empresa_id,
+        )
+        # Puede ser None si no encuentra ninguna
+        self.clase_cuenta = resolver_padre(
+            self.codigo, {clase.codigo: clase for clase in candidatas}, incluir_propio=True
+        )
 
-        self.clase_cuenta = clase  # Puede ser None si no encuentra ninguna
-
-        # 3️⃣ Guardar usando super
+        # 2️⃣ Guardar usando super; la unicidad por código y empresa la valida la base de datos
         try:
-            super().save(*args, **kwargs)
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError:
+            raise ValidationError({
+                "codigo": "Ya existe una cuenta con este código en la empresa."
+            })
         except ValidationError:
             # Re-lanzar errores de validación de manera que DRF los capture
             raise
@@ -0,0 +1,160 @@
+"""
+Importación masiva del plan de cuentas (clases y cuentas) desde CSV o JSON.
+
+Cada fila trae tipo ("clase" o "cuenta"), codigo, nombre y opcionalmente
+estado. Todas las filas se validan en una sola pasada contra los códigos que
+ya existen en la empresa (dos consultas) y las válidas se insertan con
+crear_plan, que resuelve los padres en memoria y usa bulk_create.
+"""
+import csv
+import io
+import json
+from ..models import ClaseCuenta, Cuenta
+from .jerarquia import crear_plan
+
+
+TIPOS = ("clase", "cuenta")
+ESTADOS = {estado for estado, _ in Cuenta.ESTADO_CHOICES}
+MAX_FILAS = 50_000
+# Límites de PositiveIntegerField (clase) y PositiveBigIntegerField (cuenta)
+MAX_CODIGO = {"clase": 2 ** 31 - 1, "cuenta": 2 ** 63 - 1}
+MAX_NOMBRE = 100
+
+
+class ArchivoInvalido(Exception):
+    """El contenido no se pudo leer como CSV/JSON del plan de cuentas."""
+
+
+def leer_csv(contenido):
+    """Filas de un CSV con encabezado (tipo, codigo, nombre[, estado]); acepta ',' o ';'."""
+    if isinstance(contenido, bytes):
+        try:
+            contenido = contenido.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            contenido = contenido.decode("latin-1")
+    contenido = contenido.lstrip("\ufeff")
+
+    try:
+        dialecto = csv.Sniffer().sniff(contenido[:4096], delimiters=",;")
+    except csv.Error:
+        dialecto = csv.excel
+
+    lector = csv.DictReader(io.StringIO(contenido), dialect=dialecto)
+    encabezado = [columna.strip().lower() for columna in (lector.fieldnames or [])]
+    faltantes = [columna for columna in ("tipo", "codigo", "nombre") if columna not in encabezado]
+    if faltantes:
+        raise ArchivoInvalido(f"Faltan columnas en el encabezado: {', '.join(faltantes)}")
+    lector.fieldnames = encabezado
+
+    # La fila 1 es el encabezado
+    return [(numero, fila) for numero, fila in enumerate(lector, start=2)]
+
+
+def leer_json(datos):
+    """Filas de una lista de objetos o de {"clases": [...], "cuentas": [...]}."""
+    if isinstance(datos, (bytes, str)):
+        try:
+            datos = json.loads(datos)
+        except ValueError:
+            raise ArchivoInvalido("El contenido no es un JSON válido")
+
+    if isinstance(datos, dict):
+        filas = [dict(fila, tipo="clase") for fila in datos.get("clases") or [] if isinstance(fila, dict)]
+        filas += [dict(fila, tipo="cuenta") for fila in datos.get("cuentas") or [] if isinstance(fila, dict)]
+        if not filas:
+            filas = datos.get("filas")
+    else:
+        filas = datos
+
+    if not isinstance(filas, list):
+        raise ArchivoInvalido('Se espera una lista de filas o un objeto con "clases" y "cuentas"')
+    return [(numero, fila) for numero, fila in enumerate(filas, start=1)]
+
+
+def validar_filas(empresa_id, filas):
+    """
+    Valida todas las filas de una vez. Devuelve (clases, cuentas, errores):
+    instancias sin guardar de las filas válidas y un error por fila inválida
+    con la forma {"fila", "codigo", "errores": {campo: [mensajes]}}.
+    """
+    if len(filas) > MAX_FILAS:
+        raise ArchivoInvalido(f"El archivo supera el máximo de {MAX_FILAS} filas")
+
+    existentes = {
+        "clase": set(ClaseCuenta.objects.filter(empresa_id=empresa_id).values_list("codigo", flat=True)),
+        "cuenta": set(Cuenta.objects.filter(empresa_id=empresa_id).values_list("codigo", flat=True)),
+    }
+    vistos = {"clase": {}, "cuenta": {}}
+
+    clases, cuentas, errores = [], [], []
+    for numero, fila in filas:
+        if not isinstance(fila, dict):
+            errores.append({"fila": numero, "codigo": None, "errores": {"fila": ["Se espera un objeto"]}})
+            continue
+
+        problemas = {}
+        tipo = str(fila.get("tipo") or "").strip().lower()
+        codigo_crudo = fila.get("codigo")
+        nombre = str(fila.get("nombre") or "").strip()
+        estado = str(fila.get("estado") or "ACTIVO").strip().upper()
+
+        if tipo not in TIPOS:
+            problemas["tipo"] = [f'Debe ser "clase" o "cuenta", no "{fila.get("tipo")}".']
+
+        codigo = None
+        try:
+            codigo = int(str(codigo_crudo).strip())
+            if codigo <= 0 or (tipo in TIPOS and codigo > MAX_CODIGO[tipo]):
+                raise ValueError
+        except (TypeError, ValueError):
+            codigo = None
+            problemas["codigo"] = ["Debe ser un entero positivo."]
+
+        if not nombre:
+            problemas["nombre"] = ["Este campo es requerido."]
+        elif len(nombre) > MAX_NOMBRE:
+            problemas["nombre"] = [f"No puede tener más de {MAX_NOMBRE} caracteres."]
+
+        if tipo == "cuenta" and estado not in ESTADOS:
+            problemas["estado"] = [f"Debe ser uno de: {', '.join(sorted(ESTADOS))}."]
+
+        if codigo is not None and tipo in TIPOS:
+            if codigo in existentes[tipo]:
+                problemas.setdefault("codigo", []).append(f"Ya existe una {tipo} con este código en la empresa.")
+            elif codigo in vistos[tipo]:
+                problemas.setdefault("codigo", []).append(
+                    f"Código repetido en el archivo (fila {vistos[tipo][codigo]})."
+                )
+            else:
+                vistos[tipo][codigo] = numero
+
+        if problemas:
+            errores.append({"fila": numero, "codigo": codigo_crudo, "errores": problemas})
+        elif tipo == "clase":
+            clases.append(ClaseCuenta(codigo=codigo, nombre=nombre))
+        else:
+            cuentas.append(Cuenta(codigo=codigo, nombre=nombre, estado=estado))
+
+    return clases, cuentas, errores
+
+
+def importar_plan(empresa_id, filas, omitir_errores=False):
+    """
+    Valida e importa las filas en una sola transacción.
+
+    Si hay errores no se guarda nada, salvo con `omitir_errores`, que importa
+    las filas válidas y reporta las demás. Devuelve el resumen de la importación.
+    """
+    clases, cuentas, errores = validar_filas(empresa_id, filas)
+
+    importar = not errores or omitir_errores
+    if importar:
+        crear_plan(empresa_id, clases, cuentas)
+
+    return {
+        "importado": importar,
+        "filas": len(filas),
+        "clases_creadas": len(clases) if importar else 0,
+        "cuentas_creadas": len(cuentas) if importar else 0,
+        "errores": errores,
+    }
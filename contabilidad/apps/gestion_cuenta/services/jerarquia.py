@@ -0,0 +1,125 @@
+"""
+Resolución del padre de una clase/cuenta por prefijo de código.
+
+La clase padre de un código es la clase existente con el prefijo más largo
+(p. ej. 11101 -> 111 -> 11 -> 1). Las funciones trabajan sobre un mapa
+{codigo: clase} armado con una sola consulta, así que sirven tanto para un
+save() individual como para lotes que se insertan con bulk_create. No
+dependen del modelo: se usan igual con ClaseCuenta/Cuenta y con
+PlantillaClase/PlantillaCuenta.
+"""
+from django.db import transaction
+from ..models import ClaseCuenta, ClaseCuentaClosure, Cuenta
+
+
+def prefijos(codigo, incluir_propio=False):
+    """Prefijos numéricos del código, del más largo al más corto.
+
+    Para una clase el propio código no cuenta (no puede ser su padre); para
+    una cuenta sí, porque una cuenta puede tener el mismo código que su clase.
+    """
+    codigo_str = str(codigo)
+    fin = len(codigo_str) if incluir_propio else len(codigo_str) - 1
+    return [int(codigo_str[:i]) for i in range(fin, 0, -1)]
+
+
+def resolver_padre(codigo, clases_por_codigo, incluir_propio=False):
+    """Clase del prefijo más largo presente en `clases_por_codigo` (o None)."""
+    for prefijo in prefijos(codigo, incluir_propio):
+        clase = clases_por_codigo.get(prefijo)
+        if clase is not None:
+            return clase
+    return None
+
+
+def asignar_padres(clases, existentes=None):
+    """Asigna `padre` en memoria a un lote de clases.
+
+    `existentes` es el mapa {codigo: clase} de las clases ya guardadas; las
+    clases del lote también pueden ser padre de otras del mismo lote.
+    """
+    por_codigo = dict(existentes or {})
+    por_codigo.update({clase.codigo: clase for clase in clases})
+    for clase in clases:
+        clase.padre = resolver_padre(clase.codigo, por_codigo)
+    return por_codigo
+
+
+def asignar_clases(cuentas, clases_por_codigo):
+    """Asigna `clase_cuenta` en memoria a un lote de cuentas."""
+    for cuenta in cuentas:
+        cuenta.clase_cuenta = resolver_padre(cuenta.codigo, clases_por_codigo, incluir_propio=True)
+
+
+def clases_por_codigo(empresa_id):
+    """Mapa {codigo: ClaseCuenta} de la empresa (una consulta)."""
+    return {clase.codigo: clase for clase in ClaseCuenta.objects.filter(empresa_id=empresa_id)}
+
+
+def crear_plan(empresa_id, clases=(), cuentas=(), batch_size=1000):
+    """Inserta un lote de clases y cuentas nuevas de la empresa con bulk_create.
+
+    Resuelve padres y clases en memoria contra las clases existentes (una
+    consulta), reconstruye la tabla de clausura y sube las versiones del
+    libro y del plan, ya que bulk_create no llama a save() ni dispara
+    señales. Como en save(), las clases y cuentas ya guardadas no se reubican.
+    """
+    from ...reporte.models import VersionLibro
+
+    clases = list(clases)
+    cuentas = list(cuentas)
+    for objeto in clases + cuentas:
+        objeto.empresa_id = empresa_id
+
+    with transaction.atomic():
+        por_codigo = asignar_padres(clases, clases_por_codigo(empresa_id))
+        asignar_clases(cuentas, por_codigo)
+
+        # Los id (UUID) se generan al instanciar: los padres del mismo lote ya tienen pk
+        ClaseCuenta.objects.bulk_create(clases, batch_size=batch_size)
+        Cuenta.objects.bulk_create(cuentas, batch_size=batch_size)
+
+        if clases:
+            ClaseCuentaClosure.reconstruir(empresa_id)
+        if clases or cuentas:
+            VersionLibro.incrementar(empresa_id, plan=True)
+    return clases, cuentas
+
+
+def arbol_clases(empresa_id, incluir_cuentas=False):
+    """
+    Árbol de clases de la empresa armado en memoria: una consulta para las
+    clases y, si se piden, otra para las cuentas (en lugar de una por nodo).
+
+    Cada nodo tiene id, codigo, nombre e hijos (ordenados por código), como
+    ClaseCuentaDetailChildrenSerializer; con `incluir_cuentas` además trae
+    las cuentas directas de la clase. Las raíces son las clases de un dígito.
+    """
+    nodos = {}
+    hijos_de = {}
+    for clase_id, codigo, nombre, padre_id in (
+        ClaseCuenta.objects.filter(empresa_id=empresa_id)
+        .order_by('codigo')
+        .values_list('id', 'codigo', 'nombre', 'padre_id')
+    ):
+        nodo = {"id": str(clase_id), "codigo": codigo, "nombre": nombre, "hijos": []}
+        if incluir_cuentas:
+            nodo["cuentas"] = []
+        nodos[clase_id] = nodo
+        hijos_de.setdefault(padre_id, []).append(nodo)
+
+    for padre_id, hijos in hijos_de.items():
+        if padre_id in nodos:
+            nodos[padre_id]["hijos"] = hijos
+
+    if incluir_cuentas:
+        for cuenta_id, codigo, nombre, estado, clase_id in (
+            Cuenta.objects.filter(empresa_id=empresa_id, clase_cuenta__isnull=False)
+            .order_by('codigo')
+            .values_list('id', 'codigo', 'nombre', 'estado', 'clase_cuenta_id')
+        ):
+            nodos[clase_id]["cuentas"].append(
+                {"id": str(cuenta_id), "codigo": codigo, "nombre": nombre, "estado": estado}
+            )
+
+    return [nodo for nodo in nodos.values() if 0 <= nodo["codigo"] <= 9]
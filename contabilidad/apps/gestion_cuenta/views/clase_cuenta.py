@@ -1,13 +1,18 @@
+import hashlib
+import json
+from django.utils.http import parse_etags, quote_etag
 from rest_framework.response import Response
+from rest_framework import status
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from ..models.clase_cuenta import ClaseCuenta
 
 from ..serializers import (ClaseCuentaCreateSerializer,
                            ClaseCuentaDetailSerializer,
-                           ClaseCuentaListSerializer,
-                           ClaseCuentaDetailChildrenSerializer)
+                           ClaseCuentaListSerializer)
 from rest_framework.permissions import IsAuthenticated
+from ..services.jerarquia import arbol_clases
+from ...reporte.services.cache import obtener_reporte
 
 class ClaseCuentaViewSet(viewsets.ModelViewSet):
     queryset = ClaseCuenta.objects.all()
@@ -29,11 +34,31 @@ class ClaseCuentaViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def arbol_cuenta(self, request):
-        request = self.request
+        """
+        GET /clase_cuenta/arbol_cuenta/?cuentas=true
+        Árbol de clases (y opcionalmente sus cuentas) de la empresa. Responde
+        con ETag; si el cliente envía If-None-Match con el mismo valor, 304.
+        """
         empresa = request.auth.get('empresa')  # o request.user.empresa.id según tu login
-        clase_cuenta = ClaseCuenta.objects.filter(empresa_id=empresa,codigo__gte=0, codigo__lte=9)
-        clase_cuenta_serializer = ClaseCuentaDetailChildrenSerializer(clase_cuenta, many=True)
-        return Response(clase_cuenta_serializer.data)
-    
+        incluir_cuentas = request.query_params.get('cuentas', '').lower() in ('true', '1', 'si')
+
+        def calcular():
+            datos = arbol_clases(empresa, incluir_cuentas=incluir_cuentas)
+            # El ETag depende del contenido: si cambian solo los asientos el árbol sigue igual
+            etag = hashlib.md5(json.dumps(datos, sort_keys=True).encode()).hexdigest()
+            return {"etag": quote_etag(etag), "datos": datos}
+
+        # El árbol solo se recalcula cuando cambian las cuentas o clases (versión del plan)
+        arbol = obtener_reporte(
+            empresa, "arbol_cuenta", {"cuentas": incluir_cuentas}, calcular, campo_version='version_plan',
+        )
 
- 
\ No newline at end of file
+        etags = parse_etags(request.headers.get('If-None-Match', ''))
+        if arbol["etag"] in etags or '*' in etags:
+            respuesta = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            respuesta = Response(arbol["datos"])
+        respuesta['ETag'] = arbol["etag"]
+        # El navegador puede guardar el árbol pero debe revalidarlo en cada uso
+        respuesta['Cache-Control'] = 'private, no-cache'
+        return respuesta
@@ -2,12 +2,12 @@ from rest_framework import viewsets
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
-from django.db.models.functions import Cast, Substr
-from django.db.models import CharField
-from rest_framework import filters
+from rest_framework import filters, status
+from rest_framework.parsers import JSONParser, MultiPartParser
 from ...utils.log import registrar_evento  # 🔹 Importamos la función de log
 
 from ..models import Cuenta,ClaseCuenta
+from ..services.importacion import ArchivoInvalido, importar_plan, leer_csv, leer_json
 from ...gestion_asiento.models import Movimiento
 from ...gestion_asiento.serializers import MovimientoListSerializer
 from ..serializers.cuenta import (CuentaCreateSerializer,
@@ -44,19 +44,11 @@ class CuentaViewSet(viewsets.ModelViewSet):
         # Filtrar por clase seleccionada si se pasa por query params
         clase_id = request.query_params.get('clase_id')
         if clase_id:
-            try:
-                clase = ClaseCuenta.objects.get(id=clase_id, empresa_id=empresa_id)
-                # Obtener IDs de todos los descendientes
-                descendientes_ids = clase.get_descendientes_ids()
-                qs = qs.filter(clase_cuenta_id__in=descendientes_ids)
-            except ClaseCuenta.DoesNotExist:
-                qs = qs.none()
-
-        # Convertimos codigo a char, luego extraemos el primer dígito y ordenamos
-        qs = qs.annotate(
-            codigo_str=Cast('codigo', CharField()),      # convierte a texto
-            primer_digito=Substr('codigo_str', 1, 1)    # extrae primer dígito
-        ).order_by('primer_digito', 'codigo')           # ordena por primer dígito y luego por código completo
+            # Cuentas de la clase y de todas sus subclases: un JOIN con la tabla de clausura
+            qs = qs.filter(clase_cuenta__ancestros_closure__ancestro_id=clase_id)
+
+        # Primer dígito y luego código completo (columna calculada e indexada)
+        qs = qs.order_by('primer_digito', 'codigo')
 
         return qs
     
@@ -119,3 +111,48 @@ class CuentaViewSet(viewsets.ModelViewSet):
         serializer = MovimientoListSerializer(movimientos, many=True)
         
         return Response(serializer.data)
+
+    @action(detail=False, methods=['post'], url_path='importar', parser_classes=[JSONParser, MultiPartParser])
+    def importar(self, request):
+        """
+        POST /cuenta/importar/
+        Importa clases y cuentas en lote: archivo CSV/JSON en el campo `archivo`
+        (multipart) o un JSON con la lista de filas. Con errores no se guarda
+        nada, salvo con ?omitir_errores=true; la respuesta trae el error de cada fila.
+        """
+        empresa_id = request.auth.get('empresa')
+        omitir_errores = request.query_params.get('omitir_errores', '').lower() in ('true', '1', 'si')
+
+        try:
+            archivo = request.FILES.get('archivo')
+            if archivo is not None:
+                contenido = archivo.read()
+                es_json = archivo.name.lower().endswith('.json') or 'json' in (archivo.content_type or '')
+                filas = leer_json(contenido) if es_json else leer_csv(contenido)
+            else:
+                filas = leer_json(request.data)
+            resumen = importar_plan(empresa_id, filas, omitir_errores=omitir_errores)
+        except ArchivoInvalido as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not resumen["importado"]:
+            return Response(resumen, status=status.HTTP_400_BAD_REQUEST)
+
+        token = request.COOKIES.get("sessionToken") or request.headers.get('Authorization', '').split(' ')[-1]
+        username = request.user.id
+
+        # Un solo evento para toda la importación
+        registrar_evento(
+            id_sesion=token,
+            empresa_id=str(empresa_id),
+            usuario_id=username,
+            datos_usuario=None,
+            nivel="INFO",
+            accion="Importación de plan de cuentas",
+            detalle=(
+                f"El usuario {username} importó {resumen['clases_creadas']} clases y "
+                f"{resumen['cuentas_creadas']} cuentas ({len(resumen['errores'])} filas con errores)."
+            )
+        )
+
+        return Response(resumen, status=status.HTTP_201_CREATED)
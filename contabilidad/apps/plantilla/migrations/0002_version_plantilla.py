@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 20:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plantilla', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionPlantilla',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'version_plantilla',
+            },
+        ),
+    ]
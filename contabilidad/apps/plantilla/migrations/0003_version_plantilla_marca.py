@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 20:33
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plantilla', '0002_version_plantilla'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='versionplantilla',
+            name='version',
+        ),
+        migrations.AddField(
+            model_name='versionplantilla',
+            name='marca',
+            field=models.UUIDField(default=uuid.uuid4),
+        ),
+    ]
@@ -1,3 +1,4 @@
 from .plantilla_clase import PlantillaClase
 from .plantilla_cuenta import PlantillaCuenta
-from .plantilla_rol import PlantillaRol
\ No newline at end of file
+from .plantilla_rol import PlantillaRol
+from .version_plantilla import VersionPlantilla
@@ -17,22 +17,11 @@ class PlantillaClase(models.Model):
     )
     
     def save(self, *args, **kwargs):
-        codigo_str = str(self.codigo)
-        clase_seleccionada = None   
+        from ...gestion_cuenta.services.jerarquia import prefijos, resolver_padre
 
-        # Buscamos la clase más específica por prefijo, filtrando por empresa
-        for i in range(len(codigo_str), 0, -1):
-            prefijo = int(codigo_str[:i])
-            try:
-                candidata = PlantillaClase.objects.get(codigo=prefijo)
-                # Evitar asignarse a sí misma
-                if candidata != self:
-                    clase_seleccionada = candidata
-                    break
-            except PlantillaClase.DoesNotExist:
-                continue
-
-        self.padre = clase_seleccionada
+        # La clase más específica por prefijo (una sola consulta)
+        candidatas = PlantillaClase.objects.filter(codigo__in=prefijos(self.codigo))
+        self.padre = resolver_padre(self.codigo, {clase.codigo: clase for clase in candidatas})
 
         super().save(*args, **kwargs)
 
@@ -23,21 +23,20 @@ class PlantillaCuenta(models.Model):
     )
     
     def save(self, *args, **kwargs):
+        from ...gestion_cuenta.services.jerarquia import prefijos, resolver_padre
+
         # 1️⃣ Validar unicidad por código y empresa
         if PlantillaCuenta.objects.filter(codigo=self.codigo).exclude(pk=self.pk).exists():
             raise ValidationError({
                 "codigo": "Ya existe una cuenta con este código en la empresa."
             })
 
-        # 2️⃣ Asignar clase_cuenta automáticamente según prefijo (usar strings para no perder ceros)
-        codigo_str = str(self.codigo)
-        posibles_codigos = [codigo_str[:i+1] for i in range(len(codigo_str))]
-
-        clase = PlantillaClase.objects.filter(
-            codigo__in=posibles_codigos,
-        ).order_by('-codigo').first()
-
-        self.clase_cuenta = clase  # Puede ser None si no encuentra ninguna
+        # 2️⃣ Asignar clase_cuenta automáticamente según prefijo (una sola consulta)
+        candidatas = PlantillaClase.objects.filter(codigo__in=prefijos(self.codigo, incluir_propio=True))
+        # Puede ser None si no encuentra ninguna
+        self.clase_cuenta = resolver_padre(
+            self.codigo, {clase.codigo: clase for clase in candidatas}, incluir_propio=True
+        )
 
         # 3️⃣ Guardar usando super
         try:
@@ -0,0 +1,38 @@
+import uuid
+from django.db import models, transaction
+
+
+class VersionPlantilla(models.Model):
+    """
+    Versión del conjunto de plantillas (clases, cuentas, roles y permisos).
+    Una sola fila; su marca se reemplaza por un uuid4 nuevo cada vez que
+    cambia una plantilla o un permiso. El conjunto cacheado para clonar
+    empresas lleva la marca en su clave, así cada proceso nota el cambio
+    aunque la caché sea local. A diferencia de un contador, la marca no se
+    repite si la tabla se vacía (flush, base recreada) y se vuelve a sembrar.
+    """
+    UNICA = 1
+
+    class Meta:
+        db_table = "version_plantilla"
+
+    id = models.PositiveSmallIntegerField(primary_key=True, default=UNICA)
+    marca = models.UUIDField(default=uuid.uuid4)
+
+    @classmethod
+    def actual(cls):
+        """Marca vigente de las plantillas (None si todavía no hay fila)."""
+        return cls.objects.filter(pk=cls.UNICA).values_list('marca', flat=True).first()
+
+    @classmethod
+    def incrementar(cls):
+        """Asigna una marca nueva dentro de la transacción en curso."""
+        if cls.objects.filter(pk=cls.UNICA).update(marca=uuid.uuid4()):
+            return
+        with transaction.atomic():
+            _, creado = cls.objects.get_or_create(pk=cls.UNICA)
+            if not creado:
+                cls.objects.filter(pk=cls.UNICA).update(marca=uuid.uuid4())
+
+    def __str__(self):
+        return f"plantillas: {self.marca}"
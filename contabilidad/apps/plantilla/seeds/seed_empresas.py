@@ -6,6 +6,7 @@ from ...usuario.models.usuario import Persona, User
 from ...gestion_cuenta.models.cuenta import Cuenta
 from ...gestion_asiento.models.asiento_contable import AsientoContable
 from ...gestion_asiento.models.movimiento import Movimiento
+from ...gestion_asiento.models.saldo_diario import SaldoDiario
 from decimal import Decimal
 from datetime import datetime, timedelta
 import random
@@ -377,4 +378,7 @@ def run():
 
         asiento_creados += 1
 
-    print(f"✅ Se crearon {asiento_creados} asientos DEMO para 'Importadora Andina' usando casi todas las cuentas.")
\ No newline at end of file
+    print(f"✅ Se crearon {asiento_creados} asientos DEMO para 'Importadora Andina' usando casi todas las cuentas.")
+
+    # Los movimientos demo se crean directo (sin serializer), se recalculan los saldos diarios
+    SaldoDiario.reconstruir(empresa.id)
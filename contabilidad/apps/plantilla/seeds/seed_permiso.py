@@ -1,8 +1,9 @@
 # plantilla/seeds/seed_permisos_custom.py
 from ...empresa.models import Permiso
 
-def run():
-    permisos_data = [
+# Catálogo de permisos. El orden define el bit de cada permiso en la máscara
+# del token (empresa/services/permisos.py): agregar siempre al final.
+PERMISOS = [
     # Cuentas
     {"nombre": "ver_cuenta", "descripcion": "Puede ver cuentas"},
     {"nombre": "crear_cuenta", "descripcion": "Puede crear cuentas"},
@@ -44,7 +45,10 @@ def run():
     {"nombre": "ver_estado_resultado", "descripcion": "Puede ver el estado resultado"},
     
 ]
-    for data in permisos_data:
+
+
+def run():
+    for data in PERMISOS:
         # Crear permiso si no existe
         Permiso.objects.get_or_create(
             nombre=data["nombre"],
@@ -0,0 +1,103 @@
+"""
+Clonado de las plantillas (clases, cuentas y roles) al crear una empresa.
+
+El conjunto de plantillas se lee una vez y queda en la caché de Django bajo
+la marca de VersionPlantilla (un uuid4 que cambia con cada plantilla o
+permiso modificado, ver plantilla/signals.py). Como la marca se lee de la
+base en cada clonado, un proceso con caché local (LocMemCache) no usa un
+conjunto viejo, tampoco después de vaciar y volver a sembrar la base (los
+ids de los permisos cambian). Al crear
+una empresa todo se inserta con unos pocos bulk_create, sin pasar por el
+save() de cada fila, así que el costo no depende del tamaño del plan.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from ..models import PlantillaClase, PlantillaCuenta, PlantillaRol, VersionPlantilla
+from ...empresa.models import Permiso, RolEmpresa
+from ...gestion_cuenta.models import ClaseCuenta, Cuenta
+from ...gestion_cuenta.services.jerarquia import crear_plan
+
+CLAVE_CACHE = "plantillas:conjunto:{marca}"
+
+# Permisos de cada rol de plantilla; el administrador recibe todos
+PERMISOS_CONTADOR = [
+    "ver_cuenta", "crear_cuenta", "editar_cuenta", "eliminar_cuenta",
+    "ver_asiento", "crear_asiento", "editar_asiento", "eliminar_asiento",
+    "ver_movimiento", "ver_libro_diario", "ver_libro_mayor",
+    "ver_balancel_general", "ver_estado_resultado", "ver_clase_cuenta",
+]
+PERMISOS_AUXILIAR = [
+    "ver_cuenta", "crear_cuenta",
+    "ver_clase_cuenta",
+    "ver_asiento", "crear_asiento",
+    "ver_movimiento",
+    "ver_libro_diario", "ver_libro_mayor",
+    "ver_balancel_general", "ver_estado_resultado",
+]
+PERMISOS_AUDITOR = [
+    "ver_cuenta", "ver_clase_cuenta", "ver_asiento",
+    "ver_movimiento", "ver_libro_diario", "ver_libro_mayor",
+    "ver_balancel_general", "ver_estado_resultado",
+]
+PERMISOS_POR_ROL = {
+    "contador": PERMISOS_CONTADOR,
+    "auxiliar contable": PERMISOS_AUXILIAR,
+    "auxiliar_contable": PERMISOS_AUXILIAR,
+    "auditor": PERMISOS_AUDITOR,
+}
+
+
+def cargar_plantillas():
+    """Plantillas y permisos como datos planos (cuatro consultas si no están en caché)."""
+    marca = VersionPlantilla.actual()
+    # Sin fila no hay con qué validar la entrada: se lee de la base sin caché
+    clave = CLAVE_CACHE.format(marca=marca) if marca else None
+    plantillas = cache.get(clave) if clave else None
+    if plantillas is None:
+        plantillas = {
+            "clases": list(PlantillaClase.objects.order_by("codigo").values_list("codigo", "nombre")),
+            "cuentas": list(PlantillaCuenta.objects.order_by("codigo").values_list("codigo", "nombre", "estado")),
+            "roles": list(PlantillaRol.objects.order_by("id").values_list("nombre", flat=True)),
+            "permisos": dict(Permiso.objects.values_list("nombre", "id")),
+        }
+        if clave:
+            cache.set(clave, plantillas, timeout=None)
+    return plantillas
+
+
+def invalidar_plantillas():
+    # Las entradas de versiones anteriores dejan de usarse y la caché las desaloja
+    VersionPlantilla.incrementar()
+
+
+def permisos_de_rol(nombre_rol, permisos):
+    """IDs de los permisos de un rol de plantilla según su nombre."""
+    nombre_rol = nombre_rol.lower()
+    if nombre_rol == "admin":
+        return list(permisos.values())
+    return [permisos[nombre] for nombre in PERMISOS_POR_ROL.get(nombre_rol, []) if nombre in permisos]
+
+
+def clonar_plantillas(empresa):
+    """Crea el plan de cuentas y los roles por defecto de una empresa nueva."""
+    plantillas = cargar_plantillas()
+
+    with transaction.atomic():
+        # Los padres y la clase de cada cuenta se resuelven por prefijo en memoria,
+        # igual que en PlantillaClase.save / PlantillaCuenta.save
+        crear_plan(
+            empresa.id,
+            [ClaseCuenta(codigo=codigo, nombre=nombre) for codigo, nombre in plantillas["clases"]],
+            [Cuenta(codigo=codigo, nombre=nombre, estado=estado) for codigo, nombre, estado in plantillas["cuentas"]],
+        )
+
+        roles = RolEmpresa.objects.bulk_create(
+            [RolEmpresa(empresa=empresa, nombre=nombre) for nombre in plantillas["roles"]]
+        )
+        PermisoRol = Permiso.roles.through
+        PermisoRol.objects.bulk_create([
+            PermisoRol(permiso_id=permiso_id, rolempresa_id=rol.id)
+            for rol in roles
+            for permiso_id in permisos_de_rol(rol.nombre, plantillas["permisos"])
+        ], batch_size=1000)
+    return roles
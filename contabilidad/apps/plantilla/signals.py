@@ -1,6 +1,9 @@
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_delete, post_migrate, post_save
 from django.dispatch import receiver
 from django.core.management import call_command
+from .models import PlantillaClase, PlantillaCuenta, PlantillaRol
+from .services.clonado import invalidar_plantillas
+from ..empresa.models import Permiso
 
 @receiver(post_migrate)
 def ejecutar_seeders(sender, **kwargs):
@@ -13,3 +16,12 @@ def ejecutar_seeders(sender, **kwargs):
         print("✅ Seed_all ejecutado correctamente después de migrate")
     except Exception as e:
         print(f"❌ Error ejecutando seed_all: {e}")
+
+
+@receiver([post_save, post_delete], sender=PlantillaClase)
+@receiver([post_save, post_delete], sender=PlantillaCuenta)
+@receiver([post_save, post_delete], sender=PlantillaRol)
+@receiver([post_save, post_delete], sender=Permiso)
+def invalidar_cache_plantillas(sender, **kwargs):
+    # El conjunto cacheado para clonar empresas deja de ser válido
+    invalidar_plantillas()
@@ -4,3 +4,5 @@ from django.apps import AppConfig
 class ReporteConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'contabilidad.apps.reporte'
+    def ready(self):
+        import contabilidad.apps.reporte.signals
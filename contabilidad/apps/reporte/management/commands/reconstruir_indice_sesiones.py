@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from contabilidad.apps.utils.log import indice_sesiones
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de sesiones del log (logs/sesiones.idx) a partir de los segmentos JSONL'
+
+    def handle(self, *args, **options):
+        sesiones = indice_sesiones.reconstruir()
+        self.stdout.write(self.style.SUCCESS(f"✅ Índice de sesiones reconstruido: {sesiones} sesiones"))
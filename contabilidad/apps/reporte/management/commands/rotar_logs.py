@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from contabilidad.apps.utils.log import rotar_logs
+
+
+class Command(BaseCommand):
+    help = 'Cierra y comprime los segmentos del log de meses anteriores o que superan el tamaño máximo'
+
+    def handle(self, *args, **options):
+        cerrados = rotar_logs()
+        self.stdout.write(self.style.SUCCESS(f"✅ Logs rotados: {cerrados} segmentos cerrados"))
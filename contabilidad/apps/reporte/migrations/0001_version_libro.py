@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('empresa', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionLibro',
+            fields=[
+                ('empresa', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='version_libro', serialize=False, to='empresa.empresa')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'version_libro',
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:22
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresa', '0002_initial'),
+        ('reporte', '0001_version_libro'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportacionPdf',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('reporte', models.CharField(choices=[('balance_general', 'Balance general'), ('estado_resultados', 'Estado de resultados')], max_length=30)),
+                ('fecha_inicio', models.DateField()),
+                ('fecha_fin', models.DateField()),
+                ('version_libro', models.PositiveBigIntegerField()),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'PENDIENTE'), ('PROCESANDO', 'PROCESANDO'), ('LISTO', 'LISTO'), ('ERROR', 'ERROR')], default='PENDIENTE', max_length=10)),
+                ('archivo', models.CharField(blank=True, default='', max_length=255)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exportaciones_pdf', to='empresa.empresa')),
+            ],
+            options={
+                'db_table': 'exportacion_pdf',
+                'indexes': [models.Index(fields=['empresa', 'reporte', 'fecha_inicio', 'fecha_fin', 'version_libro'], name='exportacion_pdf_reuso')],
+            },
+        ),
+    ]
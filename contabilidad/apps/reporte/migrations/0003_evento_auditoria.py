@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresa', '0002_initial'),
+        ('reporte', '0002_exportacion_pdf'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoAuditoria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sesion', models.CharField(blank=True, default='', max_length=16)),
+                ('fecha', models.DateTimeField()),
+                ('nivel', models.CharField(choices=[('DEBUG', 'DEBUG'), ('INFO', 'INFO'), ('WARNING', 'WARNING'), ('ERROR', 'ERROR'), ('CRITICAL', 'CRITICAL')], default='INFO', max_length=10)),
+                ('accion', models.CharField(max_length=150)),
+                ('detalle', models.TextField(blank=True, default='')),
+                ('empresa', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='eventos_auditoria', to='empresa.empresa')),
+                ('usuario', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='eventos_auditoria', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'evento_auditoria',
+                'indexes': [models.Index(fields=['empresa', 'fecha', 'id'], name='evento_empresa_fecha'), models.Index(fields=['empresa', 'usuario', 'fecha'], name='evento_empresa_usuario'), models.Index(fields=['empresa', 'nivel', 'fecha'], name='evento_empresa_nivel')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 20:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporte', '0003_evento_auditoria'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='versionlibro',
+            name='version_plan',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
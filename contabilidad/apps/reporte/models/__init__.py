@@ -0,0 +1,3 @@
+from .version_libro import VersionLibro
+from .exportacion_pdf import ExportacionPdf
+from .evento_auditoria import EventoAuditoria
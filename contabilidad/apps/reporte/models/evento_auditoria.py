@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.db import models
+from ...empresa.models import Empresa
+
+
+class EventoAuditoria(models.Model):
+    """
+    Copia en base de datos de los eventos del log de auditoría (utils.log).
+    El hilo escritor del log los inserta por lotes con bulk_create; los
+    índices cubren las consultas de auditoría, siempre dentro de una empresa.
+    """
+    class Meta:
+        db_table = "evento_auditoria"
+        indexes = [
+            models.Index(fields=['empresa', 'fecha', 'id'], name='evento_empresa_fecha'),
+            models.Index(fields=['empresa', 'usuario', 'fecha'], name='evento_empresa_usuario'),
+            models.Index(fields=['empresa', 'nivel', 'fecha'], name='evento_empresa_nivel'),
+        ]
+
+    NIVEL_CHOICES = [
+        ('DEBUG', 'DEBUG'),
+        ('INFO', 'INFO'),
+        ('WARNING', 'WARNING'),
+        ('ERROR', 'ERROR'),
+        ('CRITICAL', 'CRITICAL'),
+    ]
+
+    # Sin restricción de FK: el log se escribe en segundo plano y no debe
+    # fallar si la empresa o el usuario se borran mientras tanto
+    empresa = models.ForeignKey(Empresa, on_delete=models.CASCADE, db_constraint=False,
+                                related_name='eventos_auditoria')
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True,
+                                db_constraint=False, related_name='eventos_auditoria')
+    # Hash corto del id de sesión (utils.log.clave_sesion), no el token
+    sesion = models.CharField(max_length=16, blank=True, default='')
+    fecha = models.DateTimeField()
+    nivel = models.CharField(max_length=10, choices=NIVEL_CHOICES, default='INFO')
+    accion = models.CharField(max_length=150)
+    detalle = models.TextField(blank=True, default='')
+
+    def __str__(self):
+        return f"{self.fecha:%Y-%m-%d %H:%M} {self.nivel} {self.accion}"
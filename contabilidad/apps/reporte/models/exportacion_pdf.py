@@ -0,0 +1,49 @@
+import uuid
+from django.db import models
+from ...empresa.models import Empresa
+
+
+class ExportacionPdf(models.Model):
+    """
+    Trabajo de exportación a PDF de un reporte. Se procesa en el pool de
+    procesos de reporte.services.exportacion; el archivo generado se reutiliza
+    mientras la versión del libro de la empresa no cambie.
+    """
+    class Meta:
+        db_table = "exportacion_pdf"
+        indexes = [
+            models.Index(
+                fields=['empresa', 'reporte', 'fecha_inicio', 'fecha_fin', 'version_libro'],
+                name='exportacion_pdf_reuso',
+            ),
+        ]
+
+    REPORTE_CHOICES = [
+        ('balance_general', 'Balance general'),
+        ('estado_resultados', 'Estado de resultados'),
+    ]
+    ESTADO_CHOICES = [
+        ('PENDIENTE', 'PENDIENTE'),
+        ('PROCESANDO', 'PROCESANDO'),
+        ('LISTO', 'LISTO'),
+        ('ERROR', 'ERROR'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    empresa = models.ForeignKey(Empresa, on_delete=models.CASCADE, related_name='exportaciones_pdf')
+    reporte = models.CharField(max_length=30, choices=REPORTE_CHOICES)
+    fecha_inicio = models.DateField()
+    fecha_fin = models.DateField()
+    version_libro = models.PositiveBigIntegerField()
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default='PENDIENTE')
+    archivo = models.CharField(max_length=255, blank=True, default='')
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def nombre_archivo(self):
+        return f"{self.reporte}_{self.fecha_fin:%Y-%m-%d}.pdf"
+
+    def __str__(self):
+        return f"{self.reporte} {self.fecha_inicio} - {self.fecha_fin} ({self.estado})"
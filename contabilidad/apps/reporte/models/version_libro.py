@@ -0,0 +1,48 @@
+from django.db import models, transaction
+from django.db.models import F
+from ...empresa.models import Empresa
+
+
+class VersionLibro(models.Model):
+    """
+    Versión del libro contable de una empresa. Se incrementa cada vez que
+    cambia un asiento, movimiento, cuenta o clase de cuenta de la empresa;
+    los reportes cacheados llevan la versión en su clave, así un cambio
+    invalida exactamente los resultados de esa empresa.
+
+    `version_plan` cambia solo con las cuentas y clases de cuenta: la usan
+    los resultados que no dependen de los asientos (el árbol de cuentas).
+    """
+    class Meta:
+        db_table = "version_libro"
+
+    empresa = models.OneToOneField(Empresa, on_delete=models.CASCADE, primary_key=True, related_name='version_libro')
+    version = models.PositiveBigIntegerField(default=0)
+    version_plan = models.PositiveBigIntegerField(default=0)
+
+    @classmethod
+    def actual(cls, empresa_id, campo='version'):
+        """Versión vigente del libro (o del plan) de la empresa (0 si nunca cambió)."""
+        return cls.objects.filter(empresa_id=empresa_id).values_list(campo, flat=True).first() or 0
+
+    @classmethod
+    def incrementar(cls, empresa_id, plan=False):
+        """
+        Incrementa la versión dentro de la transacción en curso; con `plan`
+        (cambió una cuenta o clase de cuenta) también la versión del plan.
+        """
+        cambios = {"version": F('version') + 1}
+        if plan:
+            cambios["version_plan"] = F('version_plan') + 1
+        filtro = cls.objects.filter(empresa_id=empresa_id)
+        if filtro.update(**cambios):
+            return
+        with transaction.atomic():
+            _, creado = cls.objects.get_or_create(
+                empresa_id=empresa_id, defaults={"version": 1, "version_plan": int(plan)},
+            )
+            if not creado:
+                filtro.update(**cambios)
+
+    def __str__(self):
+        return f"{self.empresa_id}: v{self.version}"
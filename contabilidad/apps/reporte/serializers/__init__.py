@@ -2,4 +2,6 @@ from .libro_mayor import LibroMayorSerializer
 from .libro_diario import LibroDiarioSerializer
 
 from .balance_general import BalanceCuentaSerializer
-from .estado_resultados import EstadoResultadosCuentaSerializer, EstadoResultadosSerializer
\ No newline at end of file
+from .estado_resultados import EstadoResultadosCuentaSerializer, EstadoResultadosSerializer
+from .exportacion_pdf import ExportacionPdfSerializer
+from .evento_auditoria import EventoAuditoriaSerializer
@@ -0,0 +1,9 @@
+from rest_framework import serializers
+from ..models import EventoAuditoria
+
+
+class EventoAuditoriaSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EventoAuditoria
+        fields = ['id', 'fecha', 'nivel', 'accion', 'detalle', 'usuario', 'sesion']
+        read_only_fields = fields
@@ -0,0 +1,10 @@
+from rest_framework import serializers
+from ..models import ExportacionPdf
+
+
+class ExportacionPdfSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ExportacionPdf
+        fields = ['id', 'reporte', 'fecha_inicio', 'fecha_fin', 'version_libro',
+                  'estado', 'error', 'created_at', 'updated_at']
+        read_only_fields = fields
@@ -18,7 +18,10 @@ class MovimientoLibroMayorSerializer(serializers.ModelSerializer):
 
 class LibroMayorSerializer(serializers.ModelSerializer):
     movimientos = MovimientoLibroMayorSerializer(many=True)
+    total_debe = serializers.DecimalField(max_digits=20, decimal_places=3, read_only=True)
+    total_haber = serializers.DecimalField(max_digits=20, decimal_places=3, read_only=True)
+    saldo = serializers.DecimalField(max_digits=20, decimal_places=3, read_only=True)
 
     class Meta:
         model = Cuenta
-        fields = ['id','codigo','nombre','estado','movimientos']
\ No newline at end of file
+        fields = ['id','codigo','nombre','estado','total_debe','total_haber','saldo','movimientos']
\ No newline at end of file
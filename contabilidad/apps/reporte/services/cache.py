@@ -0,0 +1,63 @@
+import hashlib
+import json
+from django.core.cache import cache
+from ..models import VersionLibro
+
+# Reportes que pasan por la caché (también son las claves de las estadísticas)
+REPORTES = ("balance_general", "estado_resultados", "comparativo", "analitica_pivote", "libro_diario_totales", "arbol_cuenta")
+
+
+def clave_reporte(empresa_id, reporte, version, parametros):
+    """Clave de caché: empresa + reporte + versión del libro + hash de los parámetros."""
+    resumen = hashlib.md5(
+        json.dumps(parametros, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return f"reporte:{empresa_id}:{reporte}:v{version}:{resumen}"
+
+
+def _contar(reporte, resultado):
+    clave = f"reporte:stats:{reporte}:{resultado}"
+    # add() no pisa el contador si ya existe; incr() es atómico en backends compartidos
+    cache.add(clave, 0, timeout=None)
+    try:
+        cache.incr(clave)
+    except ValueError:
+        # El contador fue desalojado entre add() e incr()
+        cache.set(clave, 1, timeout=None)
+
+
+def obtener_reporte(empresa_id, reporte, parametros, calcular, campo_version='version'):
+    """
+    Devuelve el resultado cacheado del reporte o lo calcula con `calcular()`.
+
+    No se usa TTL: la clave incluye la versión del libro de la empresa, así
+    que cualquier cambio contable hace que la siguiente lectura calcule de
+    nuevo y las entradas viejas simplemente dejan de usarse. Los resultados
+    que solo dependen del plan de cuentas pasan campo_version='version_plan'.
+    """
+    version = VersionLibro.actual(empresa_id, campo_version)
+    clave = clave_reporte(empresa_id, reporte, version, parametros)
+    resultado = cache.get(clave)
+    if resultado is not None:
+        _contar(reporte, "hits")
+        return resultado
+
+    _contar(reporte, "misses")
+    resultado = calcular()
+    cache.set(clave, resultado, timeout=None)
+    return resultado
+
+
+def estadisticas():
+    """Aciertos y fallos de la caché por reporte."""
+    datos = {}
+    for reporte in REPORTES:
+        hits = cache.get(f"reporte:stats:{reporte}:hits", 0)
+        misses = cache.get(f"reporte:stats:{reporte}:misses", 0)
+        total = hits + misses
+        datos[reporte] = {
+            "hits": hits,
+            "misses": misses,
+            "ratio": round(hits / total, 4) if total else None,
+        }
+    return datos
@@ -0,0 +1,139 @@
+from datetime import date, timedelta
+from django.db.models import Q, Sum
+from ...gestion_asiento.models import SaldoDiario
+from .saldos import plan_de_cuentas, redondear
+
+# Meses que abarca cada columna según la granularidad pedida
+GRANULARIDADES = {"mes": 1, "trimestre": 3, "anio": 12}
+MAX_COLUMNAS = 60
+
+
+def _inicio_periodo(fecha, meses):
+    mes = (fecha.month - 1) // meses * meses + 1
+    return date(fecha.year, mes, 1)
+
+
+def _sumar_meses(fecha, meses):
+    total = fecha.year * 12 + fecha.month - 1 + meses
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def _etiqueta(inicio, granularidad):
+    if granularidad == "mes":
+        return f"{inicio.year}-{inicio.month:02d}"
+    if granularidad == "trimestre":
+        return f"{inicio.year}-T{(inicio.month - 1) // 3 + 1}"
+    return str(inicio.year)
+
+
+def periodos(fecha_inicio, fecha_fin, granularidad):
+    """
+    Columnas del comparativo entre fecha_inicio y fecha_fin (inclusive),
+    alineadas a mes/trimestre/año y recortadas al rango. Cada columna es
+    {"etiqueta", "desde", "hasta"} con `hasta` exclusivo.
+    """
+    meses = GRANULARIDADES[granularidad]
+    limite = fecha_fin + timedelta(days=1)
+    columnas = []
+    actual = _inicio_periodo(fecha_inicio, meses)
+    while actual < limite:
+        siguiente = _sumar_meses(actual, meses)
+        columnas.append({
+            "etiqueta": _etiqueta(actual, granularidad),
+            "desde": max(actual, fecha_inicio),
+            "hasta": min(siguiente, limite),
+        })
+        actual = siguiente
+    return columnas
+
+
+def totales_por_periodo(empresa, columnas, acumulado=False):
+    """
+    Debe/haber de cada cuenta en cada columna con una sola consulta sobre
+    SaldoDiario: un SUM(...) FILTER (WHERE fecha en la columna) por columna,
+    agrupado por cuenta.
+
+    Con acumulado=True cada columna es el acumulado histórico hasta su fin
+    (para el balance); se agrega una columna más con todo lo anterior al
+    rango y se acumula en memoria.
+
+    Devuelve {cuenta_id: [(debe, haber), ...]} con una tupla por columna.
+    """
+    agregados = {}
+    for i, columna in enumerate(columnas):
+        filtro = Q(fecha__gte=columna["desde"], fecha__lt=columna["hasta"])
+        agregados[f"debe_{i}"] = Sum("debe", filter=filtro)
+        agregados[f"haber_{i}"] = Sum("haber", filter=filtro)
+
+    inicio = columnas[0]["desde"]
+    filas = SaldoDiario.objects.filter(empresa_id=empresa, fecha__lt=columnas[-1]["hasta"])
+    if acumulado:
+        anterior = Q(fecha__lt=inicio)
+        agregados["debe_previo"] = Sum("debe", filter=anterior)
+        agregados["haber_previo"] = Sum("haber", filter=anterior)
+    else:
+        filas = filas.filter(fecha__gte=inicio)
+
+    totales = {}
+    for fila in filas.values("cuenta_id").annotate(**agregados).order_by():
+        debe = fila.get("debe_previo") or 0
+        haber = fila.get("haber_previo") or 0
+        valores = []
+        for i in range(len(columnas)):
+            if acumulado:
+                debe += fila[f"debe_{i}"] or 0
+                haber += fila[f"haber_{i}"] or 0
+                valores.append((redondear(debe), redondear(haber)))
+            else:
+                valores.append((redondear(fila[f"debe_{i}"]), redondear(fila[f"haber_{i}"])))
+        totales[fila["cuenta_id"]] = valores
+    return totales
+
+
+def arbol_comparativo(empresa, codigos_raiz, totales, n, incluir_cuentas=True):
+    """
+    Igual que arbol_saldos pero con `n` columnas: recorre el plan de cuentas
+    una sola vez y acumula cada columna de abajo hacia arriba. Cada nodo
+    tiene codigo, nombre, valores (una entrada por columna con total_debe,
+    total_haber y saldo) e hijos.
+    """
+    hijos_por_clase, cuentas_por_clase = plan_de_cuentas(empresa)
+    ceros = [(0, 0)] * n
+
+    def nodo(objeto, debe, haber, hijos):
+        return {
+            "codigo": objeto.codigo,
+            "nombre": objeto.nombre,
+            "valores": [
+                {"total_debe": d or 0, "total_haber": h or 0, "saldo": (d - h) or 0}
+                for d, h in zip(debe, haber)
+            ],
+            "hijos": hijos,
+        }
+
+    def calcular(clase):
+        debe = [0] * n
+        haber = [0] * n
+        cuentas_data = []
+
+        for cuenta in cuentas_por_clase[clase.id]:
+            valores = totales.get(cuenta.id, ceros)
+            for i, (d, h) in enumerate(valores):
+                debe[i] += d
+                haber[i] += h
+            if incluir_cuentas:
+                cuentas_data.append(nodo(cuenta, [d for d, _ in valores], [h for _, h in valores], []))
+
+        hijos_data = []
+        for hijo in hijos_por_clase[clase.id]:
+            hijo_data = calcular(hijo)
+            hijos_data.append(hijo_data)
+            for i, valor in enumerate(hijo_data["valores"]):
+                debe[i] += valor["total_debe"]
+                haber[i] += valor["total_haber"]
+
+        # Primero las cuentas directas como hojas, luego las subclases
+        return nodo(clase, debe, haber, cuentas_data + hijos_data)
+
+    raices = [clase for clase in hijos_por_clase[None] if clase.codigo in codigos_raiz]
+    return [calcular(clase) for clase in raices]
@@ -0,0 +1,166 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from ..models import ExportacionPdf, VersionLibro
+
+# Plantilla y función que arma el contexto de cada reporte exportable
+REPORTES_PDF = {
+    "balance_general": (
+        "reporte/balance_general_pdf.html",
+        "contabilidad.apps.reporte.views.balance_general.contexto_pdf",
+    ),
+    "estado_resultados": (
+        "reporte/estado_resultados_pdf.html",
+        "contabilidad.apps.reporte.views.estado_resultados.contexto_pdf",
+    ),
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _iniciar_proceso(settings_module):
+    """Inicializa Django en cada proceso del pool (se crean con spawn)."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+    django.setup()
+
+
+def obtener_pool():
+    """
+    Pool de procesos compartido por el proceso web. xhtml2pdf es CPU puro,
+    en procesos aparte no bloquea a los workers de gunicorn ni al GIL.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PDF_EXPORT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_iniciar_proceso,
+                initargs=(os.environ.get("DJANGO_SETTINGS_MODULE", "contabilidad.settings"),),
+            )
+        return _pool
+
+
+def ruta_archivo(exportacion):
+    return os.path.join(settings.PDF_EXPORT_DIR, exportacion.archivo)
+
+
+def _actualizar(exportacion_id, **campos):
+    ExportacionPdf.objects.filter(pk=exportacion_id).update(updated_at=timezone.now(), **campos)
+
+
+def generar_pdf(exportacion_id):
+    """
+    Tarea del pool: arma el contexto del reporte, renderiza el PDF y lo deja
+    en PDF_EXPORT_DIR/<empresa>/<id>.pdf. El estado queda en la base de datos.
+    """
+    from django.db import connection
+    from .pdf import render_to_pdf
+
+    try:
+        exportacion = ExportacionPdf.objects.get(pk=exportacion_id)
+        _actualizar(exportacion_id, estado="PROCESANDO")
+
+        plantilla, contexto = REPORTES_PDF[exportacion.reporte]
+        context = import_string(contexto)(
+            exportacion.empresa_id,
+            exportacion.fecha_inicio.strftime("%Y-%m-%d"),
+            exportacion.fecha_fin.strftime("%Y-%m-%d"),
+        )
+        pdf = render_to_pdf(plantilla, context)
+
+        exportacion.archivo = os.path.join(str(exportacion.empresa_id), f"{exportacion.id}.pdf")
+        ruta = ruta_archivo(exportacion)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        # Se escribe aparte y se renombra para no servir nunca un archivo a medias
+        with open(ruta + ".tmp", "wb") as f:
+            f.write(pdf)
+        os.replace(ruta + ".tmp", ruta)
+        _actualizar(exportacion_id, estado="LISTO", archivo=exportacion.archivo)
+
+        descartar_anteriores(exportacion)
+    except Exception as e:
+        _actualizar(exportacion_id, estado="ERROR", error=str(e))
+    finally:
+        connection.close()
+
+
+def descartar_anteriores(exportacion):
+    """Borra los PDF del mismo reporte y rango generados con versiones viejas del libro."""
+    anteriores = ExportacionPdf.objects.filter(
+        empresa_id=exportacion.empresa_id,
+        reporte=exportacion.reporte,
+        fecha_inicio=exportacion.fecha_inicio,
+        fecha_fin=exportacion.fecha_fin,
+        version_libro__lt=exportacion.version_libro,
+    )
+    for anterior in anteriores:
+        if anterior.archivo:
+            try:
+                os.remove(ruta_archivo(anterior))
+            except FileNotFoundError:
+                pass
+    anteriores.delete()
+
+
+def encolar(exportacion_id):
+    global _pool
+    try:
+        obtener_pool().submit(generar_pdf, exportacion_id)
+    except BrokenProcessPool:
+        # Un proceso del pool murió: se descarta el pool y se reintenta una vez
+        with _pool_lock:
+            _pool = None
+        try:
+            obtener_pool().submit(generar_pdf, exportacion_id)
+        except Exception as e:
+            _actualizar(exportacion_id, estado="ERROR", error=str(e))
+    except Exception as e:
+        _actualizar(exportacion_id, estado="ERROR", error=str(e))
+
+
+def solicitar_exportacion(empresa_id, reporte, fecha_inicio, fecha_fin):
+    """
+    Devuelve (exportacion, creada). Si ya hay una exportación del mismo
+    reporte y rango con la versión actual del libro se reutiliza; si no,
+    se crea y se encola al confirmar la transacción.
+    """
+    version = VersionLibro.actual(empresa_id)
+    existente = (
+        ExportacionPdf.objects.filter(
+            empresa_id=empresa_id,
+            reporte=reporte,
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            version_libro=version,
+        )
+        .exclude(estado="ERROR")
+        .order_by("-created_at")
+        .first()
+    )
+    if existente:
+        if existente.estado == "LISTO" and os.path.exists(ruta_archivo(existente)):
+            return existente, False
+        # Un trabajo en curso se reutiliza salvo que haya quedado abandonado
+        limite = timezone.now() - timedelta(seconds=settings.PDF_EXPORT_TIMEOUT)
+        if existente.estado != "LISTO" and existente.updated_at >= limite:
+            return existente, False
+
+    exportacion = ExportacionPdf.objects.create(
+        empresa_id=empresa_id,
+        reporte=reporte,
+        fecha_inicio=fecha_inicio,
+        fecha_fin=fecha_fin,
+        version_libro=version,
+    )
+    transaction.on_commit(lambda: encolar(exportacion.id))
+    return exportacion, True
@@ -0,0 +1,167 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from django.db.models import Sum
+from ...gestion_cuenta.models import ClaseCuenta, Cuenta
+from ...gestion_asiento.models import SaldoDiario, CierrePeriodo
+
+# Los montos se guardan con 3 decimales (DecimalField decimal_places=3)
+CENTESIMAS = Decimal("0.001")
+
+
+def redondear(valor):
+    """Quita el ruido de punto flotante que devuelve SUM en SQLite.
+
+    Un total en cero se devuelve como 0, igual que el `or 0` de los aggregate.
+    """
+    if valor is None:
+        return 0
+    return Decimal(valor).quantize(CENTESIMAS) or 0
+
+
+def sumar_saldos_diarios(empresa, desde=None, hasta=None):
+    """Suma SaldoDiario por cuenta con desde <= fecha < hasta (límites opcionales)."""
+    filas = SaldoDiario.objects.filter(empresa_id=empresa)
+    if desde is not None:
+        filas = filas.filter(fecha__gte=desde)
+    if hasta is not None:
+        filas = filas.filter(fecha__lt=hasta)
+    filas = (
+        filas.values("cuenta_id")
+        .annotate(total_debe=Sum("debe"), total_haber=Sum("haber"))
+        .order_by()
+    )
+    return {
+        fila["cuenta_id"]: [fila["total_debe"] or 0, fila["total_haber"] or 0]
+        for fila in filas
+    }
+
+
+def acumulado_antes(empresa, fecha, cierre=None):
+    """Acumulado por cuenta de todo lo registrado antes de `fecha`.
+
+    Parte del último cierre anterior a `fecha` y le suma los saldos diarios
+    posteriores al cierre, así no se recorre todo el historial.
+    """
+    if cierre is None:
+        cierre = CierrePeriodo.ultimo(empresa, antes_de=fecha)
+
+    totales = defaultdict(lambda: [0, 0])
+    desde = None
+    if cierre:
+        for saldo in cierre.saldos.all():
+            totales[saldo.cuenta_id] = [saldo.debe, saldo.haber]
+        desde = cierre.fecha_fin + timedelta(days=1)
+
+    for cuenta_id, (debe, haber) in sumar_saldos_diarios(empresa, desde, fecha).items():
+        totales[cuenta_id][0] += debe
+        totales[cuenta_id][1] += haber
+    return totales
+
+
+def totales_por_cuenta(empresa, fecha_inicio_dt, fecha_fin_dt):
+    """Suma debe/haber de la empresa por cuenta en el rango [fecha_inicio_dt, fecha_fin_dt).
+
+    Lee SaldoDiario, por lo que el costo depende de la cantidad de días y no
+    de la cantidad de movimientos. Si hay un cierre de periodo dentro del
+    rango se usa el cierre más los días posteriores (acumulado al fin menos
+    acumulado al inicio). Los límites se toman por día.
+
+    Devuelve un dict {cuenta_id: (total_debe, total_haber)}.
+    """
+    inicio = fecha_inicio_dt.date()
+    fin = fecha_fin_dt.date()
+
+    cierre = CierrePeriodo.ultimo(empresa, antes_de=fin)
+    if cierre is None or cierre.fecha_fin < inicio:
+        # Ningún cierre dentro del rango: los saldos diarios del rango son pocos
+        totales = sumar_saldos_diarios(empresa, inicio, fin)
+    else:
+        totales = acumulado_antes(empresa, fin, cierre)
+        for cuenta_id, (debe, haber) in acumulado_antes(empresa, inicio).items():
+            totales[cuenta_id][0] -= debe
+            totales[cuenta_id][1] -= haber
+
+    return {
+        cuenta_id: (redondear(debe), redondear(haber))
+        for cuenta_id, (debe, haber) in totales.items()
+    }
+
+
+def plan_de_cuentas(empresa):
+    """Clases y cuentas de la empresa agrupadas por padre (dos consultas).
+
+    Devuelve (hijos_por_clase, cuentas_por_clase); las clases raíz quedan
+    en hijos_por_clase[None].
+    """
+    clases = list(ClaseCuenta.objects.filter(empresa_id=empresa))
+    cuentas = list(Cuenta.objects.filter(empresa_id=empresa, clase_cuenta__isnull=False))
+
+    hijos_por_clase = defaultdict(list)
+    for clase in clases:
+        hijos_por_clase[clase.padre_id].append(clase)
+
+    cuentas_por_clase = defaultdict(list)
+    for cuenta in cuentas:
+        cuentas_por_clase[cuenta.clase_cuenta_id].append(cuenta)
+
+    return hijos_por_clase, cuentas_por_clase
+
+
+def arbol_saldos(empresa, codigos_raiz, totales, incluir_cuentas=True):
+    """Arma el árbol de ClaseCuenta con sus saldos a partir de `totales`.
+
+    Trae todas las clases y cuentas de la empresa (dos consultas) y acumula
+    los totales de abajo hacia arriba en memoria, sin importar la profundidad
+    del plan de cuentas. Cada nodo conserva el formato que usan los reportes:
+    codigo, nombre, total_debe, total_haber, saldo, hijos e ids.
+    """
+    hijos_por_clase, cuentas_por_clase = plan_de_cuentas(empresa)
+
+    def calcular(clase):
+        ids_cuenta = []
+        cuentas_data = []
+        # Sin movimientos el total queda en 0 (igual que el `or 0` del aggregate)
+        total_debe = 0
+        total_haber = 0
+
+        for cuenta in cuentas_por_clase[clase.id]:
+            ids_cuenta.append(cuenta.id)
+            total_debe_c, total_haber_c = totales.get(cuenta.id, (0, 0))
+            total_debe += total_debe_c
+            total_haber += total_haber_c
+            if incluir_cuentas:
+                cuentas_data.append({
+                    "codigo": cuenta.codigo,
+                    "nombre": cuenta.nombre,
+                    "total_debe": total_debe_c,
+                    "total_haber": total_haber_c,
+                    "saldo": total_debe_c - total_haber_c,
+                    "hijos": [],
+                    "ids": [cuenta.id],
+                })
+
+        hijos_data = []
+        for hijo in hijos_por_clase[clase.id]:
+            hijo_data = calcular(hijo)
+            hijos_data.append(hijo_data)
+            ids_cuenta.extend(hijo_data["ids"])
+            total_debe += hijo_data["total_debe"]
+            total_haber += hijo_data["total_haber"]
+
+        total_debe = total_debe or 0
+        total_haber = total_haber or 0
+
+        return {
+            "codigo": clase.codigo,
+            "nombre": clase.nombre,
+            "total_debe": total_debe,
+            "total_haber": total_haber,
+            "saldo": total_debe - total_haber,
+            # Primero las cuentas directas como hojas, luego las subclases
+            "hijos": cuentas_data + hijos_data,
+            "ids": ids_cuenta,
+        }
+
+    raices = [clase for clase in hijos_por_clase[None] if clase.codigo in codigos_raiz]
+    return [calcular(clase) for clase in raices]
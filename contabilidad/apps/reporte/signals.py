@@ -0,0 +1,60 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from ..empresa.models import Empresa
+from ..gestion_asiento.models import AsientoContable, Movimiento
+from ..gestion_cuenta.models import ClaseCuenta, Cuenta
+from .models import VersionLibro
+
+# Modelos cuyo borrado ya incrementa la versión (o elimina la empresa completa)
+MODELOS_LIBRO = (Empresa, AsientoContable, Movimiento, ClaseCuenta, Cuenta)
+
+
+def es_cascada(sender, origin):
+    """
+    True si el borrado viene en cascada desde otro modelo del libro: ese
+    borrado ya incrementa la versión, así se evita una consulta por fila.
+    """
+    if origin is None:
+        return False
+    modelo = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return modelo is not sender and issubclass(modelo, MODELOS_LIBRO)
+
+
+def empresa_de_movimiento(movimiento):
+    if Movimiento.asiento_contable.is_cached(movimiento):
+        return movimiento.asiento_contable.empresa_id
+    return (
+        AsientoContable.objects.filter(pk=movimiento.asiento_contable_id)
+        .values_list('empresa_id', flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=AsientoContable)
+@receiver(post_save, sender=ClaseCuenta)
+@receiver(post_save, sender=Cuenta)
+def invalidar_por_guardado(sender, instance, **kwargs):
+    # Las cuentas y clases también cambian la versión del plan (árbol de cuentas)
+    VersionLibro.incrementar(instance.empresa_id, plan=sender is not AsientoContable)
+
+
+@receiver(post_delete, sender=AsientoContable)
+@receiver(post_delete, sender=ClaseCuenta)
+@receiver(post_delete, sender=Cuenta)
+def invalidar_por_borrado(sender, instance, origin=None, **kwargs):
+    if not es_cascada(sender, origin):
+        VersionLibro.incrementar(instance.empresa_id, plan=sender is not AsientoContable)
+
+
+@receiver(post_save, sender=Movimiento)
+def invalidar_por_movimiento_guardado(sender, instance, **kwargs):
+    VersionLibro.incrementar(empresa_de_movimiento(instance))
+
+
+@receiver(post_delete, sender=Movimiento)
+def invalidar_por_movimiento_borrado(sender, instance, origin=None, **kwargs):
+    if not es_cascada(sender, origin):
+        empresa_id = empresa_de_movimiento(instance)
+        if empresa_id:
+            VersionLibro.incrementar(empresa_id)
@@ -1,3 +1,317 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import random
+import tempfile
+from collections import defaultdict
+from datetime import date, datetime, time
+from decimal import Decimal
 
-# Create your tests here.
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..empresa.models import Empresa
+from ..gestion_asiento.models import AsientoContable, Movimiento, SaldoDiario
+from ..gestion_cuenta.models import ClaseCuenta, Cuenta
+from ..usuario.models import Persona, User
+from ..utils import log, rotacion_log
+from .models import VersionLibro
+from .services.comparativo import periodos, totales_por_periodo, arbol_comparativo
+from .services.pivote import LibroNumpy, a_decimal, limites_de
+
+
+class PivoteNumpyTests(TestCase):
+    """El motor NumPy debe dar exactamente lo mismo que el camino con Decimal."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.empresa = Empresa.objects.create(nombre="Empresa Pivote", nit=1)
+        cls.cuentas = list(Cuenta.objects.filter(empresa=cls.empresa, clase_cuenta__isnull=False))
+        if not cls.cuentas:
+            # Sin plantillas cargadas se arma un plan mínimo
+            activo = ClaseCuenta.objects.create(empresa=cls.empresa, codigo=1, nombre="ACTIVO")
+            caja = ClaseCuenta.objects.create(empresa=cls.empresa, codigo=11, nombre="CAJA", padre=activo)
+            ingresos = ClaseCuenta.objects.create(empresa=cls.empresa, codigo=4, nombre="INGRESOS")
+            cls.cuentas = [
+                Cuenta.objects.create(empresa=cls.empresa, codigo=1101, nombre="Caja", clase_cuenta=caja),
+                Cuenta.objects.create(empresa=cls.empresa, codigo=1102, nombre="Banco", clase_cuenta=caja),
+                Cuenta.objects.create(empresa=cls.empresa, codigo=4101, nombre="Ventas", clase_cuenta=ingresos),
+            ]
+
+        azar = random.Random(7)
+        for i in range(150):
+            asiento = AsientoContable.objects.create(empresa=cls.empresa, descripcion=f"Asiento {i}")
+            dia = date(2023, 1, 1).toordinal() + azar.randrange(3 * 365)
+            creado = timezone.make_aware(datetime.combine(date.fromordinal(dia), time(12)))
+            AsientoContable.objects.filter(pk=asiento.pk).update(created_at=creado)
+            for _ in range(azar.randint(1, 4)):
+                # Montos con 3 decimales, incluidos valores muy chicos y muy grandes
+                monto = Decimal(azar.choice([1, azar.randrange(10 ** 9), 9999999999])).scaleb(-3)
+                debe, haber = (monto, Decimal("0")) if azar.random() < 0.5 else (Decimal("0"), monto)
+                Movimiento.objects.create(
+                    asiento_contable=asiento, cuenta=azar.choice(cls.cuentas), debe=debe, haber=haber,
+                )
+        SaldoDiario.reconstruir(cls.empresa.id)
+
+    def setUp(self):
+        self.columnas = periodos(date(2023, 3, 15), date(2025, 8, 10), "trimestre")
+
+    def test_pivote_por_cuenta_es_exacto(self):
+        esperado = defaultdict(lambda: [Decimal("0"), Decimal("0")])
+        for mov in Movimiento.objects.filter(asiento_contable__empresa=self.empresa).select_related('asiento_contable'):
+            dia = timezone.localtime(mov.asiento_contable.created_at).date()
+            for i, columna in enumerate(self.columnas):
+                if columna["desde"] <= dia < columna["hasta"]:
+                    esperado[(mov.cuenta_id, i)][0] += mov.debe
+                    esperado[(mov.cuenta_id, i)][1] += mov.haber
+
+        libro = LibroNumpy(self.empresa.id)
+        debe, haber = libro.pivote(limites_de(self.columnas))
+        self.assertEqual(len(libro), Movimiento.objects.filter(asiento_contable__empresa=self.empresa).count())
+        for cuenta_id, fila in libro.indice_cuenta.items():
+            for i in range(len(self.columnas)):
+                self.assertEqual(a_decimal(debe[fila, i]), esperado[(cuenta_id, i)][0])
+                self.assertEqual(a_decimal(haber[fila, i]), esperado[(cuenta_id, i)][1])
+
+    def test_acumulado_de_clases_igual_al_arbol_decimal(self):
+        n = len(self.columnas)
+        totales = totales_por_periodo(self.empresa.id, self.columnas)
+        raices = list(ClaseCuenta.objects.filter(empresa=self.empresa, padre__isnull=True).values_list('codigo', flat=True))
+        arbol = arbol_comparativo(self.empresa.id, raices, totales, n, incluir_cuentas=False)
+
+        libro = LibroNumpy(self.empresa.id)
+        debe, haber = libro.pivote(limites_de(self.columnas))
+        fila_clase = {codigo: i for i, (tipo, codigo, _) in enumerate(libro.nodos) if tipo == "clase"}
+
+        def comparar(nodo):
+            fila = fila_clase[nodo["codigo"]]
+            for i, valor in enumerate(nodo["valores"]):
+                self.assertEqual(a_decimal(debe[fila, i]), valor["total_debe"])
+                self.assertEqual(a_decimal(haber[fila, i]), valor["total_haber"])
+            for hijo in nodo["hijos"]:
+                comparar(hijo)
+
+        self.assertTrue(arbol)
+        for nodo in arbol:
+            comparar(nodo)
+
+    def test_movimientos_fuera_del_rango_no_cuentan(self):
+        libro = LibroNumpy(self.empresa.id)
+        debe, haber = libro.pivote([date(2030, 1, 1), date(2031, 1, 1)])
+        self.assertFalse(debe.any())
+        self.assertFalse(haber.any())
+
+    def test_movimiento_con_cuenta_de_otra_empresa_se_ignora(self):
+        otra = Empresa.objects.create(nombre="Otra Empresa", nit=2)
+        ajena = Cuenta.objects.filter(empresa=otra).first() or Cuenta.objects.create(
+            empresa=otra, codigo=9901, nombre="Ajena",
+        )
+        asiento = AsientoContable.objects.create(empresa=self.empresa, descripcion="Cuenta ajena")
+        Movimiento.objects.create(asiento_contable=asiento, cuenta=ajena, debe=Decimal("1"), haber=Decimal("0"))
+
+        libro = LibroNumpy(self.empresa.id)
+        self.assertEqual(
+            len(libro),
+            Movimiento.objects.filter(asiento_contable__empresa=self.empresa, cuenta__empresa=self.empresa).count(),
+        )
+
+
+class VersionPlanTests(TestCase):
+    """La versión del plan cambia con cuentas y clases, no con los asientos."""
+
+    def test_asientos_no_cambian_la_version_del_plan(self):
+        empresa = Empresa.objects.create(nombre="Empresa Versiones", nit=3)
+        clase = ClaseCuenta.objects.create(empresa=empresa, codigo=7, nombre="PRUEBA")
+        plan = VersionLibro.actual(empresa.id, 'version_plan')
+        libro = VersionLibro.actual(empresa.id)
+
+        AsientoContable.objects.create(empresa=empresa, descripcion="Solo libro")
+        self.assertEqual(VersionLibro.actual(empresa.id, 'version_plan'), plan)
+        self.assertEqual(VersionLibro.actual(empresa.id), libro + 1)
+
+        Cuenta.objects.create(empresa=empresa, codigo=7101, nombre="Nueva", clase_cuenta=clase)
+        self.assertEqual(VersionLibro.actual(empresa.id, 'version_plan'), plan + 1)
+        self.assertEqual(VersionLibro.actual(empresa.id), libro + 2)
+
+
+def linea_log(**registro):
+    return (json.dumps(registro) + "\n").encode("utf-8")
+
+
+class CarpetaLogMixin:
+    """Cada prueba escribe sus segmentos en una carpeta temporal."""
+
+    def setUp(self):
+        super().setUp()
+        temporal = tempfile.TemporaryDirectory()
+        self.addCleanup(temporal.cleanup)
+        self.carpeta = temporal.name
+
+    def escribir(self, nombre, *lineas):
+        with open(os.path.join(self.carpeta, nombre), "ab") as f:
+            f.write(b"".join(lineas))
+        return b"".join(lineas)
+
+
+class RotacionLogTests(CarpetaLogMixin, SimpleTestCase):
+    """Cierre de segmentos, manifiesto y lectura por rangos de bytes."""
+
+    def test_cerrar_comprime_y_registra_en_el_manifiesto(self):
+        contenido = self.escribir(
+            "2025-03.001.jsonl",
+            linea_log(tipo="evento", fecha="2025-03-09T10:00:00Z"),
+            linea_log(tipo="evento", fecha="2025-03-02T08:30:00Z"),
+        )
+        segmento = rotacion_log.cerrar(self.carpeta, "2025-03.001.jsonl")
+
+        self.assertEqual(rotacion_log.listar(self.carpeta), ["2025-03.001.jsonl.gz"])
+        with gzip.open(os.path.join(self.carpeta, "2025-03.001.jsonl.gz"), "rb") as f:
+            self.assertEqual(f.read(), contenido)
+        self.assertEqual(segmento["archivo"], "2025-03.001.jsonl.gz")
+        self.assertEqual((segmento["registros"], segmento["bytes"]), (2, len(contenido)))
+        self.assertEqual((segmento["desde"][:10], segmento["hasta"][:10]), ("2025-03-02", "2025-03-09"))
+        self.assertEqual(rotacion_log.leer_manifiesto(self.carpeta)["segmentos"], [segmento])
+
+    def test_cerrar_no_pisa_un_segmento_cerrado(self):
+        primero = self.escribir("2025-03.001.jsonl", linea_log(tipo="evento", fecha="2025-03-01T00:00:00Z"))
+        rotacion_log.cerrar(self.carpeta, "2025-03.001.jsonl")
+        segundo = self.escribir("2025-03.001.jsonl", linea_log(tipo="evento", fecha="2025-03-05T00:00:00Z"))
+        segmento = rotacion_log.cerrar(self.carpeta, "2025-03.001.jsonl")
+
+        self.assertEqual(segmento["archivo"], "2025-03.002.jsonl.gz")
+        self.assertEqual(rotacion_log.listar(self.carpeta), ["2025-03.001.jsonl.gz", "2025-03.002.jsonl.gz"])
+        for nombre, contenido in (("2025-03.001.jsonl.gz", primero), ("2025-03.002.jsonl.gz", segundo)):
+            with gzip.open(os.path.join(self.carpeta, nombre), "rb") as f:
+                self.assertEqual(f.read(), contenido)
+        archivos = [s["archivo"] for s in rotacion_log.leer_manifiesto(self.carpeta)["segmentos"]]
+        self.assertEqual(archivos, ["2025-03.001.jsonl.gz", "2025-03.002.jsonl.gz"])
+
+    def test_rotar_cierra_meses_anteriores_y_segmentos_llenos(self):
+        self.escribir("2025-02.001.jsonl", linea_log(tipo="evento", fecha="2025-02-27T00:00:00Z"))
+        self.escribir("2025-03.001.jsonl", *[linea_log(tipo="evento", fecha="2025-03-01T00:00:00Z")] * 5)
+        abierto = self.escribir("2025-03.002.jsonl", linea_log(tipo="evento", fecha="2025-03-02T00:00:00Z"))
+
+        cerrados = rotacion_log.rotar(self.carpeta, "2025-03", tamano_maximo=100)
+
+        self.assertEqual(
+            sorted(s["archivo"] for s in cerrados), ["2025-02.001.jsonl.gz", "2025-03.001.jsonl.gz"]
+        )
+        self.assertEqual(
+            rotacion_log.listar(self.carpeta),
+            ["2025-02.001.jsonl.gz", "2025-03.001.jsonl.gz", "2025-03.002.jsonl"],
+        )
+        self.assertEqual(rotacion_log.segmento_activo(self.carpeta, "2025-03"), ("2025-03.002.jsonl", len(abierto)))
+
+    def test_seleccionar_por_fechas_usa_el_manifiesto(self):
+        febrero = self.escribir("2025-02.001.jsonl", linea_log(tipo="evento", fecha="2025-02-10T00:00:00Z"))
+        rotacion_log.cerrar(self.carpeta, "2025-02.001.jsonl")
+        marzo = self.escribir("2025-03.001.jsonl", linea_log(tipo="evento", fecha="2025-03-20T00:00:00Z"))
+
+        ruta_febrero = os.path.join(self.carpeta, "2025-02.001.jsonl.gz")
+        ruta_marzo = os.path.join(self.carpeta, "2025-03.001.jsonl")
+        self.assertEqual(
+            rotacion_log.seleccionar(self.carpeta),
+            [(ruta_febrero, len(febrero)), (ruta_marzo, len(marzo))],
+        )
+        self.assertEqual(rotacion_log.seleccionar(self.carpeta, desde=date(2025, 2, 11)), [(ruta_marzo, len(marzo))])
+        self.assertEqual(rotacion_log.seleccionar(self.carpeta, hasta=date(2025, 2, 28)), [(ruta_febrero, len(febrero))])
+
+    def test_leer_rango_cruza_segmentos_comprimidos_y_abiertos(self):
+        febrero = self.escribir("2025-02.001.jsonl", linea_log(tipo="evento", fecha="2025-02-10T00:00:00Z"))
+        rotacion_log.cerrar(self.carpeta, "2025-02.001.jsonl")
+        marzo = self.escribir("2025-03.001.jsonl", linea_log(tipo="evento", fecha="2025-03-20T00:00:00Z"))
+        contenido = febrero + marzo
+        segmentos = rotacion_log.seleccionar(self.carpeta)
+
+        for inicio, fin in ((0, len(contenido) - 1), (3, 10), (len(febrero) - 2, len(febrero) + 3),
+                            (len(febrero), len(contenido) - 1)):
+            with self.subTest(inicio=inicio, fin=fin):
+                leido = b"".join(rotacion_log.leer_rango(segmentos, inicio, fin))
+                self.assertEqual(leido, contenido[inicio:fin + 1])
+
+    def test_leer_rango_de_un_segmento_cerrado_despues_de_elegirlo(self):
+        contenido = self.escribir("2025-03.001.jsonl", linea_log(tipo="evento", fecha="2025-03-20T00:00:00Z"))
+        segmentos = rotacion_log.seleccionar(self.carpeta)
+        rotacion_log.cerrar(self.carpeta, "2025-03.001.jsonl")
+
+        self.assertEqual(b"".join(rotacion_log.leer_rango(segmentos, 0, len(contenido) - 1)), contenido)
+
+
+class DescargarLogTests(CarpetaLogMixin, TestCase):
+    """La descarga devuelve las sesiones en JSON y, a pedido, los segmentos JSONL."""
+
+    URL = "/logs/descargar/?empresa_id=e1&usuario_id=7"
+
+    @classmethod
+    def setUpTestData(cls):
+        persona = Persona.objects.create(nombre="Log", apellido="Prueba")
+        cls.usuario = User.objects.create_user("descarga_log", "clave", persona=persona)
+
+    def setUp(self):
+        super().setUp()
+        parche = mock.patch.object(log, "LOG_DIR", self.carpeta)
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario, token={})
+
+        self.legado = log.ruta_legado("e1", "7")
+        os.makedirs(log.carpeta_usuario("e1", "7"))
+        with open(self.legado, "w", encoding="utf-8") as f:
+            json.dump([{"idSesion": "antigua", "fechaInicio": "2025-01-05T09:00:00Z", "eventos": []}], f)
+
+        self.contenido = b"".join((
+            linea_log(**log.registro_sesion("nueva", "e1", "7", {}, "2025-03-01T10:00:00Z")),
+            linea_log(tipo="evento", idSesion="nueva", fecha="2025-03-01T10:05:00Z",
+                      nivel="INFO", accion="login", detalle=""),
+            linea_log(tipo="fin", idSesion="nueva", fechaFin="2025-03-01T11:00:00Z",
+                      resultadoSesion="cerrada correctamente"),
+        ))
+        with open(os.path.join(log.carpeta_usuario("e1", "7"), "2025-03.001.jsonl"), "wb") as f:
+            f.write(self.contenido)
+
+    def test_por_defecto_devuelve_las_sesiones_en_json(self):
+        response = self.client.get(self.URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('filename="7.json"', response["Content-Disposition"])
+        sesiones = {sesion["idSesion"]: sesion for sesion in json.loads(response.content)}
+        self.assertEqual(set(sesiones), {"antigua", "nueva"})
+        self.assertEqual([e["accion"] for e in sesiones["nueva"]["eventos"]], ["login"])
+        self.assertEqual(sesiones["nueva"]["duracionSesion"], "1:00:00")
+        # Leer no migra ni rota: el JSON heredado y el segmento abierto siguen igual
+        self.assertTrue(os.path.exists(self.legado))
+        self.assertEqual(rotacion_log.listar(log.carpeta_usuario("e1", "7")), ["2025-03.001.jsonl"])
+
+    def test_jsonl_completo_y_por_rangos(self):
+        url = self.URL + "&formato=jsonl"
+        total = len(self.contenido)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(b"".join(response.streaming_content), self.contenido)
+
+        response = self.client.get(url, HTTP_RANGE="bytes=5-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 5-19/{total}")
+        self.assertEqual(b"".join(response.streaming_content), self.contenido[5:20])
+
+        response = self.client.get(url, HTTP_RANGE="bytes=-10")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), self.contenido[-10:])
+
+        response = self.client.get(url, HTTP_RANGE=f"bytes={total}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{total}")
+
+    def test_jsonl_filtra_por_fechas(self):
+        response = self.client.get(self.URL + "&formato=jsonl&fecha_fin=2025-02-28")
+        self.assertEqual(response.status_code, 404)
+
+    def test_formato_desconocido(self):
+        response = self.client.get(self.URL + "&formato=xml")
+        self.assertEqual(response.status_code, 400)
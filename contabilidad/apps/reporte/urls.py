@@ -4,7 +4,12 @@ from .views import (LibroMayorViewSet,
                     LibroDiarioViewSet,
                     BalanceGeneralViewSet,
                     EstadoResultadosViewSet,
-                    DescargarLogEmpresaView)
+                    DescargarLogEmpresaView,
+                    EstadisticasCacheView,
+                    ExportacionPdfViewSet,
+                    ComparativoViewSet,
+                    AnaliticaViewSet,
+                    EventoAuditoriaViewSet)
 
 
 router = DefaultRouter()
@@ -12,9 +17,14 @@ router.register(r'libro_mayor', LibroMayorViewSet, basename='libro_mayor')
 router.register(r'libro_diario', LibroDiarioViewSet, basename='libro_diario')
 router.register(r'balance_general', BalanceGeneralViewSet, basename='balance_general')  
 router.register(r'estado_resultados', EstadoResultadosViewSet, basename='estado_resultados')
+router.register(r'comparativo', ComparativoViewSet, basename='comparativo')
+router.register(r'analitica', AnaliticaViewSet, basename='analitica')
+router.register(r'exportacion_pdf', ExportacionPdfViewSet, basename='exportacion_pdf')
+router.register(r'auditoria', EventoAuditoriaViewSet, basename='auditoria')
 
 urlpatterns = [
     path('logs/descargar/', DescargarLogEmpresaView.as_view(), name='descargar-log-empresa'),
+    path('cache/estadisticas/', EstadisticasCacheView.as_view(), name='estadisticas-cache'),
 
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -2,4 +2,9 @@ from .libro_mayor import LibroMayorViewSet
 from .libro_diario import LibroDiarioViewSet
 from .balance_general import BalanceGeneralViewSet
 from .log import DescargarLogEmpresaView
-from .estado_resultados import EstadoResultadosViewSet
\ No newline at end of file
+from .estado_resultados import EstadoResultadosViewSet
+from .cache import EstadisticasCacheView
+from .exportacion_pdf import ExportacionPdfViewSet
+from .comparativo import ComparativoViewSet
+from .analitica import AnaliticaViewSet
+from .evento_auditoria import EventoAuditoriaViewSet
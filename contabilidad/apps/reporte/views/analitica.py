@@ -0,0 +1,66 @@
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from datetime import datetime, date, timedelta
+
+from ..services.cache import obtener_reporte
+from ..services.comparativo import GRANULARIDADES, MAX_COLUMNAS, periodos
+from ..services.pivote import pivote_reporte
+
+
+class AnaliticaViewSet(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    @action(detail=False, methods=['get'])
+    def pivote(self, request):
+        """
+        Pivote periodo × clase/cuenta calculado con el motor NumPy.
+        Query params:
+            - periodo: mes (por defecto), trimestre o anio
+            - fecha_inicio / fecha_fin: YYYY-MM-DD (por defecto el año de fecha_fin)
+            - nivel: todos (por defecto) o clase
+            - estado: filtra los asientos por estado (p. ej. APROBADO)
+        """
+        granularidad = request.query_params.get("periodo", "mes")
+        if granularidad not in GRANULARIDADES:
+            return Response({"error": f"periodo debe ser uno de: {', '.join(GRANULARIDADES)}"}, status=400)
+        nivel = request.query_params.get("nivel", "todos")
+        if nivel not in ("todos", "clase"):
+            return Response({"error": "nivel debe ser todos o clase"}, status=400)
+        estado = request.query_params.get("estado") or None
+
+        fecha_fin = request.query_params.get("fecha_fin", datetime.now().strftime("%Y-%m-%d"))
+        try:
+            fecha_fin_d = datetime.strptime(fecha_fin, "%Y-%m-%d").date()
+            fecha_inicio = request.query_params.get("fecha_inicio", date(fecha_fin_d.year, 1, 1).isoformat())
+            fecha_inicio_d = datetime.strptime(fecha_inicio, "%Y-%m-%d").date()
+        except ValueError:
+            return Response({"error": "Formato de fecha inválido. Use YYYY-MM-DD"}, status=400)
+        if fecha_inicio_d > fecha_fin_d:
+            return Response({"error": "fecha_inicio no puede ser posterior a fecha_fin"}, status=400)
+
+        empresa = request.auth.get('empresa')
+        if not empresa:
+            return Response({"error": "Usuario sin empresa asignada"}, status=400)
+
+        columnas = periodos(fecha_inicio_d, fecha_fin_d, granularidad)
+        if len(columnas) > MAX_COLUMNAS:
+            return Response({"error": f"El rango genera más de {MAX_COLUMNAS} columnas"}, status=400)
+
+        parametros = {"periodo": granularidad, "desde": fecha_inicio_d, "hasta": fecha_fin_d,
+                      "nivel": nivel, "estado": estado}
+        filas = obtener_reporte(
+            empresa, "analitica_pivote", parametros,
+            lambda: pivote_reporte(empresa, columnas, solo_clases=nivel == "clase", estado=estado),
+        )
+
+        return Response({
+            "periodo": granularidad,
+            "columnas": [
+                {"etiqueta": c["etiqueta"], "desde": c["desde"], "hasta": c["hasta"] - timedelta(days=1)}
+                for c in columnas
+            ],
+            "filas": filas,
+        })
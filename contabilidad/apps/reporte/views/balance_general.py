@@ -3,11 +3,47 @@ from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db.models import Sum
-from ...gestion_cuenta.models import ClaseCuenta
-from ...gestion_asiento.models import Movimiento
 from datetime import datetime, timedelta
 from ..services.pdf import render_to_pdf, build_pdf_response
+from ..services.saldos import totales_por_cuenta, arbol_saldos
+from ..services.cache import obtener_reporte
+from ..services.exportacion import solicitar_exportacion
+from ..serializers import ExportacionPdfSerializer
+
+
+def balance_general(empresa, fecha_inicio_dt, fecha_fin_dt):
+    """Árbol de las clases 1, 2 y 3 con sus saldos, cacheado por versión del libro."""
+    def calcular():
+        # Un solo GROUP BY por cuenta y el árbol de clases se acumula en memoria
+        totales = totales_por_cuenta(empresa, fecha_inicio_dt, fecha_fin_dt)
+        return arbol_saldos(empresa, [1, 2, 3], totales)
+
+    parametros = {"desde": fecha_inicio_dt.date(), "hasta": fecha_fin_dt.date()}
+    return obtener_reporte(empresa, "balance_general", parametros, calcular)
+
+
+def contexto_pdf(empresa, fecha_inicio, fecha_fin):
+    """Contexto de la plantilla PDF; las fechas vienen como YYYY-MM-DD."""
+    fecha_inicio_dt = datetime.strptime(fecha_inicio, "%Y-%m-%d")
+    fecha_fin_dt = datetime.strptime(fecha_fin, "%Y-%m-%d") + timedelta(days=1)
+
+    data = balance_general(empresa, fecha_inicio_dt, fecha_fin_dt)
+    # Totales a nivel raíz para no doble contar
+    total_debe = sum((n.get("total_debe") or 0) for n in data)
+    total_haber = sum((n.get("total_haber") or 0) for n in data)
+    totales = {
+        "debe": total_debe,
+        "haber": total_haber,
+        "saldo": total_debe - total_haber,
+    }
+
+    return {
+        "fecha_inicio": fecha_inicio,
+        "fecha_fin": fecha_fin,
+        "data": data,
+        "totales": totales,
+    }
+
 
 class BalanceGeneralViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
@@ -30,72 +66,7 @@ class BalanceGeneralViewSet(viewsets.ViewSet):
         if not empresa:
             return Response({"error": "Usuario sin empresa asignada"}, status=400)
 
-        # Traer todas las clases de la empresa y prefetch cuentas e hijos
-        clases = (
-            ClaseCuenta.objects.filter(empresa=empresa, padre=None, codigo__in=[1, 2, 3])
-            .prefetch_related("hijos", "cuentas")
-)
-
-        # Función recursiva para calcular saldos
-        def calcular_saldo(clase):
-            # IDs de cuentas propias
-            ids_cuenta = [cuenta.id for cuenta in clase.cuentas.all()]
-
-            # Construir nodos por cuenta (hojas) para que el frontend pueda mostrar cuentas como 1111
-            cuentas_data = []
-            for cuenta in clase.cuentas.all():
-                mov_c = Movimiento.objects.filter(
-                    cuenta_id=cuenta.id,
-                    asiento_contable__created_at__gte=fecha_inicio_dt,
-                    asiento_contable__created_at__lt=fecha_fin_dt,
-                ).aggregate(total_debe=Sum("debe"), total_haber=Sum("haber"))
-
-                total_debe_c = mov_c["total_debe"] or 0
-                total_haber_c = mov_c["total_haber"] or 0
-                saldo_c = total_debe_c - total_haber_c
-
-                cuentas_data.append({
-                    "codigo": getattr(cuenta, "codigo", None),
-                    "nombre": getattr(cuenta, "nombre", ""),
-                    "total_debe": total_debe_c,
-                    "total_haber": total_haber_c,
-                    "saldo": saldo_c,
-                    "hijos": [],
-                    "ids": [cuenta.id],
-                })
-
-            # Recursivamente sumar hijos (clases)
-            hijos_data = []
-            for hijo in clase.hijos.all():
-                hijo_data = calcular_saldo(hijo)
-                hijos_data.append(hijo_data)
-                ids_cuenta.extend(hijo_data.get("ids", []))
-
-            # Movimientos de esas cuentas (incluye cuentas propias + hijos)
-            movimientos = Movimiento.objects.filter(
-                cuenta_id__in=ids_cuenta,
-                asiento_contable__created_at__gte=fecha_inicio_dt,
-                asiento_contable__created_at__lt=fecha_fin_dt,
-            ).aggregate(total_debe=Sum("debe"), total_haber=Sum("haber"))
-
-            total_debe = movimientos["total_debe"] or 0
-            total_haber = movimientos["total_haber"] or 0
-            saldo = total_debe - total_haber
-
-            # Combinar: primero mostrar cuentas directas como hojas, luego las subclases
-            hijos_completos = cuentas_data + hijos_data
-
-            return {
-                "codigo": clase.codigo,
-                "nombre": clase.nombre,
-                "total_debe": total_debe,
-                "total_haber": total_haber,
-                "saldo": saldo,
-                "hijos": hijos_completos,
-                "ids": ids_cuenta,  # opcional, puedes eliminar si no necesitas
-            }
-
-        resultado = [calcular_saldo(clase) for clase in clases.filter(padre=None)]
+        resultado = balance_general(empresa, fecha_inicio_dt, fecha_fin_dt)
 
         return Response(resultado)
 
@@ -115,78 +86,29 @@ class BalanceGeneralViewSet(viewsets.ViewSet):
         if not empresa:
             return Response({"error": "Usuario sin empresa asignada"}, status=400)
 
-        clases = (
-            ClaseCuenta.objects.filter(empresa=empresa, padre=None, codigo__in=[1, 2, 3])
-            .prefetch_related("hijos", "cuentas")
-        )
-
-        def calcular_saldo(clase):
-            ids_cuenta = [cuenta.id for cuenta in clase.cuentas.all()]
-            cuentas_data = []
-            for cuenta in clase.cuentas.all():
-                mov_c = Movimiento.objects.filter(
-                    cuenta_id=cuenta.id,
-                    asiento_contable__created_at__gte=fecha_inicio_dt,
-                    asiento_contable__created_at__lt=fecha_fin_dt,
-                ).aggregate(total_debe=Sum("debe"), total_haber=Sum("haber"))
-                total_debe_c = mov_c["total_debe"] or 0
-                total_haber_c = mov_c["total_haber"] or 0
-                saldo_c = total_debe_c - total_haber_c
-                cuentas_data.append({
-                    "codigo": getattr(cuenta, "codigo", None),
-                    "nombre": getattr(cuenta, "nombre", ""),
-                    "total_debe": total_debe_c,
-                    "total_haber": total_haber_c,
-                    "saldo": saldo_c,
-                    "hijos": [],
-                    "ids": [cuenta.id],
-                })
-
-            hijos_data = []
-            for hijo in clase.hijos.all():
-                hijo_data = calcular_saldo(hijo)
-                hijos_data.append(hijo_data)
-                ids_cuenta.extend(hijo_data.get("ids", []))
-
-            movimientos = Movimiento.objects.filter(
-                cuenta_id__in=ids_cuenta,
-                asiento_contable__created_at__gte=fecha_inicio_dt,
-                asiento_contable__created_at__lt=fecha_fin_dt,
-            ).aggregate(total_debe=Sum("debe"), total_haber=Sum("haber"))
-
-            total_debe = movimientos["total_debe"] or 0
-            total_haber = movimientos["total_haber"] or 0
-            saldo = total_debe - total_haber
-
-            hijos_completos = cuentas_data + hijos_data
-
-            return {
-                "codigo": clase.codigo,
-                "nombre": clase.nombre,
-                "total_debe": total_debe,
-                "total_haber": total_haber,
-                "saldo": saldo,
-                "hijos": hijos_completos,
-                "ids": ids_cuenta,
-            }
-
-        data = [calcular_saldo(c) for c in clases.filter(padre=None)]
-        # Totales a nivel raíz para no doble contar
-        total_debe = sum((n.get("total_debe") or 0) for n in data)
-        total_haber = sum((n.get("total_haber") or 0) for n in data)
-        totales = {
-            "debe": total_debe,
-            "haber": total_haber,
-            "saldo": total_debe - total_haber,
-        }
-
-        context = {
-            "fecha_inicio": fecha_inicio,
-            "fecha_fin": fecha_fin,
-            "data": data,
-            "totales": totales,
-        }
-
+        context = contexto_pdf(empresa, fecha_inicio, fecha_fin)
         pdf = render_to_pdf("reporte/balance_general_pdf.html", context)
         filename = f"balance_general_{fecha_fin}.pdf"
         return build_pdf_response(pdf, filename)
+
+    @action(detail=False, methods=["post"], url_path="export/pdf/jobs")
+    def export_pdf_job(self, request):
+        """
+        Encola la exportación a PDF y devuelve el trabajo; el estado se consulta
+        en /exportacion_pdf/<id>/ y el archivo en /exportacion_pdf/<id>/descargar/.
+        """
+        fecha_inicio = request.query_params.get("fecha_inicio", "2010-01-01")
+        fecha_fin = request.query_params.get("fecha_fin", datetime.now().strftime("%Y-%m-%d"))
+
+        try:
+            fecha_inicio_d = datetime.strptime(fecha_inicio, "%Y-%m-%d").date()
+            fecha_fin_d = datetime.strptime(fecha_fin, "%Y-%m-%d").date()
+        except ValueError:
+            return Response({"error": "Formato de fecha inválido. Use YYYY-MM-DD"}, status=400)
+
+        empresa = request.auth.get('empresa')
+        if not empresa:
+            return Response({"error": "Usuario sin empresa asignada"}, status=400)
+
+        exportacion, creada = solicitar_exportacion(empresa, "balance_general", fecha_inicio_d, fecha_fin_d)
+        return Response(ExportacionPdfSerializer(exportacion).data, status=202 if creada else 200)
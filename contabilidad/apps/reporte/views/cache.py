@@ -0,0 +1,21 @@
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from ..models import VersionLibro
+from ..services.cache import estadisticas
+
+
+class EstadisticasCacheView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Aciertos/fallos de la caché de reportes y versión actual del libro
+        de la empresa del token, para ajustar el tamaño de la caché.
+        """
+        empresa = request.auth.get('empresa')
+        return Response({
+            "version_libro": VersionLibro.actual(empresa) if empresa else None,
+            "version_plan": VersionLibro.actual(empresa, 'version_plan') if empresa else None,
+            "reportes": estadisticas(),
+        })
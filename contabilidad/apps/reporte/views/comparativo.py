@@ -0,0 +1,102 @@
+from rest_framework import viewsets
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from datetime import datetime, date, timedelta
+
+from ..services.cache import obtener_reporte
+from ..services.comparativo import (GRANULARIDADES, MAX_COLUMNAS, periodos,
+                                    totales_por_periodo, arbol_comparativo)
+
+
+def agregar_net(nodo):
+    """Agrega "net" a cada columna: ingresos (4) haber - debe, costos/gastos (5) debe - haber."""
+    ingreso = str(nodo["codigo"]).startswith("4")
+    for valor in nodo["valores"]:
+        if ingreso:
+            valor["net"] = valor["total_haber"] - valor["total_debe"]
+        else:
+            valor["net"] = valor["total_debe"] - valor["total_haber"]
+    for hijo in nodo["hijos"]:
+        agregar_net(hijo)
+    return nodo
+
+
+def comparativo(empresa, reporte, granularidad, columnas):
+    """Arma el comparativo con una consulta de totales y un recorrido del árbol."""
+    n = len(columnas)
+    if reporte == "balance_general":
+        # Cada columna es el balance acumulado al cierre del periodo
+        totales = totales_por_periodo(empresa, columnas, acumulado=True)
+        return {"data": arbol_comparativo(empresa, [1, 2, 3], totales, n)}
+
+    totales = totales_por_periodo(empresa, columnas)
+    data = [
+        agregar_net(nodo)
+        for nodo in arbol_comparativo(empresa, [4, 5], totales, n, incluir_cuentas=False)
+    ]
+    resumen = []
+    for i in range(n):
+        total_ingresos = sum(r["valores"][i]["net"] for r in data if str(r["codigo"]).startswith("4"))
+        total_costos = sum(r["valores"][i]["net"] for r in data if str(r["codigo"]).startswith("5"))
+        resumen.append({
+            "total_ingresos": total_ingresos,
+            "total_costos": total_costos,
+            "utilidad": total_ingresos - total_costos,
+        })
+    return {"data": data, "totales": resumen}
+
+
+class ComparativoViewSet(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    def list(self, request):
+        """
+        Reporte comparativo por periodos.
+        Query params:
+            - reporte: estado_resultados (por defecto) o balance_general
+            - periodo: mes (por defecto), trimestre o anio
+            - fecha_inicio / fecha_fin: YYYY-MM-DD (por defecto el año de fecha_fin)
+        """
+        reporte = request.query_params.get("reporte", "estado_resultados")
+        granularidad = request.query_params.get("periodo", "mes")
+        if reporte not in ("estado_resultados", "balance_general"):
+            return Response({"error": "reporte debe ser estado_resultados o balance_general"}, status=400)
+        if granularidad not in GRANULARIDADES:
+            return Response({"error": f"periodo debe ser uno de: {', '.join(GRANULARIDADES)}"}, status=400)
+
+        fecha_fin = request.query_params.get("fecha_fin", datetime.now().strftime("%Y-%m-%d"))
+        try:
+            fecha_fin_d = datetime.strptime(fecha_fin, "%Y-%m-%d").date()
+            fecha_inicio = request.query_params.get("fecha_inicio", date(fecha_fin_d.year, 1, 1).isoformat())
+            fecha_inicio_d = datetime.strptime(fecha_inicio, "%Y-%m-%d").date()
+        except ValueError:
+            return Response({"error": "Formato de fecha inválido. Use YYYY-MM-DD"}, status=400)
+        if fecha_inicio_d > fecha_fin_d:
+            return Response({"error": "fecha_inicio no puede ser posterior a fecha_fin"}, status=400)
+
+        empresa = request.auth.get('empresa')
+        if not empresa:
+            return Response({"error": "Usuario sin empresa asignada"}, status=400)
+
+        columnas = periodos(fecha_inicio_d, fecha_fin_d, granularidad)
+        if len(columnas) > MAX_COLUMNAS:
+            return Response({"error": f"El rango genera más de {MAX_COLUMNAS} columnas"}, status=400)
+
+        parametros = {"reporte": reporte, "periodo": granularidad,
+                      "desde": fecha_inicio_d, "hasta": fecha_fin_d}
+        resultado = obtener_reporte(
+            empresa, "comparativo", parametros,
+            lambda: comparativo(empresa, reporte, granularidad, columnas),
+        )
+
+        return Response({
+            "reporte": reporte,
+            "periodo": granularidad,
+            "columnas": [
+                # `hasta` se devuelve inclusive, igual que fecha_fin
+                {"etiqueta": c["etiqueta"], "desde": c["desde"], "hasta": c["hasta"] - timedelta(days=1)}
+                for c in columnas
+            ],
+            **resultado,
+        })
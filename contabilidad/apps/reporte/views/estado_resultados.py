@@ -2,12 +2,71 @@ from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db.models import Sum
 from datetime import datetime, timedelta
 
-from ...gestion_cuenta.models import ClaseCuenta
-from ...gestion_asiento.models import Movimiento
 from ..services.pdf import render_to_pdf, build_pdf_response
+from ..services.saldos import totales_por_cuenta, arbol_saldos
+from ..services.cache import obtener_reporte
+from ..services.exportacion import solicitar_exportacion
+from ..serializers import ExportacionPdfSerializer
+
+
+def agregar_net(nodo):
+    """
+    Agrega "net" al nodo y sus hijos: ingresos (4) net = haber - debe,
+    costos/gastos (5) net = debe - haber.
+    """
+    if str(nodo["codigo"]).startswith("4"):
+        net = nodo["total_haber"] - nodo["total_debe"]
+    else:
+        net = nodo["total_debe"] - nodo["total_haber"]
+
+    return {
+        "codigo": nodo["codigo"],
+        "nombre": nodo["nombre"],
+        "total_debe": nodo["total_debe"],
+        "total_haber": nodo["total_haber"],
+        "saldo": nodo["saldo"],
+        "net": net,
+        "hijos": [agregar_net(hijo) for hijo in nodo["hijos"]],
+        "ids": nodo["ids"],
+    }
+
+
+def estado_resultados(empresa, fecha_inicio_dt, fecha_fin_dt):
+    """
+    Clases raíz 4 (INGRESOS) y 5 (COSTOS Y GASTOS) con su "net" y los totales
+    del periodo, cacheado por versión del libro.
+    """
+    def calcular():
+        # Un solo GROUP BY por cuenta
+        totales = totales_por_cuenta(empresa, fecha_inicio_dt, fecha_fin_dt)
+        data = [
+            agregar_net(nodo)
+            for nodo in arbol_saldos(empresa, [4, 5], totales, incluir_cuentas=False)
+        ]
+        total_ingresos = sum(r.get("net", 0) for r in data if str(r.get("codigo", "")).startswith("4"))
+        total_costos = sum(r.get("net", 0) for r in data if str(r.get("codigo", "")).startswith("5"))
+        return {
+            "data": data,
+            "total_ingresos": total_ingresos,
+            "total_costos": total_costos,
+            "utilidad": total_ingresos - total_costos,
+        }
+
+    parametros = {"desde": fecha_inicio_dt.date(), "hasta": fecha_fin_dt.date()}
+    return obtener_reporte(empresa, "estado_resultados", parametros, calcular)
+
+
+def contexto_pdf(empresa, fecha_inicio, fecha_fin):
+    """Contexto de la plantilla PDF; las fechas vienen como YYYY-MM-DD."""
+    fecha_inicio_dt = datetime.strptime(fecha_inicio, "%Y-%m-%d")
+    fecha_fin_dt = datetime.strptime(fecha_fin, "%Y-%m-%d") + timedelta(days=1)
+    return {
+        "fecha_inicio": fecha_inicio,
+        "fecha_fin": fecha_fin,
+        **estado_resultados(empresa, fecha_inicio_dt, fecha_fin_dt),
+    }
 
 
 class EstadoResultadosViewSet(viewsets.ViewSet):
@@ -30,67 +89,8 @@ class EstadoResultadosViewSet(viewsets.ViewSet):
         if not empresa:
             return Response({"error": "Usuario sin empresa asignada"}, status=400)
 
-        # Traer clases raíz 4 (INGRESOS) y 5 (COSTOS Y GASTOS)
-        clases = (
-            ClaseCuenta.objects.filter(empresa=empresa, padre=None, codigo__in=[4, 5])
-            .prefetch_related("hijos", "cuentas")
-        )
-
-        def calcular(clase):
-            # IDs de cuentas asociadas a esta clase
-            ids_cuenta = [c.id for c in clase.cuentas.all()]
-
-            # Recursivamente procesar subclases
-            hijos_data = []
-            for hijo in clase.hijos.all():
-                hijo_data = calcular(hijo)
-                hijos_data.append(hijo_data)
-                ids_cuenta.extend(hijo_data.get("ids", []))
-
-            # Agregar movimientos de todas las cuentas de esta clase y descendientes
-            movimientos = (
-                Movimiento.objects.filter(
-                    cuenta_id__in=ids_cuenta,
-                    asiento_contable__created_at__gte=fecha_inicio_dt,
-                    asiento_contable__created_at__lt=fecha_fin_dt,
-                )
-                .aggregate(total_debe=Sum("debe"), total_haber=Sum("haber"))
-            )
-
-            total_debe = movimientos["total_debe"] or 0
-            total_haber = movimientos["total_haber"] or 0
-            saldo = total_debe - total_haber
-
-            # Para estado de resultados: ingresos (4) net = haber - debe, costos/gastos (5) net = debe - haber
-            if str(clase.codigo).startswith("4"):
-                net = total_haber - total_debe
-            else:
-                net = total_debe - total_haber
-
-            return {
-                "codigo": clase.codigo,
-                "nombre": clase.nombre,
-                "total_debe": total_debe,
-                "total_haber": total_haber,
-                "saldo": saldo,
-                "net": net,
-                "hijos": hijos_data,
-                "ids": ids_cuenta,
-            }
-
-        resultado = [calcular(clase) for clase in clases.filter(padre=None)]
-
-        # También devolver totales de ingresos (4) y costos/gastos (5)
-        total_ingresos = sum(r.get("net", 0) for r in resultado if str(r.get("codigo", "")).startswith("4"))
-        total_costos = sum(r.get("net", 0) for r in resultado if str(r.get("codigo", "")).startswith("5"))
-        utilidad = total_ingresos - total_costos
-
-        return Response({
-            "data": resultado,
-            "total_ingresos": total_ingresos,
-            "total_costos": total_costos,
-            "utilidad": utilidad,
-        })
+        # También devuelve totales de ingresos (4) y costos/gastos (5)
+        return Response(estado_resultados(empresa, fecha_inicio_dt, fecha_fin_dt))
 
     @action(detail=False, methods=["get"], url_path="export/pdf")
     def export_pdf(self, request):
@@ -107,58 +107,30 @@ class EstadoResultadosViewSet(viewsets.ViewSet):
         if not empresa:
             return Response({"error": "Usuario sin empresa asignada"}, status=400)
 
-        clases = (
-            ClaseCuenta.objects.filter(empresa=empresa, padre=None, codigo__in=[4, 5])
-            .prefetch_related("hijos", "cuentas")
-        )
-
-        def calcular(clase):
-            ids_cuenta = [c.id for c in clase.cuentas.all()]
-            hijos_data = []
-            for hijo in clase.hijos.all():
-                hijo_data = calcular(hijo)
-                hijos_data.append(hijo_data)
-                ids_cuenta.extend(hijo_data.get("ids", []))
-            movimientos = (
-                Movimiento.objects.filter(
-                    cuenta_id__in=ids_cuenta,
-                    asiento_contable__created_at__gte=fecha_inicio_dt,
-                    asiento_contable__created_at__lt=fecha_fin_dt,
-                )
-                .aggregate(total_debe=Sum("debe"), total_haber=Sum("haber"))
-            )
-            total_debe = movimientos["total_debe"] or 0
-            total_haber = movimientos["total_haber"] or 0
-            saldo = total_debe - total_haber
-            if str(clase.codigo).startswith("4"):
-                net = total_haber - total_debe
-            else:
-                net = total_debe - total_haber
-            return {
-                "codigo": clase.codigo,
-                "nombre": clase.nombre,
-                "total_debe": total_debe,
-                "total_haber": total_haber,
-                "saldo": saldo,
-                "net": net,
-                "hijos": hijos_data,
-                "ids": ids_cuenta,
-            }
-
-        data = [calcular(c) for c in clases.filter(padre=None)]
-        total_ingresos = sum(r.get("net", 0) for r in data if str(r.get("codigo", "")).startswith("4"))
-        total_costos = sum(r.get("net", 0) for r in data if str(r.get("codigo", "")).startswith("5"))
-        utilidad = total_ingresos - total_costos
-
-        context = {
-            "fecha_inicio": fecha_inicio,
-            "fecha_fin": fecha_fin,
-            "data": data,
-            "total_ingresos": total_ingresos,
-            "total_costos": total_costos,
-            "utilidad": utilidad,
-        }
+        context = contexto_pdf(empresa, fecha_inicio, fecha_fin)
 
         pdf = render_to_pdf("reporte/estado_resultados_pdf.html", context)
         filename = f"estado_resultados_{fecha_fin}.pdf"
         return build_pdf_response(pdf, filename)
+
+    @action(detail=False, methods=["post"], url_path="export/pdf/jobs")
+    def export_pdf_job(self, request):
+        """
+        Encola la exportación a PDF y devuelve el trabajo; el estado se consulta
+        en /exportacion_pdf/<id>/ y el archivo en /exportacion_pdf/<id>/descargar/.
+        """
+        fecha_inicio = request.query_params.get("fecha_inicio", "2010-01-01")
+        fecha_fin = request.query_params.get("fecha_fin", datetime.now().strftime("%Y-%m-%d"))
+
+        try:
+            fecha_inicio_d = datetime.strptime(fecha_inicio, "%Y-%m-%d").date()
+            fecha_fin_d = datetime.strptime(fecha_fin, "%Y-%m-%d").date()
+        except ValueError:
+            return Response({"error": "Formato de fecha inválido. Use YYYY-MM-DD"}, status=400)
+
+        empresa = request.auth.get('empresa') if hasattr(request, 'auth') and request.auth else None
+        if not empresa:
+            return Response({"error": "Usuario sin empresa asignada"}, status=400)
+
+        exportacion, creada = solicitar_exportacion(empresa, "estado_resultados", fecha_inicio_d, fecha_fin_d)
+        return Response(ExportacionPdfSerializer(exportacion).data, status=202 if creada else 200)
@@ -0,0 +1,121 @@
+from datetime import datetime, time, timedelta
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from ..models import EventoAuditoria
+from ..serializers import EventoAuditoriaSerializer
+from ..services.tabular import csv_stream, ndjson_stream
+from .libro_diario import ArchivoRenderer, CSVRenderer
+from ...utils.log import vaciar_logs
+from ...utils.paginacion import KeysetPagination
+
+
+class NDJSONRenderer(ArchivoRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+
+CAMPOS_EXPORT = ['id', 'fecha', 'nivel', 'accion', 'detalle', 'usuario', 'sesion']
+
+
+class EventoAuditoriaViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Eventos de auditoría de la empresa del token, filtrables por
+    ?usuario=<id>&nivel=WARNING[,ERROR]&fecha_inicio=AAAA-MM-DD&fecha_fin=AAAA-MM-DD.
+    Con ?cursor= pagina por (fecha, id) sin OFFSET; en ambos modos los más
+    recientes primero.
+    """
+    serializer_class = EventoAuditoriaSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_field = '-fecha'
+
+    def get_queryset(self):
+        empresa = self.request.auth.get('empresa')  # o request.user.empresa.id según tu login
+        if not empresa:
+            return EventoAuditoria.objects.none()
+        qs = EventoAuditoria.objects.filter(empresa_id=empresa)
+        return self.filtrar(qs).order_by('-fecha', '-id')
+
+    def filtrar(self, qs):
+        params = self.request.query_params
+        errores = {}
+
+        usuario = params.get('usuario')
+        if usuario:
+            if usuario.isdigit():
+                qs = qs.filter(usuario_id=int(usuario))
+            else:
+                errores['usuario'] = ["Id de usuario inválido."]
+
+        nivel = params.get('nivel')
+        if nivel:
+            niveles = {valor for valor, _ in EventoAuditoria.NIVEL_CHOICES}
+            pedidos = {n.strip().upper() for n in nivel.split(',') if n.strip()}
+            if pedidos - niveles:
+                errores['nivel'] = [f"Debe ser uno de: {', '.join(sorted(niveles))}."]
+            else:
+                qs = qs.filter(nivel__in=pedidos)
+
+        # Rango sobre la columna indexada (no fecha__date)
+        for nombre, lookup, desplazamiento in (('fecha_inicio', 'gte', 0), ('fecha_fin', 'lt', 1)):
+            valor = params.get(nombre)
+            if not valor:
+                continue
+            try:
+                fecha = parse_date(valor)
+            except ValueError:
+                fecha = None
+            if fecha is None:
+                errores[nombre] = ["Formato de fecha inválido, use AAAA-MM-DD."]
+                continue
+            limite = timezone.make_aware(datetime.combine(fecha + timedelta(days=desplazamiento), time.min))
+            qs = qs.filter(**{f'fecha__{lookup}': limite})
+
+        if errores:
+            raise ValidationError(errores)
+        return qs
+
+    def list(self, request, *args, **kwargs):
+        # Los eventos recién registrados pueden estar en la cola del escritor
+        vaciar_logs()
+        return super().list(request, *args, **kwargs)
+
+    @action(detail=False, methods=['get'], url_path='descargar',
+            renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def descargar(self, request):
+        """
+        Descarga los eventos filtrados como NDJSON o CSV (?format=ndjson|csv)
+        en streaming: se recorren con .iterator(), la memoria no crece con
+        la cantidad de eventos.
+        """
+        if not request.auth.get('empresa'):
+            return Response({"error": "Usuario sin empresa asignada"}, status=400)
+
+        vaciar_logs()
+        filas = (
+            self.get_queryset()
+            .order_by('fecha', 'id')
+            .values_list('id', 'fecha', 'nivel', 'accion', 'detalle', 'usuario_id', 'sesion')
+            .iterator(chunk_size=2000)
+        )
+
+        if request.accepted_renderer.format == 'csv':
+            response = StreamingHttpResponse(
+                csv_stream(CAMPOS_EXPORT, filas),
+                content_type='text/csv; charset=utf-8',
+            )
+            response['Content-Disposition'] = 'attachment; filename="auditoria.csv"'
+        else:
+            response = StreamingHttpResponse(
+                ndjson_stream(CAMPOS_EXPORT, filas),
+                content_type=NDJSONRenderer.media_type,
+            )
+            response['Content-Disposition'] = 'attachment; filename="auditoria.ndjson"'
+        return response
@@ -0,0 +1,37 @@
+import os
+from django.http import FileResponse
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+from ..models import ExportacionPdf
+from ..serializers import ExportacionPdfSerializer
+from ..services.exportacion import ruta_archivo
+
+
+class ExportacionPdfViewSet(viewsets.ReadOnlyModelViewSet):
+    """Estado y descarga de las exportaciones a PDF de la empresa."""
+    serializer_class = ExportacionPdfSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        empresa = self.request.auth.get('empresa')
+        return ExportacionPdf.objects.filter(empresa_id=empresa).order_by('-created_at')
+
+    @action(detail=True, methods=['get'])
+    def descargar(self, request, pk=None):
+        exportacion = self.get_object()
+        if exportacion.estado != 'LISTO':
+            return Response(
+                {"error": f"La exportación no está lista (estado {exportacion.estado})"},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        ruta = ruta_archivo(exportacion)
+        if not os.path.exists(ruta):
+            return Response({"error": "El archivo ya no existe, solicite la exportación nuevamente"},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        return FileResponse(open(ruta, 'rb'), as_attachment=True,
+                            filename=exportacion.nombre_archivo, content_type='application/pdf')
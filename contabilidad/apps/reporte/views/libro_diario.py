@@ -1,4 +1,9 @@
+import json
+from decimal import Decimal
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, filters
+from rest_framework.decorators import action
+from rest_framework.renderers import BaseRenderer
 from rest_framework.permissions import IsAuthenticated
 from ...gestion_cuenta.models.cuenta import Cuenta
 from ..serializers import LibroDiarioSerializer
@@ -6,14 +11,53 @@ from ...gestion_asiento.models import Movimiento
 from django.utils.dateparse import parse_date
 from rest_framework.response import Response
 from django.db.models import Sum
+from ..services.cache import obtener_reporte
+from ...utils.paginacion import KeysetPagination
+from ..services.tabular import csv_stream, xlsx_stream
+
+
+class ArchivoRenderer(BaseRenderer):
+    """
+    Permite `?format=csv|xlsx` en la negociación de DRF. El archivo se envía
+    con StreamingHttpResponse; este render solo se usa para respuestas de error.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, default=str).encode('utf-8')
+
+
+class CSVRenderer(ArchivoRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+
+class XLSXRenderer(ArchivoRenderer):
+    media_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    format = 'xlsx'
+    charset = None
+
+
+ENCABEZADO_EXPORT = ['Asiento', 'Fecha', 'Código', 'Cuenta', 'Referencia', 'Debe', 'Haber']
 
 class LibroDiarioViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = LibroDiarioSerializer
     permission_classes = [IsAuthenticated]
+    # ?cursor= activa la paginación keyset sobre (asiento_contable.numero, id)
+    pagination_class = KeysetPagination
+    cursor_field = 'asiento_contable__numero'
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['asiento_contable__numero', 'asiento_contable__created_at']
     ordering = ['asiento_contable__numero']
     
+    def get_fechas(self):
+        """Rango (fecha_inicio, fecha_fin) de los query params; None si no se pasa o es inválido."""
+        fecha_inicio = self.request.query_params.get('fecha_inicio')
+        fecha_fin = self.request.query_params.get('fecha_fin')
+        return (
+            parse_date(fecha_inicio) if fecha_inicio else None,
+            parse_date(fecha_fin) if fecha_fin else None,
+        )
+
     def get_queryset(self):
         request = self.request
         empresa = request.auth.get('empresa')  # o request.user.empresa.id según tu auth
@@ -25,28 +69,31 @@ class LibroDiarioViewSet(viewsets.ReadOnlyModelViewSet):
         qs = qs.select_related('cuenta', 'asiento_contable')
 
         # Filtrar por fechas si se pasan en query params
-        fecha_inicio = request.query_params.get('fecha_inicio')
-        fecha_fin = request.query_params.get('fecha_fin')
-
+        fecha_inicio, fecha_fin = self.get_fechas()
         if fecha_inicio:
-            fecha_inicio = parse_date(fecha_inicio)
-            if fecha_inicio:
-                qs = qs.filter(asiento_contable__created_at__date__gte=fecha_inicio)
+            qs = qs.filter(asiento_contable__created_at__date__gte=fecha_inicio)
         if fecha_fin:
-            fecha_fin = parse_date(fecha_fin)
-            if fecha_fin:
-                qs = qs.filter(asiento_contable__created_at__date__lte=fecha_fin)
+            qs = qs.filter(asiento_contable__created_at__date__lte=fecha_fin)
 
         return qs
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
 
-        # --- Calcular totales antes de la paginación ---
-        totales = queryset.aggregate(
-            debe_total=Sum('debe'),
-            haber_total=Sum('haber')
-        )
+        # --- Calcular totales antes de la paginación (cacheados por versión del libro) ---
+        def calcular_totales():
+            return queryset.aggregate(
+                debe_total=Sum('debe'),
+                haber_total=Sum('haber')
+            )
+
+        empresa = request.auth.get('empresa')
+        if empresa:
+            fecha_inicio, fecha_fin = self.get_fechas()
+            parametros = {"fecha_inicio": fecha_inicio, "fecha_fin": fecha_fin}
+            totales = obtener_reporte(empresa, "libro_diario_totales", parametros, calcular_totales)
+        else:
+            totales = calcular_totales()
 
         # --- Aplicar paginación ---
         page = self.paginate_queryset(queryset)
@@ -62,3 +109,52 @@ class LibroDiarioViewSet(viewsets.ReadOnlyModelViewSet):
             'results': serializer.data,
             'totales': totales
         })
+
+    def filas_export(self, queryset):
+        """
+        Recorre los movimientos con un cursor por bloques (solo las columnas
+        necesarias) y acumula los totales, que salen como última fila.
+        """
+        filas = queryset.values_list(
+            'asiento_contable__numero',
+            'asiento_contable__created_at',
+            'cuenta__codigo',
+            'cuenta__nombre',
+            'referencia',
+            'debe',
+            'haber',
+        ).iterator(chunk_size=2000)
+
+        total_debe = Decimal('0')
+        total_haber = Decimal('0')
+        for numero, created_at, codigo, nombre, referencia, debe, haber in filas:
+            total_debe += debe
+            total_haber += haber
+            yield [numero, created_at.date().isoformat(), codigo, nombre, referencia or '', debe, haber]
+        yield ['TOTALES', None, None, None, None, total_debe, total_haber]
+
+    @action(detail=False, methods=['get'], url_path='export', renderer_classes=[CSVRenderer, XLSXRenderer])
+    def export(self, request):
+        """Exporta el libro diario filtrado como CSV o XLSX (?format=csv|xlsx) en streaming."""
+        if not request.auth.get('empresa'):
+            return Response({"error": "Usuario sin empresa asignada"}, status=400)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        fecha_inicio, fecha_fin = self.get_fechas()
+        nombre = "libro_diario"
+        if fecha_inicio or fecha_fin:
+            nombre += f"_{fecha_inicio or ''}_{fecha_fin or ''}"
+
+        if request.accepted_renderer.format == 'xlsx':
+            response = StreamingHttpResponse(
+                xlsx_stream(ENCABEZADO_EXPORT, self.filas_export(queryset), hoja="Libro diario"),
+                content_type=XLSXRenderer.media_type,
+            )
+            response['Content-Disposition'] = f'attachment; filename="{nombre}.xlsx"'
+        else:
+            response = StreamingHttpResponse(
+                csv_stream(ENCABEZADO_EXPORT, self.filas_export(queryset)),
+                content_type='text/csv; charset=utf-8',
+            )
+            response['Content-Disposition'] = f'attachment; filename="{nombre}.csv"'
+        return response
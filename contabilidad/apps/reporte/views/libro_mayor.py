@@ -1,15 +1,38 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
 from rest_framework import viewsets
-from django.db.models.functions import Cast, Substr
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import CharField,Count
+from django.db.models import Count,DecimalField,Exists,F,OuterRef,Subquery,Sum,Value,Window
+from django.db.models.expressions import RowRange
+from django.db.models.functions import Coalesce
 from ..serializers import LibroMayorSerializer
+from ..services.saldos import redondear
 from ...gestion_cuenta.models import Cuenta,ClaseCuenta
+from ...gestion_asiento.models import Movimiento, SaldoDiario
+
+
+def total_saldo_diario(campo):
+    """Subconsulta con la suma de `campo` (debe/haber) de la cuenta en SaldoDiario."""
+    total = (
+        SaldoDiario.objects.filter(cuenta=OuterRef('pk'))
+        .values('cuenta')
+        .annotate(total=Sum(campo))
+        .values('total')
+    )
+    return Coalesce(
+        Subquery(total),
+        Value(0),
+        output_field=DecimalField(max_digits=20, decimal_places=3),
+    )
 
 
 class LibroMayorViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = LibroMayorSerializer
     permission_classes = [IsAuthenticated]
-    def get_queryset(self):
+    def get_cuentas(self):
+        """Cuentas de la empresa (opcionalmente de una clase y sus descendientes) ordenadas por código."""
         request = self.request
         empresa_id = request.auth.get('empresa')  # o request.user.empresa.id según tu login
 
@@ -19,21 +42,124 @@ class LibroMayorViewSet(viewsets.ReadOnlyModelViewSet):
         # Filtrar por clase seleccionada si se pasa por query params
         clase_id = request.query_params.get('clase_id')
         if clase_id:
-            try:
-                clase = ClaseCuenta.objects.get(id=clase_id, empresa_id=empresa_id)
-                # Obtener IDs de todos los descendientes
-                descendientes_ids = clase.get_descendientes_ids()
-                qs = qs.filter(clase_cuenta_id__in=descendientes_ids)
-            except ClaseCuenta.DoesNotExist:
-                qs = qs.none()
-
-    
+            # Cuentas de la clase y de todas sus subclases: un JOIN con la tabla de clausura
+            qs = qs.filter(clase_cuenta__ancestros_closure__ancestro_id=clase_id)
+
+        # Primer dígito y luego código completo (columna calculada e indexada)
+        return qs.order_by('primer_digito', 'codigo')
+
+    def get_queryset(self):
+        qs = self.get_cuentas()
+
         # Solo cuentas con movimientos
         qs = qs.annotate(num_mov=Count('movimientos')).filter(num_mov__gt=0)
-        # Convertimos codigo a char, luego extraemos el primer dígito y ordenamos
+        # Totales por cuenta desde los saldos diarios (no recorre los movimientos)
         qs = qs.annotate(
-            codigo_str=Cast('codigo', CharField()),      # convierte a texto
-            primer_digito=Substr('codigo_str', 1, 1)    # extrae primer dígito
-        ).order_by('primer_digito', 'codigo')           # ordena por primer dígito y luego por código completo
+            total_debe=total_saldo_diario('debe'),
+            total_haber=total_saldo_diario('haber'),
+        ).annotate(saldo=F('total_debe') - F('total_haber'))
 
         return qs
+
+    @action(detail=False, methods=['get'])
+    def periodo(self, request):
+        """
+        Libro mayor de un rango de fechas con saldo inicial y saldo corrido.
+
+        Por cada página de cuentas: una suma de SaldoDiario anterior a
+        fecha_inicio (saldo inicial) y una consulta de movimientos del rango
+        con SUM() OVER (PARTITION BY cuenta ORDER BY fecha, asiento, id)
+        para el saldo de cada fila. La cantidad de consultas no depende de
+        la cantidad de cuentas ni de movimientos.
+        """
+        fecha_inicio = request.query_params.get("fecha_inicio", "2010-01-01")
+        fecha_fin = request.query_params.get("fecha_fin", datetime.now().strftime("%Y-%m-%d"))
+
+        try:
+            inicio = datetime.strptime(fecha_inicio, "%Y-%m-%d").date()
+            fin = datetime.strptime(fecha_fin, "%Y-%m-%d").date() + timedelta(days=1)  # incluye todo el día
+        except ValueError:
+            return Response({"error": "Formato de fecha inválido. Use YYYY-MM-DD"}, status=400)
+
+        empresa_id = request.auth.get('empresa')
+        if not empresa_id:
+            return Response({"error": "Usuario sin empresa asignada"}, status=400)
+
+        # Cuentas con algún movimiento hasta el fin del rango (saldo inicial o movimientos)
+        cuentas = self.get_cuentas().filter(
+            Exists(SaldoDiario.objects.filter(cuenta=OuterRef('pk'), fecha__lt=fin))
+        )
+        page = self.paginate_queryset(cuentas)
+        cuentas = list(page if page is not None else cuentas)
+        ids = [cuenta.id for cuenta in cuentas]
+
+        decimal = DecimalField(max_digits=20, decimal_places=3)
+
+        # Saldo inicial de todas las cuentas de la página con un solo aggregate
+        apertura = {
+            fila['cuenta_id']: fila['saldo']
+            for fila in SaldoDiario.objects.filter(empresa_id=empresa_id, cuenta_id__in=ids, fecha__lt=inicio)
+            .values('cuenta_id')
+            .annotate(saldo=Sum(F('debe') - F('haber'), output_field=decimal))
+            .order_by()
+        }
+
+        orden = [F('asiento_contable__created_at').asc(), F('asiento_contable__numero').asc(), F('id').asc()]
+        movimientos = (
+            Movimiento.objects.filter(
+                cuenta_id__in=ids,
+                asiento_contable__created_at__date__gte=inicio,
+                asiento_contable__created_at__date__lt=fin,
+            )
+            .annotate(
+                saldo_periodo=Window(
+                    Sum(F('debe') - F('haber'), output_field=decimal),
+                    partition_by=[F('cuenta_id')],
+                    order_by=orden,
+                    frame=RowRange(start=None, end=0),
+                ),
+            )
+            .order_by('cuenta_id', *orden)
+            .values(
+                'id', 'cuenta_id', 'referencia', 'debe', 'haber', 'saldo_periodo',
+                'asiento_contable__numero', 'asiento_contable__created_at',
+            )
+        )
+
+        por_cuenta = defaultdict(list)
+        for mov in movimientos:
+            por_cuenta[mov['cuenta_id']].append(mov)
+
+        resultado = []
+        for cuenta in cuentas:
+            saldo_inicial = redondear(apertura.get(cuenta.id))
+            filas = [
+                {
+                    "id": mov['id'],
+                    "fecha": mov['asiento_contable__created_at'].date().isoformat(),
+                    "referencia": mov['referencia'],
+                    "debe": mov['debe'],
+                    "haber": mov['haber'],
+                    "asiento": mov['asiento_contable__numero'],
+                    # SQLite devuelve la suma de la ventana como float
+                    "saldo": saldo_inicial + redondear(mov['saldo_periodo']),
+                }
+                for mov in por_cuenta[cuenta.id]
+            ]
+            total_debe = sum((mov['debe'] for mov in filas), 0)
+            total_haber = sum((mov['haber'] for mov in filas), 0)
+            resultado.append({
+                "id": cuenta.id,
+                "codigo": cuenta.codigo,
+                "nombre": cuenta.nombre,
+                "estado": cuenta.estado,
+                "saldo_inicial": saldo_inicial,
+                "total_debe": total_debe,
+                "total_haber": total_haber,
+                "saldo_final": saldo_inicial + total_debe - total_haber,
+                "movimientos": filas,
+            })
+
+        if page is not None:
+            return self.get_paginated_response(resultado)
+        return Response(resultado)
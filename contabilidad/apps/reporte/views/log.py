@@ -1,22 +1,58 @@
+import json
 import os
-from django.http import FileResponse
+import re
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from ...utils import rotacion_log
+from ...utils.log import UUIDEncoder, carpeta_usuario, leer_sesiones, vaciar_logs
+
+RANGO = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def rango_pedido(encabezado, total):
+    """
+    (inicio, fin) del encabezado Range para un contenido de `total` bytes.
+    None si no hay rango (o trae varios, que se responden completos) y
+    False si no se puede satisfacer.
+    """
+    m = RANGO.match((encabezado or "").strip())
+    if not m or not (m[1] or m[2]):
+        return None
+    if not m[1]:
+        # bytes=-N: los últimos N bytes
+        sufijo = int(m[2])
+        if sufijo == 0 or total == 0:
+            return False
+        return max(total - sufijo, 0), total - 1
+    inicio = int(m[1])
+    fin = min(int(m[2]), total - 1) if m[2] else total - 1
+    if inicio >= total or fin < inicio:
+        return False
+    return inicio, fin
 
-LOG_DIR = "logs"  # Carpeta raíz de logs
 
 class DescargarLogEmpresaView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         """
-        Descarga el log JSON de un usuario de una empresa específica.
+        Descarga el log de un usuario de una empresa específica.
         Solo superusuarios pueden descargar.
         Se espera recibir:
             - empresa_id (query param)
             - usuario_id (query param)
+            - formato (opcional): "sesiones" (por defecto), la lista de
+              sesiones en JSON como siempre; "jsonl", los segmentos tal cual
+        Con formato=jsonl además:
+            - fecha_inicio / fecha_fin (opcionales, AAAA-MM-DD): solo los
+              segmentos de ese rango
+            - se envía segmento por segmento y acepta Range
+        La lectura no modifica los archivos: el JSON heredado lo convierte
+        el comando rotar_logs (mientras tanto solo aparece en "sesiones").
         """
         
 
@@ -25,10 +61,61 @@ class DescargarLogEmpresaView(APIView):
 
         if not empresa_id or not usuario_id:
             return Response({"detail": "Faltan parámetros"}, status=status.HTTP_400_BAD_REQUEST)
+        # Los ids forman la ruta: no se aceptan separadores ni '..'
+        if any(os.path.basename(valor) != valor or valor in (".", "..") for valor in (empresa_id, usuario_id)):
+            return Response({"detail": "Parámetros inválidos"}, status=status.HTTP_400_BAD_REQUEST)
 
-        archivo = os.path.join(LOG_DIR, empresa_id, f"{usuario_id}.json")
+        formato = request.query_params.get("formato") or "sesiones"
+        if formato not in ("sesiones", "jsonl"):
+            return Response({"detail": 'formato debe ser "sesiones" o "jsonl".'},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-        if not os.path.exists(archivo):
+        if formato == "sesiones":
+            # Las sesiones se arman desde los segmentos JSONL (y el JSON heredado)
+            sesiones = leer_sesiones(empresa_id, usuario_id)
+            if sesiones is None:
+                return Response({"detail": "Archivo no encontrado"}, status=status.HTTP_404_NOT_FOUND)
+            contenido = json.dumps(sesiones, indent=2, ensure_ascii=False, cls=UUIDEncoder)
+            respuesta = HttpResponse(contenido.encode("utf-8"), content_type="application/json")
+            respuesta['Content-Disposition'] = f'attachment; filename="{usuario_id}.json"'
+            return respuesta
+
+        fecha_inicio = request.query_params.get("fecha_inicio")
+        fecha_fin = request.query_params.get("fecha_fin")
+        try:
+            desde = parse_date(fecha_inicio) if fecha_inicio else None
+            hasta = parse_date(fecha_fin) if fecha_fin else None
+        except ValueError:
+            desde = hasta = None
+        if (fecha_inicio and not desde) or (fecha_fin and not hasta):
+            return Response({"detail": "Formato de fecha inválido, use AAAA-MM-DD."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        vaciar_logs()
+        # Solo los segmentos del rango; el manifiesto evita abrir los demás
+        segmentos = rotacion_log.seleccionar(carpeta_usuario(empresa_id, usuario_id), desde, hasta)
+        if not segmentos:
             return Response({"detail": "Archivo no encontrado"}, status=status.HTTP_404_NOT_FOUND)
 
-        return FileResponse(open(archivo, 'rb'), as_attachment=True, filename=f"{usuario_id}.json")
+        total = sum(tamano for _, tamano in segmentos)
+        rango = rango_pedido(request.headers.get("Range"), total)
+        if rango is False:
+            respuesta = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            respuesta['Content-Range'] = f"bytes */{total}"
+            return respuesta
+
+        inicio, fin = rango or (0, total - 1)
+        respuesta = StreamingHttpResponse(
+            rotacion_log.leer_rango(segmentos, inicio, fin),
+            status=status.HTTP_206_PARTIAL_CONTENT if rango else status.HTTP_200_OK,
+            content_type="application/x-ndjson",
+        )
+        respuesta['Content-Length'] = str(fin - inicio + 1 if total else 0)
+        respuesta['Accept-Ranges'] = 'bytes'
+        if rango:
+            respuesta['Content-Range'] = f"bytes {inicio}-{fin}/{total}"
+        nombre = usuario_id
+        if desde or hasta:
+            nombre += f"_{desde or ''}_{hasta or ''}"
+        respuesta['Content-Disposition'] = f'attachment; filename="{nombre}.jsonl"'
+        return respuesta
@@ -1,11 +1,51 @@
-import os
+"""
+Log de auditoría por usuario en archivos JSONL de solo anexado.
+
+Cada empresa/usuario tiene segmentos mensuales que se parten por tamaño
+y se comprimen al cerrarse (ver utils.rotacion_log):
+
+    logs/<empresa>/<usuario>/<AAAA-MM>.<nnn>.jsonl[.gz]
+
+y cada línea es un registro independiente:
+
+    {"tipo": "sesion", "idSesion", "empresa", "usuario", "fechaInicio"}
+    {"tipo": "evento", "idSesion", "fecha", "nivel", "accion", "detalle"}
+    {"tipo": "fin", "idSesion", "fechaFin", "resultadoSesion"}
+
+Registrar un evento solo encola la línea; un hilo escritor las agrupa y las
+anexa al segmento abierto, así el costo no depende del tamaño del historial
+y dos peticiones concurrentes no se pisan. `leer_sesiones` reconstruye el
+formato de siempre (lista de sesiones con sus eventos y la duración).
+
+Las sesiones se ubican con un índice (logs/sesiones.idx) que asocia un
+hash corto del id de sesión (el token JWT completo) con la empresa, el
+usuario, el segmento y el byte donde está su línea de inicio.
+
+Los eventos de cada lote además se copian a EventoAuditoria (reporte) con
+un bulk_create, para consultarlos filtrados sin leer los archivos.
+"""
+import atexit
+import hashlib
 import json
+import os
+import queue
+import threading
 import uuid
 from datetime import datetime
-import tempfile
-import shutil
+from . import rotacion_log
 
 LOG_DIR = "logs"
+INDICE = "sesiones.idx"
+
+# El escritor junta hasta LOTE_MAXIMO líneas o espera ESPERA_LOTE segundos
+LOTE_MAXIMO = 500
+ESPERA_LOTE = 0.2
+# Eventos (y líneas por carpeta) que se retienen para reintentar si la base
+# de datos o el disco fallan
+MAX_PENDIENTES = 50_000
+# Con líneas sin escribir el escritor reintenta aunque no lleguen nuevas
+ESPERA_REINTENTO = 1.0
+
 
 class UUIDEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -14,24 +54,337 @@ class UUIDEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
-def iniciar_log_sesion(id_sesion, empresa_id, usuario_id, datos_usuario):
+def ahora_iso():
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def carpeta_usuario(empresa_id, usuario_id):
+    return os.path.join(LOG_DIR, str(empresa_id), str(usuario_id))
+
+
+def ruta_legado(empresa_id, usuario_id):
+    """Archivo JSON del formato anterior (una lista de sesiones reescrita entera)."""
+    return os.path.join(LOG_DIR, str(empresa_id), f"{usuario_id}.json")
+
+
+def clave_sesion(id_sesion):
+    """Hash corto (16 hex) del id de sesión, que es el token de acceso entero."""
+    return hashlib.blake2b(str(id_sesion).encode("utf-8"), digest_size=8).hexdigest()
+
+
+class IndiceSesiones:
     """
-    Crea un archivo de log (si no existe) y una nueva sesión de usuario.
+    Índice {clave_sesion: (empresa, usuario, segmento, offset)} en memoria,
+    respaldado por un archivo de solo anexado con una línea por sesión:
+
+        <clave>\t<empresa>\t<usuario>\t<segmento>\t<offset>
+
+    Se carga la primera vez que se usa; si el archivo no existe se
+    reconstruye recorriendo los segmentos. Ante una clave desconocida solo se
+    leen las líneas que otros procesos agregaron desde la última lectura.
     """
-    ahora = datetime.utcnow().isoformat() + "Z"
-    carpeta_usuario = os.path.join(LOG_DIR, empresa_id)
-    os.makedirs(carpeta_usuario, exist_ok=True)
-    archivo = os.path.join(carpeta_usuario, f"{usuario_id}.json")
 
-    # Cargar logs existentes
-    try:
-        with open(archivo, "r", encoding="utf-8") as f:
-            logs_usuario = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        logs_usuario = []
+    def __init__(self):
+        self.entradas = {}
+        self.leido = None  # bytes del archivo ya cargados (None: sin cargar)
+        self.candado = threading.Lock()
+
+    @property
+    def ruta(self):
+        return os.path.join(LOG_DIR, INDICE)
+
+    def cargar(self):
+        with self.candado:
+            self.cargar_sin_candado()
+
+    def cargar_sin_candado(self):
+        if self.leido is None and not os.path.exists(self.ruta):
+            self.reconstruir_sin_candado()
+        self.leer_nuevas()
+
+    def leer_nuevas(self):
+        try:
+            with open(self.ruta, "rb") as f:
+                f.seek(self.leido or 0)
+                datos = f.read()
+        except FileNotFoundError:
+            self.leido = 0
+            return
+        # Una línea a medio escribir por otro proceso se lee la próxima vez
+        completo = datos.rfind(b"\n") + 1
+        for linea in datos[:completo].decode("utf-8").splitlines():
+            partes = linea.split("\t")
+            if len(partes) == 5:
+                clave, empresa_id, usuario_id, segmento, offset = partes
+                self.entradas[clave] = (empresa_id, usuario_id, segmento, int(offset))
+        self.leido = (self.leido or 0) + completo
+
+    def obtener(self, id_sesion):
+        """(empresa, usuario, segmento, offset) de la sesión, o None."""
+        clave = clave_sesion(id_sesion)
+        if self.leido is None:
+            self.cargar()
+        entrada = self.entradas.get(clave)
+        if entrada is None or entrada[3] is None:
+            with self.candado:
+                self.leer_nuevas()
+            entrada = self.entradas.get(clave, entrada)
+        return entrada
+
+    def reservar(self, id_sesion, empresa_id, usuario_id, segmento):
+        """Entrada provisional (sin offset) hasta que el escritor la guarde."""
+        self.entradas.setdefault(clave_sesion(id_sesion), (str(empresa_id), str(usuario_id), segmento, None))
+
+    def anexar(self, nuevas):
+        """Guarda [(clave, empresa, usuario, segmento, offset)] (lo llama el escritor)."""
+        if not nuevas:
+            return
+        with self.candado:
+            if self.leido is None:
+                self.cargar_sin_candado()
+            lineas = []
+            for clave, empresa_id, usuario_id, segmento, offset in nuevas:
+                entrada = self.entradas.get(clave)
+                if entrada is not None and entrada[3] is not None:
+                    continue  # la sesión ya tenía su línea de inicio
+                self.entradas[clave] = (empresa_id, usuario_id, segmento, offset)
+                lineas.append(f"{clave}\t{empresa_id}\t{usuario_id}\t{segmento}\t{offset}\n")
+            if lineas:
+                os.makedirs(LOG_DIR, exist_ok=True)
+                with open(self.ruta, "ab") as f:
+                    f.write("".join(lineas).encode("utf-8"))
+
+    def reconstruir(self):
+        """Rehace el índice desde las líneas de inicio de todos los segmentos."""
+        vaciar_logs()
+        with self.candado:
+            return self.reconstruir_sin_candado()
+
+    def reconstruir_sin_candado(self):
+        entradas = {}
+        lineas = []
+        for raiz, _, archivos in os.walk(LOG_DIR):
+            for archivo in sorted(archivos):
+                if not rotacion_log.es_segmento(archivo):
+                    continue
+                ruta = os.path.join(raiz, archivo)
+                # El offset es sobre el contenido sin comprimir, como lo anota el escritor
+                segmento = archivo.removesuffix(rotacion_log.COMPRIMIDO)
+                with rotacion_log.abrir(ruta) as f:
+                    offset = 0
+                    for linea in f:
+                        if b'"tipo": "sesion"' in linea:
+                            try:
+                                registro = json.loads(linea)
+                            except ValueError:
+                                registro = None
+                            if registro is not None:
+                                clave = clave_sesion(registro["idSesion"])
+                                if clave not in entradas:
+                                    empresa_id = os.path.basename(os.path.dirname(raiz))
+                                    usuario_id = os.path.basename(raiz)
+                                    entradas[clave] = (empresa_id, usuario_id, segmento, offset)
+                                    lineas.append(f"{clave}\t{empresa_id}\t{usuario_id}\t{segmento}\t{offset}\n")
+                        offset += len(linea)
+
+        os.makedirs(LOG_DIR, exist_ok=True)
+        temporal = self.ruta + ".tmp"
+        with open(temporal, "wb") as f:
+            f.write("".join(lineas).encode("utf-8"))
+        os.replace(temporal, self.ruta)
+        # Las sesiones encoladas que el escritor todavía no guardó se conservan
+        for clave, entrada in self.entradas.items():
+            if entrada[3] is None:
+                entradas.setdefault(clave, entrada)
+        self.entradas = entradas
+        self.leido = os.path.getsize(self.ruta)
+        return len(entradas)
+
+
+indice_sesiones = IndiceSesiones()
+
+
+class EscritorLog:
+    """
+    Hilo que anexa las líneas encoladas a su segmento. Por cada lote abre
+    cada archivo una vez y escribe todas sus líneas en un solo write; el
+    offset de cada línea de inicio de sesión va al índice de sesiones y los
+    eventos a la base de datos.
+    """
+
+    def __init__(self):
+        self.cola = queue.Queue()
+        self.hilo = None
+        self.pid = None
+        self.candado = threading.Lock()
+        self.pendientes = []
+        # {carpeta: [(linea, registro)]} que no se pudieron anexar
+        self.sin_escribir = {}
+        # {carpeta: (mes, último segmento usado)}
+        self.activos = {}
+
+    def encolar(self, carpeta, registro):
+        self.iniciar()
+        linea = (json.dumps(registro, ensure_ascii=False, cls=UUIDEncoder) + "\n").encode("utf-8")
+        self.cola.put((carpeta, linea, registro))
+
+    def iniciar(self):
+        # Tras un fork (gunicorn, autoreload) el hilo del proceso padre no existe
+        if self.hilo is not None and self.hilo.is_alive() and self.pid == os.getpid():
+            return
+        with self.candado:
+            if self.hilo is not None and self.hilo.is_alive() and self.pid == os.getpid():
+                return
+            if self.pid != os.getpid():
+                self.cola = queue.Queue()
+            self.pid = os.getpid()
+            self.hilo = threading.Thread(target=self.trabajar, name="escritor-log", daemon=True)
+            self.hilo.start()
+
+    def trabajar(self):
+        while True:
+            try:
+                primero = self.cola.get(timeout=ESPERA_REINTENTO if self.sin_escribir else None)
+            except queue.Empty:
+                self.escribir([])
+                continue
+            lote = [primero]
+            try:
+                while len(lote) < LOTE_MAXIMO:
+                    lote.append(self.cola.get(timeout=ESPERA_LOTE))
+            except queue.Empty:
+                pass
+
+            detener = any(item is None for item in lote)
+            try:
+                self.escribir([item for item in lote if item is not None])
+            finally:
+                for _ in lote:
+                    self.cola.task_done()
+            if detener:
+                return
+
+    def segmento_para(self, carpeta, nuevos):
+        """
+        Segmento abierto donde anexar `nuevos` bytes; se llama con la carpeta
+        bloqueada. Al cambiar de mes (o la primera vez que se usa la carpeta)
+        rota los segmentos viejos; si el abierto se llenaría, lo cierra y pasa
+        al siguiente. El tamaño se lee del archivo porque otros procesos
+        también anexan.
+        """
+        mes = rotacion_log.periodo(ahora_iso())
+        activo = self.activos.get(carpeta)
+        if activo is None or activo[0] != mes:
+            rotacion_log.rotar(carpeta, mes)
+            activo = (mes, rotacion_log.segmento_activo(carpeta, mes)[0])
+        nombre = activo[1]
+
+        try:
+            tamano = os.path.getsize(os.path.join(carpeta, nombre))
+        except FileNotFoundError:
+            # Otro proceso lo cerró (o todavía no se creó)
+            nombre, tamano = rotacion_log.segmento_activo(carpeta, mes)
+        if tamano and tamano + nuevos > rotacion_log.TAMANO_SEGMENTO:
+            rotacion_log.cerrar(carpeta, nombre)
+            nombre, tamano = rotacion_log.segmento_activo(carpeta, mes)
+        return mes, nombre
+
+    def escribir(self, lote):
+        # Lo que quedó sin escribir va primero, para conservar el orden de cada carpeta
+        por_carpeta, self.sin_escribir = self.sin_escribir, {}
+        for carpeta, linea, registro in lote:
+            por_carpeta.setdefault(carpeta, []).append((linea, registro))
+
+        sesiones, eventos = [], []
+        for carpeta, lineas in por_carpeta.items():
+            datos = b"".join(linea for linea, _ in lineas)
+            try:
+                with rotacion_log.bloquear(carpeta):
+                    mes, segmento = self.segmento_para(carpeta, len(datos))
+                    with open(os.path.join(carpeta, segmento), "ab") as f:
+                        offset = f.tell()
+                        f.write(datos)
+                self.activos[carpeta] = (mes, segmento)
+            except OSError as e:
+                # Se reintenta en el próximo lote (las más recientes si son demasiadas)
+                print(f"⚠️ No se pudo escribir el log en {carpeta}, se reintentará: {e}")
+                self.sin_escribir[carpeta] = lineas[-MAX_PENDIENTES:]
+                continue
+            empresa_id, usuario_id = os.path.basename(os.path.dirname(carpeta)), os.path.basename(carpeta)
+            for linea, registro in lineas:
+                if registro["tipo"] == "sesion":
+                    sesiones.append((clave_sesion(registro["idSesion"]), empresa_id, usuario_id, segmento, offset))
+                elif registro["tipo"] == "evento":
+                    eventos.append((empresa_id, usuario_id, registro))
+                offset += len(linea)
 
-    # Crear nueva sesión
-    nueva_sesion = {
+        try:
+            indice_sesiones.anexar(sesiones)
+        except OSError as e:
+            print(f"⚠️ No se pudo actualizar el índice de sesiones: {e}")
+        self.guardar_eventos(eventos)
+
+    def guardar_eventos(self, eventos):
+        """Copia los eventos del lote a EventoAuditoria con un solo bulk_create."""
+        from django.apps import apps
+        if not apps.ready:
+            return  # log usado fuera de Django (scripts)
+        from django.db import DatabaseError, close_old_connections
+        from ..reporte.models import EventoAuditoria
+
+        self.pendientes.extend(eventos)
+        objetos = []
+        for empresa_id, usuario_id, registro in self.pendientes:
+            try:
+                empresa = uuid.UUID(str(empresa_id))
+            except ValueError:
+                continue
+            objetos.append(EventoAuditoria(
+                empresa_id=empresa,
+                usuario_id=int(usuario_id) if str(usuario_id).isdigit() else None,
+                sesion=clave_sesion(registro["idSesion"]),
+                fecha=datetime.fromisoformat(registro["fecha"].replace("Z", "+00:00")),
+                nivel=str(registro["nivel"])[:10],
+                accion=str(registro["accion"])[:150],
+                detalle=str(registro["detalle"] or ""),
+            ))
+        if not objetos:
+            self.pendientes = []
+            return
+
+        close_old_connections()
+        try:
+            EventoAuditoria.objects.bulk_create(objetos, batch_size=LOTE_MAXIMO)
+        except DatabaseError as e:
+            # Se reintenta con el próximo lote; los segmentos JSONL siguen completos
+            print(f"⚠️ No se pudieron guardar {len(objetos)} eventos de auditoría: {e}")
+            self.pendientes = self.pendientes[-MAX_PENDIENTES:]
+            return
+        self.pendientes = []
+
+    def vaciar(self):
+        """Espera a que todo lo encolado esté escrito en disco."""
+        if self.hilo is not None and self.pid == os.getpid():
+            self.cola.join()
+
+    def detener(self):
+        if self.hilo is not None and self.hilo.is_alive() and self.pid == os.getpid():
+            self.cola.put(None)
+            self.hilo.join(timeout=5)
+
+
+escritor = EscritorLog()
+atexit.register(escritor.detener)
+
+
+def vaciar_logs():
+    """Escribe los eventos pendientes (antes de leer o descargar un log)."""
+    escritor.vaciar()
+
+
+def registro_sesion(id_sesion, empresa_id, usuario_id, datos_usuario, fecha):
+    return {
+        "tipo": "sesion",
         "idSesion": str(id_sesion),
         "empresa": {
             "id": empresa_id,
@@ -47,114 +400,192 @@ def iniciar_log_sesion(id_sesion, empresa_id, usuario_id, datos_usuario):
             "navegador": datos_usuario.get("navegador", "desconocido"),
             "idioma": datos_usuario.get("idioma", "desconocido"),
         },
-        "eventos": [],
-        "fechaInicio": ahora
+        "fechaInicio": fecha
     }
 
-    logs_usuario.append(nueva_sesion)
 
-    # Guardar archivo
-    with tempfile.NamedTemporaryFile("w", delete=False, encoding="utf-8") as tmp:
-        json.dump(logs_usuario, tmp, indent=2, ensure_ascii=False, cls=UUIDEncoder)
-        temp_name = tmp.name
-    shutil.move(temp_name, archivo)
+def iniciar_log_sesion(id_sesion, empresa_id, usuario_id, datos_usuario):
+    """
+    Registra el inicio de una nueva sesión de usuario.
+    """
+    ahora = ahora_iso()
+    indice_sesiones.reservar(id_sesion, empresa_id, usuario_id, None)
+    escritor.encolar(
+        carpeta_usuario(empresa_id, usuario_id),
+        registro_sesion(id_sesion, empresa_id, usuario_id, datos_usuario, ahora),
+    )
+
 
-    print(f"✅ Sesión iniciada para el usuario {usuario_id} ({empresa_id}) en {archivo}")
+def buscar_sesion(id_sesion):
+    """(empresa_id, usuario_id) de una sesión según el índice, o None."""
+    entrada = indice_sesiones.obtener(id_sesion)
+    return entrada[:2] if entrada else None
 
 
 def registrar_evento(id_sesion, empresa_id=None, usuario_id=None, datos_usuario=None,
                      nivel="INFO", accion="", detalle="", fin_sesion=False):
     """
     Registrar un evento en el log del usuario.
-    Si datos_usuario se pasa y no existe la sesión, crea la sesión.
+    Si datos_usuario se pasa, abre la sesión antes del evento.
     Si solo se pasa id_sesion, agrega el evento a la sesión existente.
+
+    Solo se encola una línea por registro (dos si se abre la sesión); un
+    evento de una sesión que nunca se inició no aparece al leer el log.
     """
-    ahora = datetime.utcnow().isoformat() + "Z"
-
-    # Construir ruta del archivo si tenemos empresa y usuario
-    if empresa_id and usuario_id:
-        carpeta_usuario = os.path.join(LOG_DIR, empresa_id)
-        os.makedirs(carpeta_usuario, exist_ok=True)
-        archivo = os.path.join(carpeta_usuario, f"{usuario_id}.json")
-    else:
-        # Si no se envía empresa_id/usuario_id, buscar la sesión por id_sesion
-        archivo = None
-        for root, dirs, files in os.walk(LOG_DIR):
-            for file in files:
-                if file.endswith(".json"):
-                    posible_archivo = os.path.join(root, file)
-                    try:
-                        with open(posible_archivo, "r", encoding="utf-8") as f:
-                            logs = json.load(f)
-                        if any(log["idSesion"] == str(id_sesion) for log in logs):
-                            archivo = posible_archivo
-                            break
-                    except json.JSONDecodeError:
-                        continue
-            if archivo:
-                break
-        if not archivo:
+    ahora = ahora_iso()
+
+    if not (empresa_id and usuario_id):
+        ubicacion = buscar_sesion(id_sesion)
+        if not ubicacion:
             print("⚠️ No se encontró sesión y no se pasaron datos de usuario. Evento ignorado.")
             return
+        empresa_id, usuario_id = ubicacion
 
-    # Cargar logs existentes
-    try:
-        with open(archivo, "r", encoding="utf-8") as f:
-            logs_usuario = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        logs_usuario = []
+    carpeta = carpeta_usuario(empresa_id, usuario_id)
 
-    # Buscar sesión existente
-    log_sesion = next((log for log in logs_usuario if log["idSesion"] == str(id_sesion)), None)
+    if datos_usuario:
+        indice_sesiones.reservar(id_sesion, empresa_id, usuario_id, None)
+        escritor.encolar(carpeta, registro_sesion(id_sesion, empresa_id, usuario_id, datos_usuario, ahora))
 
-    # Crear sesión si no existe y se pasan datos_usuario
-    if not log_sesion and datos_usuario:
-        log_sesion = {
-            "idSesion": str(id_sesion),
-            "empresa": {
-                "id": empresa_id,
-                "nombre": datos_usuario.get("nombreEmpresa", "Empresa Desconocida")
-            },
-            "usuario": {
-                "nombre": datos_usuario.get("nombre", "desconocido"),
-                "usuario": usuario_id,
-                "rol": datos_usuario.get("rol", "sin rol"),
-                "ip": datos_usuario.get("ip", "desconocida"),
-                "dispositivo": datos_usuario.get("dispositivo", "desconocido"),
-                "sistema": datos_usuario.get("sistema", "desconocido"),
-                "navegador": datos_usuario.get("navegador", "desconocido"),
-                "idioma": datos_usuario.get("idioma", "desconocido"),
-            },
-            "eventos": [],
-            "fechaInicio": ahora
-        }
-        logs_usuario.append(log_sesion)
-
-    # ⚠️ Si aún no existe sesión, salir para evitar error
-    if not log_sesion:
-        print(f"⚠️ No existe una sesión activa para el ID {id_sesion}. Evento no registrado.")
-        return
-
-    # Registrar evento
-    log_sesion["eventos"].append({
+    escritor.encolar(carpeta, {
+        "tipo": "evento",
+        "idSesion": str(id_sesion),
         "fecha": ahora,
         "nivel": nivel,
         "accion": accion,
         "detalle": detalle
     })
 
-    # Cerrar sesión
+    # Cerrar sesión (la duración se calcula al leer, con la fecha de inicio)
     if fin_sesion:
-        inicio = datetime.fromisoformat(log_sesion["fechaInicio"].replace("Z", ""))
-        duracion = datetime.utcnow() - inicio
-        log_sesion["fechaFin"] = ahora
-        log_sesion["duracionSesion"] = str(duracion)
-        log_sesion["resultadoSesion"] = "cerrada correctamente"
-
-    # Guardar cambios
-    with tempfile.NamedTemporaryFile("w", delete=False, encoding="utf-8") as tmp:
-        json.dump(logs_usuario, tmp, indent=2, ensure_ascii=False, cls=UUIDEncoder)
-        temp_name = tmp.name
-    shutil.move(temp_name, archivo)
-
-    print(f"✅ Evento guardado en {archivo}")
+        escritor.encolar(carpeta, {
+            "tipo": "fin",
+            "idSesion": str(id_sesion),
+            "fechaFin": ahora,
+            "resultadoSesion": "cerrada correctamente"
+        })
+
+
+def segmentos(empresa_id, usuario_id):
+    """Rutas de los segmentos de la empresa/usuario en orden cronológico."""
+    carpeta = carpeta_usuario(empresa_id, usuario_id)
+    return [os.path.join(carpeta, nombre) for nombre in rotacion_log.listar(carpeta)]
+
+
+def leer_sesiones(empresa_id, usuario_id):
+    """
+    Sesiones del usuario con el formato del log anterior: lista de
+    {idSesion, empresa, usuario, eventos, fechaInicio[, fechaFin,
+    duracionSesion, resultadoSesion]}. Incluye el archivo JSON heredado si
+    existe. Devuelve None si el usuario no tiene log.
+    """
+    vaciar_logs()
+    archivos = segmentos(empresa_id, usuario_id)
+    legado = ruta_legado(empresa_id, usuario_id)
+    if not archivos and not os.path.exists(legado):
+        return None
+
+    sesiones = {}
+    try:
+        with open(legado, "r", encoding="utf-8") as f:
+            for sesion in json.load(f):
+                sesiones[sesion["idSesion"]] = sesion
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+
+    for ruta in archivos:
+        with rotacion_log.abrir_vigente(ruta) as f:
+            for linea in f:
+                try:
+                    registro = json.loads(linea)
+                except ValueError:
+                    continue  # línea cortada por una caída a mitad de escritura
+                tipo = registro.pop("tipo", None)
+                sesion = sesiones.get(registro.get("idSesion"))
+
+                if tipo == "sesion":
+                    if sesion is None:
+                        registro["eventos"] = []
+                        sesiones[registro["idSesion"]] = registro
+                elif sesion is None:
+                    continue
+                elif tipo == "evento":
+                    registro.pop("idSesion")
+                    sesion["eventos"].append(registro)
+                elif tipo == "fin":
+                    inicio = datetime.fromisoformat(sesion["fechaInicio"].replace("Z", ""))
+                    fin = datetime.fromisoformat(registro["fechaFin"].replace("Z", ""))
+                    sesion["fechaFin"] = registro["fechaFin"]
+                    sesion["duracionSesion"] = str(fin - inicio)
+                    sesion["resultadoSesion"] = registro["resultadoSesion"]
+
+    return list(sesiones.values())
+
+
+def migrar_legado(empresa_id, usuario_id):
+    """
+    Pasa el JSON del formato anterior (<usuario>.json) a un segmento cerrado
+    del usuario y lo borra. Devuelve la entrada del manifiesto o None.
+    """
+    legado = ruta_legado(empresa_id, usuario_id)
+    try:
+        with open(legado, "r", encoding="utf-8") as f:
+            sesiones = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+    lineas = []
+    for sesion in sesiones:
+        eventos = sesion.pop("eventos", [])
+        cierre = {clave: sesion.pop(clave) for clave in ("fechaFin", "resultadoSesion") if clave in sesion}
+        sesion.pop("duracionSesion", None)
+        lineas.append(dict(sesion, tipo="sesion"))
+        lineas += [dict(evento, tipo="evento", idSesion=sesion["idSesion"]) for evento in eventos]
+        if cierre:
+            lineas.append(dict(cierre, tipo="fin", idSesion=sesion["idSesion"]))
+
+    carpeta = carpeta_usuario(empresa_id, usuario_id)
+    os.makedirs(carpeta, exist_ok=True)
+    inicio = sesiones[0]["fechaInicio"] if sesiones else ahora_iso()
+    # Parte 000: va antes que los segmentos que el escritor abre en ese mes
+    nombre = f"{rotacion_log.periodo(inicio)}.000{rotacion_log.EXTENSION}"
+    with rotacion_log.bloquear(carpeta):
+        with open(os.path.join(carpeta, nombre), "w", encoding="utf-8") as f:
+            for registro in lineas:
+                f.write(json.dumps(registro, ensure_ascii=False, cls=UUIDEncoder) + "\n")
+        segmento = rotacion_log.cerrar(carpeta, nombre)
+    os.remove(legado)
+    return segmento
+
+
+def rotar_logs():
+    """
+    Rota todas las carpetas del log: convierte los JSON heredados y cierra
+    y comprime los segmentos de meses anteriores o llenos. Devuelve la
+    cantidad de segmentos cerrados.
+    """
+    vaciar_logs()
+    mes = rotacion_log.periodo(ahora_iso())
+    cerrados = migrados = 0
+    try:
+        empresas = os.listdir(LOG_DIR)
+    except FileNotFoundError:
+        return 0
+
+    for empresa_id in empresas:
+        carpeta_empresa = os.path.join(LOG_DIR, empresa_id)
+        if not os.path.isdir(carpeta_empresa):
+            continue
+        for nombre in os.listdir(carpeta_empresa):
+            if nombre.endswith(".json") and migrar_legado(empresa_id, nombre[:-len(".json")]):
+                migrados += 1
+        for usuario_id in os.listdir(carpeta_empresa):
+            carpeta = os.path.join(carpeta_empresa, usuario_id)
+            if os.path.isdir(carpeta):
+                with rotacion_log.bloquear(carpeta):
+                    cerrados += len(rotacion_log.rotar(carpeta, mes))
+
+    # Las sesiones de los JSON heredados no estaban en el índice
+    if migrados:
+        indice_sesiones.reconstruir()
+    return cerrados + migrados
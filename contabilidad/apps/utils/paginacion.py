@@ -0,0 +1,114 @@
+import base64
+import json
+from collections import OrderedDict
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Paginación por número de página (la de siempre) o por cursor (keyset)
+    cuando el cliente envía `?cursor=` (vacío para la primera página).
+
+    En modo cursor las filas se ordenan por (`view.cursor_field`, id) y cada
+    página se obtiene con un WHERE sobre esa clave en lugar de OFFSET, así
+    la página N cuesta lo mismo que la primera. Con un '-' delante
+    (`cursor_field = '-fecha'`) el orden es descendente, como en
+    order_by, para coincidir con el modo por página. El total (`count`) se puede
+    omitir con `?count=false` para evitar el COUNT(*).
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.base_url = remove_query_param(request.build_absolute_uri(), self.page_query_param)
+        page_size = self.get_page_size(request)
+        campo = getattr(view, 'cursor_field', 'pk')
+        descendente = campo.startswith('-')
+        campo = campo.lstrip('-')
+
+        cursor = self.decodificar_cursor(request.query_params.get(self.cursor_query_param))
+        reverso = bool(cursor and cursor['r'])
+        # Se recorre la clave hacia abajo al avanzar en orden descendente o al retroceder en ascendente
+        hacia_abajo = descendente != reverso
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() not in ('false', '0', 'no'):
+            self.count = queryset.count()
+
+        queryset = queryset.annotate(cursor_valor=F(campo))
+        if cursor:
+            op = 'lt' if hacia_abajo else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{campo}__{op}': cursor['v']}) |
+                Q(**{campo: cursor['v'], f'pk__{op}': cursor['id']})
+            )
+        orden = [f'-{campo}', '-pk'] if hacia_abajo else [campo, 'pk']
+        filas = list(queryset.order_by(*orden)[:page_size + 1])
+
+        hay_mas = len(filas) > page_size
+        filas = filas[:page_size]
+        if reverso:
+            filas.reverse()
+
+        self.next_cursor = self.previous_cursor = None
+        if filas:
+            # Hacia adelante hay siguiente si sobró una fila y anterior si se vino de un cursor;
+            # hacia atrás es al revés.
+            if (hay_mas and not reverso) or reverso:
+                self.next_cursor = self.codificar_cursor(filas[-1], reverso=False)
+            if (hay_mas and reverso) or (cursor and not reverso):
+                self.previous_cursor = self.codificar_cursor(filas[0], reverso=True)
+        return filas
+
+    def codificar_cursor(self, fila, reverso):
+        if isinstance(fila, dict):
+            # Filas de .values(): la clave primaria viene como 'id'
+            valor, pk = fila['cursor_valor'], fila['id']
+        else:
+            valor, pk = fila.cursor_valor, fila.pk
+        datos = {'v': valor, 'id': str(pk), 'r': int(reverso)}
+        return base64.urlsafe_b64encode(json.dumps(datos, default=str).encode()).decode()
+
+    def decodificar_cursor(self, valor):
+        if not valor:
+            return None
+        try:
+            datos = json.loads(base64.urlsafe_b64decode(valor.encode()))
+            return {'v': datos['v'], 'id': datos['id'], 'r': bool(datos.get('r'))}
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.next_cursor)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if self.previous_cursor is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.previous_cursor)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        respuesta = OrderedDict()
+        if self.count is not None:
+            respuesta['count'] = self.count
+        respuesta['next'] = self.get_next_link()
+        respuesta['previous'] = self.get_previous_link()
+        respuesta['results'] = data
+        return Response(respuesta)
@@ -0,0 +1,286 @@
+"""
+Rotación de los segmentos del log de auditoría (utils.log).
+
+Los segmentos de cada empresa/usuario son mensuales y se parten por tamaño:
+
+    <AAAA-MM>.<nnn>.jsonl      segmento abierto (se le siguen anexando líneas)
+    <AAAA-MM>.<nnn>.jsonl.gz   segmento cerrado, comprimido con gzip
+
+Un segmento se cierra cuando pasa TAMANO_SEGMENTO o cuando empieza otro mes.
+Al cerrarlo se comprime y se agrega al manifiesto de la carpeta
+(manifiesto.json) con su rango de fechas, la cantidad de registros y el
+tamaño sin comprimir; así una descarga por fechas elige los segmentos sin
+abrirlos. Los segmentos diarios anteriores (<AAAA-MM-DD>.jsonl) se leen
+igual y se cierran en la primera rotación.
+
+Varios procesos (workers de gunicorn, el comando rotar_logs) escriben y
+rotan la misma carpeta: elegir el segmento, anexar y cerrar se hace con la
+carpeta bloqueada (`bloquear`, flock sobre <carpeta>/.candado).
+"""
+import calendar
+import gzip
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo se excluyen los hilos del mismo proceso
+    fcntl = None
+
+EXTENSION = ".jsonl"
+COMPRIMIDO = ".gz"
+MANIFIESTO = "manifiesto.json"
+CANDADO = ".candado"
+TAMANO_SEGMENTO = 8 * 1024 * 1024
+TAMANO_BLOQUE = 64 * 1024
+
+PATRON = re.compile(
+    r"^(?P<periodo>\d{4}-\d{2}(?:-\d{2})?)(?:\.(?P<parte>\d{3,}))?\.jsonl(?P<gz>\.gz)?$"
+)
+
+
+_candado_local = threading.Lock()
+
+
+@contextmanager
+def bloquear(carpeta):
+    """
+    Bloqueo exclusivo de la carpeta entre procesos mientras se elige el
+    segmento, se anexa o se cierra. No es reentrante: las funciones de este
+    módulo no lo toman, lo toma quien las llama.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    if fcntl is None:
+        with _candado_local:
+            yield
+        return
+    with open(os.path.join(carpeta, CANDADO), "a+b") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def periodo(fecha_iso):
+    """Mes (AAAA-MM) de una fecha ISO."""
+    return fecha_iso[:7]
+
+
+def nombre_segmento(periodo_mes, parte):
+    return f"{periodo_mes}.{parte:03d}{EXTENSION}"
+
+
+def es_segmento(nombre):
+    return PATRON.match(nombre) is not None
+
+
+def clave_orden(nombre):
+    m = PATRON.match(nombre)
+    # Dentro de un mes, los segmentos diarios antiguos van antes que las partes mensuales
+    return m["periodo"][:7], len(m["periodo"]) == 7, m["periodo"], int(m["parte"] or 0)
+
+
+def listar(carpeta):
+    """Nombres de los segmentos (abiertos y cerrados) en orden cronológico."""
+    try:
+        nombres = os.listdir(carpeta)
+    except FileNotFoundError:
+        return []
+    return sorted((n for n in nombres if es_segmento(n)), key=clave_orden)
+
+
+def abrir(ruta):
+    """Abre un segmento en binario para leer, esté comprimido o no."""
+    return gzip.open(ruta, "rb") if ruta.endswith(COMPRIMIDO) else open(ruta, "rb")
+
+
+def abrir_vigente(ruta):
+    """
+    Como `abrir`, pero si el segmento abierto se cerró (comprimió y borró)
+    después de listarlo, abre su .gz: el contenido sin comprimir es el mismo.
+    """
+    try:
+        return abrir(ruta)
+    except FileNotFoundError:
+        if ruta.endswith(COMPRIMIDO):
+            raise
+        return abrir(ruta + COMPRIMIDO)
+
+
+def leer_manifiesto(carpeta):
+    try:
+        with open(os.path.join(carpeta, MANIFIESTO), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"segmentos": []}
+
+
+def guardar_manifiesto(carpeta, manifiesto):
+    ruta = os.path.join(carpeta, MANIFIESTO)
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, indent=2, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+def fecha_registro(linea):
+    """Fecha (datetime) de una línea del log, o None si no se puede leer."""
+    try:
+        registro = json.loads(linea)
+        valor = registro.get("fecha") or registro.get("fechaInicio") or registro.get("fechaFin")
+        return datetime.fromisoformat(valor.replace("Z", ""))
+    except (ValueError, AttributeError, TypeError):
+        return None
+
+
+def siguiente_parte(carpeta, periodo_segmento):
+    """Nombre de la parte que sigue a la última (abierta o cerrada) del periodo."""
+    partes = [
+        int(m["parte"] or 0) for m in (PATRON.match(n) for n in listar(carpeta))
+        if m["periodo"] == periodo_segmento
+    ]
+    return nombre_segmento(periodo_segmento, max(partes, default=0) + 1)
+
+
+def cerrar(carpeta, nombre):
+    """
+    Comprime un segmento abierto y lo registra en el manifiesto; devuelve su
+    entrada. Si ya existe un segmento cerrado con ese nombre no lo pisa:
+    el abierto pasa a la parte siguiente y se cierra con ese nombre.
+    """
+    ruta = os.path.join(carpeta, nombre)
+    if os.path.exists(ruta + COMPRIMIDO):
+        nombre = siguiente_parte(carpeta, PATRON.match(nombre)["periodo"])
+        nueva = os.path.join(carpeta, nombre)
+        os.replace(ruta, nueva)
+        ruta = nueva
+    destino = ruta + COMPRIMIDO
+    temporal = destino + ".tmp"
+
+    desde = hasta = None
+    registros = tamano = 0
+    with open(ruta, "rb") as entrada, gzip.open(temporal, "wb") as salida:
+        for linea in entrada:
+            salida.write(linea)
+            registros += 1
+            tamano += len(linea)
+            fecha = fecha_registro(linea)
+            if fecha is not None:
+                desde = fecha if desde is None else min(desde, fecha)
+                hasta = fecha if hasta is None else max(hasta, fecha)
+    os.replace(temporal, destino)
+    os.remove(ruta)
+
+    segmento = {
+        "archivo": nombre + COMPRIMIDO,
+        "desde": desde.isoformat() + "Z" if desde else None,
+        "hasta": hasta.isoformat() + "Z" if hasta else None,
+        "registros": registros,
+        "bytes": tamano,
+        "bytesComprimido": os.path.getsize(destino),
+    }
+    manifiesto = leer_manifiesto(carpeta)
+    segmentos = [s for s in manifiesto["segmentos"] if s["archivo"] != segmento["archivo"]]
+    segmentos.append(segmento)
+    manifiesto["segmentos"] = sorted(segmentos, key=lambda s: clave_orden(s["archivo"]))
+    guardar_manifiesto(carpeta, manifiesto)
+    return segmento
+
+
+def segmento_activo(carpeta, periodo_mes):
+    """(nombre, tamaño) del segmento abierto del mes; el siguiente si el último está cerrado."""
+    partes = [
+        m for m in (PATRON.match(n) for n in listar(carpeta))
+        if m["periodo"] == periodo_mes and m["parte"]
+    ]
+    if not partes:
+        return nombre_segmento(periodo_mes, 1), 0
+    ultimo = max(partes, key=lambda m: int(m["parte"]))
+    if ultimo["gz"]:
+        return nombre_segmento(periodo_mes, int(ultimo["parte"]) + 1), 0
+    return ultimo.string, os.path.getsize(os.path.join(carpeta, ultimo.string))
+
+
+def rotar(carpeta, periodo_actual, tamano_maximo=TAMANO_SEGMENTO):
+    """
+    Cierra los segmentos abiertos de meses anteriores (y los diarios
+    antiguos) y los que superan el tamaño máximo. Devuelve las entradas
+    agregadas al manifiesto.
+    """
+    cerrados = []
+    for nombre in listar(carpeta):
+        m = PATRON.match(nombre)
+        if m["gz"]:
+            continue
+        vencido = m["periodo"] != periodo_actual
+        if vencido or os.path.getsize(os.path.join(carpeta, nombre)) >= tamano_maximo:
+            cerrados.append(cerrar(carpeta, nombre))
+    return cerrados
+
+
+def rango_periodo(periodo_segmento):
+    """Primer y último día (AAAA-MM-DD) de un mes o de un día."""
+    if len(periodo_segmento) == 10:
+        return periodo_segmento, periodo_segmento
+    anio, mes = int(periodo_segmento[:4]), int(periodo_segmento[5:7])
+    return f"{periodo_segmento}-01", f"{periodo_segmento}-{calendar.monthrange(anio, mes)[1]:02d}"
+
+
+def tamano_descomprimido(ruta):
+    """Tamaño sin comprimir de un .gz leyendo el campo ISIZE del final (< 4 GB)."""
+    with open(ruta, "rb") as f:
+        f.seek(-4, os.SEEK_END)
+        return int.from_bytes(f.read(4), "little")
+
+
+def seleccionar(carpeta, desde=None, hasta=None):
+    """
+    Segmentos que pueden tener registros entre `desde` y `hasta` (date,
+    inclusive), como [(ruta, bytes sin comprimir)]. Los cerrados se eligen
+    por el rango del manifiesto y los abiertos por su mes.
+    """
+    manifiesto = {s["archivo"]: s for s in leer_manifiesto(carpeta)["segmentos"]}
+    elegidos = []
+    for nombre in listar(carpeta):
+        ruta = os.path.join(carpeta, nombre)
+        segmento = manifiesto.get(nombre)
+        if segmento and segmento["desde"]:
+            inicio, fin, tamano = segmento["desde"][:10], segmento["hasta"][:10], segmento["bytes"]
+        else:
+            inicio, fin = rango_periodo(PATRON.match(nombre)["periodo"])
+            tamano = tamano_descomprimido(ruta) if nombre.endswith(COMPRIMIDO) else os.path.getsize(ruta)
+
+        if desde and fin < desde.isoformat():
+            continue
+        if hasta and inicio > hasta.isoformat():
+            continue
+        elegidos.append((ruta, tamano))
+    return elegidos
+
+
+def leer_rango(segmentos, inicio, fin):
+    """Genera los bytes [inicio, fin] de la concatenación de los segmentos."""
+    posicion = 0
+    for ruta, tamano in segmentos:
+        if posicion + tamano <= inicio:
+            posicion += tamano
+            continue
+        if posicion > fin:
+            break
+        desplazamiento = max(inicio - posicion, 0)
+        restante = min(fin + 1 - posicion, tamano) - desplazamiento
+        with abrir_vigente(ruta) as f:
+            # En un .gz el seek descomprime hasta el punto, sin leer los demás segmentos
+            f.seek(desplazamiento)
+            while restante > 0:
+                datos = f.read(min(TAMANO_BLOQUE, restante))
+                if not datos:
+                    break
+                restante -= len(datos)
+                yield datos
+        posicion += tamano
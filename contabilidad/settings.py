@@ -172,6 +172,34 @@ DATABASES = {
     }
 }
 
+# Caché de reportes. En producción con varios procesos conviene un backend
+# compartido (p. ej. django.core.cache.backends.redis.RedisCache).
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='contabilidad'),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=2000, cast=int),
+        },
+    },
+    # Compartida por todos los procesos: versiones de los permisos de cada
+    # UserEmpresa (empresa.services.permisos). La de archivos sirve para los
+    # workers de un mismo servidor; con varios servidores, RedisCache.
+    'compartida': {
+        'BACKEND': config('CACHE_COMPARTIDA_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_COMPARTIDA_LOCATION', default=str(BASE_DIR / 'cache')),
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_COMPARTIDA_MAX_ENTRIES', default=100000, cast=int),
+        },
+    },
+}
+
+# Exportaciones a PDF en segundo plano (reporte.services.exportacion)
+PDF_EXPORT_DIR = config('PDF_EXPORT_DIR', default=str(BASE_DIR / 'exports'))
+PDF_EXPORT_WORKERS = config('PDF_EXPORT_WORKERS', default=2, cast=int)
+# Segundos tras los que un trabajo pendiente se considera abandonado
+PDF_EXPORT_TIMEOUT = config('PDF_EXPORT_TIMEOUT', default=600, cast=int)
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/